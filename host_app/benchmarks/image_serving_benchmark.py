@@ -0,0 +1,151 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Compares how much host CPU it takes to serve full resolution images with
+# sendfile, with the mmap fallback and with plain read() copies. The server
+# runs in its own process so only its CPU time is counted:
+#
+#   python benchmarks/image_serving_benchmark.py --size-mb 8 --clients 8 --seconds 5
+#
+# No database or setup is needed, a temporary file stands in for a blob.
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import http.client
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.protocol import HTTPServer
+from server.files import FileResponse, open_file_response
+
+COPY_CHUNK_SIZE = 256 * 1024
+
+class MappedFileResponse(FileResponse):
+    async def write_body(self, writer, loop):
+        await self.write_mapped(writer)
+
+class CopiedFileResponse(FileResponse):
+    """read() into Python bytes and write them, the baseline."""
+
+    async def write_body(self, writer, loop):
+        self.file.seek(self.offset)
+        remaining = self.length
+        while remaining > 0:
+            chunk = self.file.read(min(COPY_CHUNK_SIZE, remaining))
+            writer.write(chunk)
+            await writer.drain()
+            remaining -= len(chunk)
+
+RESPONSE_CLASSES = {"sendfile": FileResponse, "mmap": MappedFileResponse, "copy": CopiedFileResponse}
+
+def run_server(mode, path, port_queue, stop_event, cpu_queue):
+    response_class = RESPONSE_CLASSES[mode]
+
+    async def handler(request):
+        response = open_file_response(path, request)
+        return response_class(response.file, response.offset, response.length, status=response.status,
+                              headers=response.headers)
+
+    async def main():
+        http_server = HTTPServer(handler)
+        server = await http_server.start("127.0.0.1", 0)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        start_cpu = time.process_time()
+        await asyncio.get_running_loop().run_in_executor(None, stop_event.wait)
+        cpu_queue.put(time.process_time() - start_cpu)
+        server.close()
+        http_server.close_connections()
+        await server.wait_closed()
+        await asyncio.sleep(0.1)  # let the connection handlers see the EOF
+
+    asyncio.run(main())
+
+def run_clients(port, clients, seconds):
+    """Downloads the file over keep-alive connections, returns the bytes received."""
+    received = [0] * clients
+    stop = threading.Event()
+
+    def client(index):
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        buffer = bytearray(1024 * 1024)
+        while not stop.is_set():
+            connection.request("GET", "/image")
+            response = connection.getresponse()
+            while True:
+                read = response.readinto(buffer)
+                if not read:
+                    break
+                received[index] += read
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    stop.wait(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(received)
+
+def main():
+    parser = argparse.ArgumentParser(description="Image serving CPU cost benchmark.")
+    parser.add_argument("--size-mb", type=float, default=8, help="size of the served file")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent keep-alive connections")
+    parser.add_argument("--seconds", type=float, default=5, help="duration of every mode")
+    parser.add_argument("--modes", nargs="+", choices=RESPONSE_CLASSES, default=list(RESPONSE_CLASSES))
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as file:
+        file.write(b"\xff\xd8\xff" + os.urandom(int(args.size_mb * 1024 * 1024)))
+        path = file.name
+
+    try:
+        print(f"{'mode':<10}{'MiB/s':>10}{'server CPU s':>14}{'CPU s per GiB':>15}")
+        for mode in args.modes:
+            port_queue, cpu_queue = multiprocessing.Queue(), multiprocessing.Queue()
+            stop_event = multiprocessing.Event()
+            process = multiprocessing.Process(target=run_server, args=(mode, path, port_queue, stop_event, cpu_queue))
+            process.start()
+            port = port_queue.get()
+
+            start = time.perf_counter()
+            received = run_clients(port, args.clients, args.seconds)
+            elapsed = time.perf_counter() - start
+            stop_event.set()
+            cpu = cpu_queue.get()
+            process.join()
+
+            gib = received / 1024 ** 3
+            print(f"{mode:<10}{received / 1024 ** 2 / elapsed:>10.0f}{cpu:>14.2f}{cpu / gib if gib else 0:>15.3f}")
+    finally:
+        os.remove(path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Measures logins and session validations per second with concurrent clients
+# against the ODDM Toolkit database of this host. Needs a completed host setup
+# and an active user:
+#
+#   python benchmarks/login_benchmark.py --user alice --password secret --clients 16 --seconds 10
+#
+# "cold" logins run Argon2 every time, "warm" logins hit the verified
+# credential cache, validations hit the in-memory session cache.
+
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import connect_to_oddm_toolkit_db, close_all_pools, shutdown_hashing_service
+from utils.auth_service import AuthService
+
+def run_clients(clients, seconds, operation):
+    """Calls operation() from `clients` threads for `seconds`, returns (calls, failures, elapsed)."""
+    counts = [0] * clients
+    failures = [0] * clients
+    stop = threading.Event()
+
+    def client(index):
+        while not stop.is_set():
+            if operation():
+                counts[index] += 1
+            else:
+                failures[index] += 1
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts), sum(failures), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Login and session validation benchmark.")
+    parser.add_argument("--user", required=True, help="username or email of an active user")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--seconds", type=float, default=10, help="duration of every phase")
+    args = parser.parse_args()
+
+    if not connect_to_oddm_toolkit_db():
+        print("❌ Could not connect to the ODDM Toolkit database. Has the host setup been completed?")
+        return 1
+
+    try:
+        cold = AuthService(credential_cache_ttl=0)  # every login runs Argon2
+        warm = AuthService()
+        first = warm.login(args.user, args.password)
+        if not first["success"]:
+            print(f"❌ {first['error']}")
+            return 1
+        token = first["token"]
+        tokens = []
+
+        def cold_login():
+            res = cold.login(args.user, args.password)
+            if res["success"]:
+                tokens.append((cold, res["token"]))
+            return res["success"]
+
+        def warm_login():
+            res = warm.login(args.user, args.password)
+            if res["success"]:
+                tokens.append((warm, res["token"]))
+            return res["success"]
+
+        phases = [
+            ("cold logins (Argon2)", cold_login),
+            ("warm logins (credential cache)", warm_login),
+            ("session validations", lambda: warm.validate(token) is not None),
+        ]
+        for name, operation in phases:
+            calls, failures, elapsed = run_clients(args.clients, args.seconds, operation)
+            print(f"{name:<34} {calls / elapsed:>10.1f} /s  ({calls} ok, {failures} failed, {args.clients} clients)")
+
+        # Do not leave thousands of benchmark sessions behind
+        for service, session_token in tokens + [(warm, token)]:
+            service.logout(session_token)
+    finally:
+        shutdown_hashing_service()
+        close_all_pools()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
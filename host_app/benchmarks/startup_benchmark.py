@@ -0,0 +1,137 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Measures host app startup: import time of the main modules and the time from
+# process start until the setup window is painted for the first time.
+#
+# Every run is a fresh interpreter so imports are not cached between runs.
+# Results can be saved and compared against a previous run to catch regressions:
+#
+#   python benchmarks/startup_benchmark.py --runs 5 --save startup_baseline.json
+#   python benchmarks/startup_benchmark.py --runs 5 --baseline startup_baseline.json --tolerance 0.25
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+HOST_APP_DIR = Path(__file__).resolve().parent.parent
+
+# Imported in this order, like host_setup.py does
+MEASURED_IMPORTS = [
+    "PySide6.QtWidgets",
+    "utils",
+    "ui.startup_window",
+    "ui.host_setup_ui",
+]
+
+# Runs in the child interpreter. Prints one JSON object with the timings in ms.
+CHILD_SCRIPT = r"""
+import sys, time, json, importlib
+process_start = time.perf_counter()
+sys.path.insert(0, HOST_APP_DIR)
+
+timings = {}
+for module in MEASURED_IMPORTS:
+    start = time.perf_counter()
+    importlib.import_module(module)
+    timings["import " + module] = (time.perf_counter() - start) * 1000
+
+from PySide6.QtCore import QObject, QEvent, QTimer
+from PySide6.QtWidgets import QApplication
+from ui.host_setup_ui import SetupPasswordWidget
+
+app = QApplication(sys.argv)
+start = time.perf_counter()
+window = SetupPasswordWidget()
+timings["construct SetupPasswordWidget"] = (time.perf_counter() - start) * 1000
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and "first paint" not in timings:
+            timings["first paint"] = (time.perf_counter() - process_start) * 1000
+            QTimer.singleShot(0, app.quit)
+        return False
+
+paint_filter = FirstPaint()
+window.installEventFilter(paint_filter)
+window.show()
+QTimer.singleShot(10000, app.quit)  # never hang if nothing gets painted
+app.exec()
+
+print(json.dumps(timings))
+"""
+
+def run_once(offscreen):
+    env = dict(os.environ)
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    script = f"HOST_APP_DIR = {str(HOST_APP_DIR)!r}\nMEASURED_IMPORTS = {MEASURED_IMPORTS!r}\n" + CHILD_SCRIPT
+    res = subprocess.run([sys.executable, "-c", script], cwd=HOST_APP_DIR, env=env, capture_output=True, text=True)
+    if res.returncode != 0:
+        raise RuntimeError(f"Benchmark run failed:\n{res.stderr}")
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+def compare(results, baseline, tolerance):
+    """Returns the metrics slower than baseline * (1 + tolerance)."""
+    regressions = []
+    for metric, value in results.items():
+        reference = baseline.get(metric)
+        if reference and value > reference * (1 + tolerance):
+            regressions.append((metric, reference, value))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Host app startup benchmark.")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreter runs, the median is reported")
+    parser.add_argument("--offscreen", action="store_true", help="use the offscreen Qt platform (no display needed)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    runs = [run_once(args.offscreen) for _ in range(args.runs)]
+    results = {metric: round(statistics.median(run[metric] for run in runs if metric in run), 2) for metric in runs[0]}
+
+    for metric, value in results.items():
+        print(f"{metric:<40} {value:>10.2f} ms")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for metric, reference, value in regressions:
+            print(f"❌ {metric}: {value:.2f} ms, baseline {reference:.2f} ms")
+        if regressions:
+            return 1
+        print("✅ No startup regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
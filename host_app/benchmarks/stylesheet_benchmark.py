@@ -0,0 +1,138 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Micro-benchmark for the shared stylesheet: cost of building every setup page
+# and of toggling input validation states, compared with the old approach of
+# giving each widget its own f-string stylesheet.
+#
+#   python benchmarks/stylesheet_benchmark.py --offscreen --widgets 300 --toggles 20
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def legacy_input_stylesheet(border_color):
+    """What every line edit used to pass to setStyleSheet on each state change."""
+    from ui.theme import INPUT_BG_COLOR, TEXT_PRIMARY_COLOR, TEXT_SIZE_INPUT_FEILD, TEXT_FONT_FAMILY
+    return f"""
+        background-color: {INPUT_BG_COLOR};
+        border: 2px solid {border_color};
+        color: {TEXT_PRIMARY_COLOR};
+        padding: 5px;
+        font-size: {TEXT_SIZE_INPUT_FEILD};
+        border-radius: 4px;
+        font-family: {TEXT_FONT_FAMILY};
+        font-weight: bold;
+    """
+
+def timed_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stylesheet build and state toggle benchmark.")
+    parser.add_argument("--offscreen", action="store_true", help="use the offscreen Qt platform (no display needed)")
+    parser.add_argument("--widgets", type=int, default=300, help="line edits in the state toggle test")
+    parser.add_argument("--toggles", type=int, default=20, help="error/normal toggles per line edit")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions, the median is reported")
+    args = parser.parse_args()
+
+    if args.offscreen:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+    from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QLineEdit
+    from ui.theme import (build_application_stylesheet, apply_application_theme, set_style_property,
+                          ERROR_COLOR, INPUT_BORDER_COLOR)
+    from ui.host_setup_ui import SetupPasswordWidget, SimpleLineEdit
+
+    app = QApplication(sys.argv)
+    results = {}
+
+    def build_stylesheet():
+        build_application_stylesheet.cache_clear()
+        build_application_stylesheet()
+    results["build application stylesheet"] = timed_ms(build_stylesheet, args.repeat)
+
+    apply_application_theme(app)
+
+    def build_all_pages():
+        window = SetupPasswordWidget()
+        for index in range(window.stacked_widget.count()):
+            window.stacked_widget.ensure_page(index)
+        window.show()
+        app.processEvents()
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+    results["build every setup page"] = timed_ms(build_all_pages, args.repeat)
+
+    def toggle_states(make_input, set_error, set_normal):
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        inputs = [make_input() for _ in range(args.widgets)]
+        for line_edit in inputs:
+            layout.addWidget(line_edit)
+        container.show()
+        app.processEvents()
+
+        def run():
+            for _ in range(args.toggles):
+                for line_edit in inputs:
+                    set_error(line_edit)
+                    set_normal(line_edit)
+            app.processEvents()
+        elapsed = timed_ms(run, args.repeat)
+        container.close()
+        container.deleteLater()
+        app.processEvents()
+        return elapsed
+
+    def make_legacy_input():
+        line_edit = QLineEdit()
+        line_edit.setStyleSheet(legacy_input_stylesheet(INPUT_BORDER_COLOR))
+        return line_edit
+
+    error_css = legacy_input_stylesheet(ERROR_COLOR)
+    normal_css = legacy_input_stylesheet(INPUT_BORDER_COLOR)
+    results["toggle states, per-widget stylesheet"] = toggle_states(
+        make_legacy_input, lambda w: w.setStyleSheet(error_css), lambda w: w.setStyleSheet(normal_css))
+    results["toggle states, dynamic property"] = toggle_states(
+        SimpleLineEdit, lambda w: set_style_property(w, "state", "error"),
+        lambda w: set_style_property(w, "state", "normal"))
+
+    state_changes = args.widgets * args.toggles * 2
+    for metric, value in results.items():
+        per_change = f"  ({value * 1000 / state_changes:.1f} us per change)" if metric.startswith("toggle") else ""
+        print(f"{metric:<40} {value:>10.2f} ms{per_change}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from utils import connect_to_oddm_toolkit_db, close_all_pools, load_calibrated_profile
+from utils.hashing import shutdown_hashing_service
+from utils.permissions import get_permission_cache
+from server.app import ApiServer, DB_EXECUTOR_WORKERS
+import argparse
+import asyncio
+import signal
+import sys
+
+DEFAULT_PORT = 8765
+
+async def serve(host, port, db_workers):
+    api = ApiServer(db_workers=db_workers)
+    await api.start(host, port)
+    print(f"✅ ODDM Toolkit host API listening on http://{host}:{port}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows, Ctrl+C raises KeyboardInterrupt instead
+    try:
+        await stop.wait()
+    finally:
+        print("Shutting down the host API...")
+        await api.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the ODDM Toolkit host API to annotator clients.")
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on (default: all interfaces)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--db-workers", type=int, default=DB_EXECUTOR_WORKERS,
+                        help=f"database worker threads and pooled connections (default: {DB_EXECUTOR_WORKERS})")
+    args = parser.parse_args()
+
+    # One pooled connection per worker thread, so a worker never waits for a connection
+    if not connect_to_oddm_toolkit_db(maxconn=args.db_workers):
+        print("❌ Could not connect to the ODDM Toolkit database. Has the host setup been completed?")
+        return 1
+
+    # Same Argon2 parameters as the setup app, otherwise every login would rehash
+    load_calibrated_profile()
+    permission_cache = get_permission_cache()
+    try:
+        permission_cache.warm()
+        asyncio.run(serve(args.host, args.port, args.db_workers))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        permission_cache.stop_listening()
+        shutdown_hashing_service()
+        close_all_pools()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,35 +20,133 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from utils import create_oddm_setup_file, connect_to_psql_db, setup_oddm_toolkit_db
+from utils import create_oddm_setup_file, connect_to_psql_db, close_all_pools, shutdown_hashing_service
+from utils import get_setup_config, connect_to_oddm_toolkit_db, load_calibrated_profile
 import sys
+import socket
 from PySide6.QtWidgets import QApplication
 from ui.startup_window import boot_window
 from ui.host_setup_ui import SetupPasswordWidget
-from utils.database import check_if_admin_exists_in_oddm_db
+from ui.workers import Worker
+from ui.theme import apply_application_theme
+from utils.database import check_if_admin_exists_in_oddm_db, create_setup_context, run_setup_steps
 import json
 
+# Give up on a background database operation after this long
+DB_CHECK_TIMEOUT_MS = 30000
+DB_SETUP_TIMEOUT_MS = 120000
+
+PSQL_HOST = "localhost"
+PSQL_PORT = 5432
+DB_PROBE_TIMEOUT = 1.5  # seconds, a local server answers well within this
+
+# Boot tasks, run in order on a worker thread while the splash screen is shown.
+# Each one receives the results of the tasks before it.
+def boot_load_config(results):
+    try:
+        config = get_setup_config()
+    except FileNotFoundError as e:
+        return {"success": False, "error": str(e)}
+    return {"success": True, "data_storage_path": str(config.data_storage_path)}
+
+def boot_probe_database(results):
+    """Plain TCP connect, fails fast when PostgreSQL is not running."""
+    try:
+        with socket.create_connection((PSQL_HOST, PSQL_PORT), timeout=DB_PROBE_TIMEOUT):
+            pass
+    except OSError as e:
+        return {"success": False, "error": f"PostgreSQL is not reachable on {PSQL_HOST}:{PSQL_PORT}: {e}"}
+    return {"success": True}
+
+def boot_prime_connection_pool(results):
+    if not results["config"]["success"] or not results["database"]["success"]:
+        return {"success": False, "error": "Skipped, setup is not complete or the database is down."}
+    return {"success": connect_to_oddm_toolkit_db()}
+
+def boot_load_hashing_profile(results):
+    """Applies the saved hashing parameters, they are only calibrated on the first run."""
+    if not results["config"]["success"]:
+        return {"success": False, "error": "Skipped, setup is not complete."}
+    return load_calibrated_profile()
+
+BOOT_TASKS = [
+    ("config", "Loading configuration...", boot_load_config),
+    ("database", "Checking database...", boot_probe_database),
+    ("pool", "Connecting to database...", boot_prime_connection_pool),
+    ("hashing", "Loading password hashing settings...", boot_load_hashing_profile),
+]
+
+def check_psql_password(password):
+    """Runs on a worker thread. Connects to PostgreSQL and checks for an existing admin."""
+    if not connect_to_psql_db(password):
+        return {"success": False}
+    return {"success": True, "admin_exists": check_if_admin_exists_in_oddm_db(password)}
+
 class ODDM_host_setup:
     def __init__(self):
         self.app = QApplication(sys.argv)
-        self.boot = boot_window()
+        apply_application_theme(self.app)  # one stylesheet for every window
+        self.app.aboutToQuit.connect(self.cancel_background_work)
+        self.worker = None
+        self.boot = boot_window(BOOT_TASKS)
         
         self.boot.boot_complete.connect(self.launch_password_ui)
 
     def launch_password_ui(self):
         self.user_credentials = None
+        self.setup_resume_step = 0  # setup step to resume from after a failure
         self.password_ui = SetupPasswordWidget()
         self.password_ui.passwordSubmitted.connect(self.verify_password)
         self.password_ui.userDetailsSubmitted.connect(self.get_user_details)
         self.password_ui.local_storage_selected.connect(self.generate_setup_file)
         self.password_ui.show()
 
+    def run_in_background(self, worker, on_finished, timeout_ms, on_failed):
+        """Starts a worker, the setup window stays responsive but locked until it ends.
+
+        After a timeout the worker keeps running until its next cancel checkpoint,
+        the window stays locked until it has actually stopped.
+        """
+        self.worker = worker
+        self.password_ui.set_busy(True, "Working...")
+        worker.signals.progress.connect(self.password_ui.show_progress)
+        worker.signals.finished.connect(lambda res: self.end_background_work(on_finished, res))
+        worker.signals.failed.connect(lambda error: self.end_background_work(on_failed, error))
+        worker.signals.timed_out.connect(lambda: self.on_background_timeout(on_failed))
+        worker.signals.cancelled.connect(lambda: self.end_background_work(on_failed, "The operation was cancelled."))
+        worker.signals.stopped.connect(lambda: self.on_background_stopped(worker))
+        worker.start(timeout_ms=timeout_ms)
+
+    def end_background_work(self, callback, value):
+        self.worker = None
+        self.password_ui.set_busy(False)
+        callback(value)
+
+    def on_background_timeout(self, callback):
+        # self.worker is kept, on_background_stopped unlocks the window
+        self.password_ui.set_busy(True, "Waiting for the timed out operation to stop...")
+        callback("The database did not respond in time.")
+
+    def on_background_stopped(self, worker):
+        if self.worker is worker:
+            self.worker = None
+            self.password_ui.set_busy(False)
+
+    def cancel_background_work(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
     def verify_password(self, password):
         """Verifies the PostgreSQL password."""
-        if connect_to_psql_db(password):
+        self.pending_psql_password = password
+        self.run_in_background(Worker(check_psql_password, password), self.on_password_verified,
+                               DB_CHECK_TIMEOUT_MS, self.on_password_check_failed)
+
+    def on_password_verified(self, res):
+        if res["success"]:
             print("✅ Password correct! Proceeding with setup...")
-            self.Admin_psql_password = password
-            if check_if_admin_exists_in_oddm_db(password):
+            self.Admin_psql_password = self.pending_psql_password
+            if res["admin_exists"]:
                 self.password_ui.stacked_widget.setCurrentIndex(4)
             else:
                 self.password_ui.stacked_widget.setCurrentIndex(1)
@@ -56,9 +154,25 @@ class ODDM_host_setup:
             self.password_ui.show_error_dialog("Incorrect password. Please try again.")
             self.password_ui.reset_psql_password_input()
 
+    def on_password_check_failed(self, error):
+        self.password_ui.show_error_dialog(f"Could not verify the password: {error}")
+        self.password_ui.reset_psql_password_input()
+
     def get_user_details(self, oddm_password, superuser_email, superuser_name, superuser_password ):
-        self.user_credentials = setup_oddm_toolkit_db(oddm_password, self.Admin_psql_password, superuser_email, superuser_name, superuser_password)
+        context = create_setup_context(oddm_password, self.Admin_psql_password, superuser_email, superuser_name, superuser_password)
+        worker = Worker(run_setup_steps, context, start_step=self.setup_resume_step, pass_controls=True)
+        worker.signals.progress.connect(self.on_setup_progress)
+        self.run_in_background(worker, self.on_setup_finished, DB_SETUP_TIMEOUT_MS, self.on_setup_failed)
+
+    def on_setup_progress(self, step_index, step_count, description):
+        # Steps before the one started last are done, a retry after a timeout resumes there
+        self.setup_resume_step = step_index
+
+    def on_setup_finished(self, res):
+        self.user_credentials = res
         if not self.user_credentials["success"]:
+            # Steps before the failed one are done, retry from the failed one
+            self.setup_resume_step = self.user_credentials.get("failed_step", 0)
             if self.user_credentials["error_id"] == "ERR-ODDM-STUP-001" or self.user_credentials["error_id"] == "ERR-ODDM-STUP-002":
                 self.password_ui.show_error_dialog(self.user_credentials["error"])
                 self.password_ui.reset_oddm_db_password_input()
@@ -71,18 +185,26 @@ class ODDM_host_setup:
 
         self.password_ui.stacked_widget.setCurrentIndex(5)
 
-    def generate_setup_file(self, service_json_data, data_storage_path ):
+    def on_setup_failed(self, error):
+        self.password_ui.show_error_dialog(f"ODDM Toolkit setup failed: {error}")
+        self.password_ui.stacked_widget.setCurrentIndex(1)
+
+    def generate_setup_file(self, service_json_data, data_storage_path, gdrive_folder_id ):
         oddm_setup_data = self.user_credentials["credentials"]
         if service_json_data != "":
             oddm_setup_data["gdrive_service_json_data"] = {"status": True, "data": json.loads( service_json_data ) }
         else:
             oddm_setup_data["gdrive_service_json_data"] = {"status": False, "data": None }
+        oddm_setup_data["gdrive_folder_id"] = gdrive_folder_id
         oddm_setup_data["data_storage_path"] = data_storage_path
         create_oddm_setup_file(oddm_setup_data)
         self.password_ui.stacked_widget.setCurrentIndex(6)
 
     def run(self):
-        sys.exit(self.app.exec())
+        exit_code = self.app.exec()
+        close_all_pools()  # Release pooled database connections
+        shutdown_hashing_service()  # Stop the password hashing worker processes
+        sys.exit(exit_code)
 
 if __name__ == "__main__":
     setup = ODDM_host_setup()
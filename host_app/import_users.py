@@ -0,0 +1,53 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from utils import connect_to_oddm_toolkit_db, import_users_from_csv, close_all_pools
+import argparse
+import sys
+
+def main():
+    parser = argparse.ArgumentParser(description="Create ODDM Toolkit users in bulk from a CSV file.")
+    parser.add_argument("csv_path", help="CSV file with the columns username, email and optionally password, is_admin, is_active")
+    args = parser.parse_args()
+
+    if not connect_to_oddm_toolkit_db():
+        print("❌ Could not connect to the ODDM Toolkit database. Has the host setup been completed?")
+        return 1
+
+    try:
+        res = import_users_from_csv(args.csv_path)
+    finally:
+        close_all_pools()
+
+    if not res["success"]:
+        print(f"❌ {res['error']}")
+        return 1
+
+    for line_no, user_res in enumerate(res["results"], start=2):  # line 1 is the header
+        if not user_res["success"]:
+            print(f"Line {line_no}: {user_res['error_id']} {user_res['error']}")
+
+    print(f"✅ Imported {res['inserted']} user(s), {res['failed']} failed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
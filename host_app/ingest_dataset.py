@@ -0,0 +1,66 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from utils import connect_to_oddm_toolkit_db, close_all_pools
+from utils.ingest import ingest_dataset
+import argparse
+import sys
+
+def print_progress(images_done, total, summary):
+    print(f"  {summary}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a folder of images and YOLO / Pascal VOC labels into a project.")
+    parser.add_argument("project_id", type=int, help="id of the project to import into")
+    parser.add_argument("source_dir", help="folder with the images, labels next to them or in labels/ or Annotations/")
+    parser.add_argument("--classes", help="file with the YOLO class names, one per line (default: classes.txt in source_dir)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-thumbnails", action="store_true", help="do not build thumbnails while importing")
+    args = parser.parse_args()
+
+    class_names = None
+    if args.classes:
+        with open(args.classes, "r", encoding="utf-8") as f:
+            class_names = [line.strip() for line in f if line.strip()]
+
+    if not connect_to_oddm_toolkit_db():
+        print("❌ Could not connect to the ODDM Toolkit database. Has the host setup been completed?")
+        return 1
+
+    try:
+        res = ingest_dataset(args.project_id, args.source_dir, class_names=class_names,
+                             thumbnails=not args.no_thumbnails, max_workers=args.workers,
+                             progress_callback=print_progress)
+    finally:
+        close_all_pools()
+
+    if not res["success"]:
+        print(f"❌ {res['error']}")
+        return 1
+
+    stats = res["stats"]
+    print(f"✅ Imported {stats['images']} image(s) and {stats['boxes']} box(es) in {stats['elapsed_s']} s "
+          f"({stats['images_per_s']} images/s), {stats['errors']} failed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+-- Users of the ODDM Toolkit. IF NOT EXISTS keeps databases created before
+-- the migration engine existed working.
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(50) UNIQUE,  -- Unique, nullable until registration completes
+    email VARCHAR(100) UNIQUE NOT NULL,
+    password_hash VARCHAR(255),   -- Nullable until user sets a password
+    is_admin BOOLEAN DEFAULT FALSE,
+    is_active BOOLEAN DEFAULT FALSE,  -- Becomes TRUE after registration
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
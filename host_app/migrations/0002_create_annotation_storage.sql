@@ -0,0 +1,64 @@
+-- Projects, images and bounding box annotations.
+
+CREATE TABLE projects (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) UNIQUE NOT NULL,
+    description TEXT,
+    created_by INTEGER REFERENCES users(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- class_id is the YOLO class index, names are unique per project
+CREATE TABLE project_classes (
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    class_id SMALLINT NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (project_id, class_id),
+    UNIQUE (project_id, name)
+);
+
+CREATE TABLE images (
+    id BIGSERIAL PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    file_name TEXT NOT NULL,  -- path relative to the dataset root
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (project_id, file_name)
+);
+
+-- Keyset pagination of a project's images
+CREATE INDEX images_project_id_idx ON images (project_id, id);
+
+-- Tens of millions of rows: hash partitioned by project so per project scans
+-- and index maintenance stay small. Columns are ordered largest first to avoid
+-- alignment padding, boxes are stored as REAL pixel coordinates (4 bytes each).
+CREATE TABLE annotations (
+    id BIGSERIAL,
+    image_id BIGINT NOT NULL REFERENCES images(id) ON DELETE CASCADE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    project_id INTEGER NOT NULL,
+    created_by INTEGER REFERENCES users(id),
+    x_min REAL NOT NULL,
+    y_min REAL NOT NULL,
+    x_max REAL NOT NULL,
+    y_max REAL NOT NULL,
+    class_id SMALLINT NOT NULL,
+    PRIMARY KEY (project_id, id),
+    FOREIGN KEY (project_id, class_id) REFERENCES project_classes(project_id, class_id)
+) PARTITION BY HASH (project_id);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format('CREATE TABLE annotations_p%s PARTITION OF annotations FOR VALUES WITH (MODULUS 16, REMAINDER %s);', i, i);
+    END LOOP;
+END $$;
+
+-- "All boxes for image": answered by an index-only scan
+CREATE INDEX annotations_image_idx ON annotations (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max);
+
+-- "All images containing class X": answered by an index-only scan
+CREATE INDEX annotations_class_image_idx ON annotations (project_id, class_id, image_id);
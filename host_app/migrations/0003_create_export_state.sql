@@ -0,0 +1,12 @@
+-- What was last exported for every image, per export format. Lets exporters
+-- rewrite only the images whose content hash changed. No foreign key on
+-- image_id: rows of deleted images are needed to remove their exported files.
+CREATE TABLE export_state (
+    image_id BIGINT NOT NULL,
+    exported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    export_format VARCHAR(20) NOT NULL,
+    content_hash CHAR(32) NOT NULL,  -- md5 of the exported image metadata and boxes
+    file_name TEXT NOT NULL,
+    PRIMARY KEY (project_id, export_format, image_id)
+);
@@ -0,0 +1,4 @@
+-- sha256 of the image file, key of the file in the content addressed store
+-- (<data_storage_path>/objects). Many images rows may share one stored file.
+-- Its index is built concurrently by 0010_add_image_content_hash_index.
+ALTER TABLE images ADD COLUMN content_hash CHAR(64);
@@ -0,0 +1,34 @@
+-- Dataset releases. A version stores only the annotations that were added,
+-- removed or changed since its parent (copy on write). Every few releases a
+-- full snapshot is stored instead, so materializing a version never has to
+-- walk a long chain of deltas.
+CREATE TABLE dataset_versions (
+    id SERIAL PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    parent_id INTEGER REFERENCES dataset_versions(id),
+    name VARCHAR(100) NOT NULL,
+    description TEXT,
+    is_snapshot BOOLEAN NOT NULL DEFAULT FALSE,  -- deltas hold every box, the chain stops here
+    chain_length INTEGER NOT NULL DEFAULT 0,     -- versions since the last snapshot
+    box_count BIGINT NOT NULL DEFAULT 0,
+    created_by INTEGER REFERENCES users(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (project_id, name)
+);
+
+CREATE INDEX dataset_versions_project_idx ON dataset_versions (project_id, id);
+
+-- op: 'A' added, 'R' removed, 'C' changed. Removed rows carry no box values.
+-- No foreign keys to annotations or images, history outlives the working set.
+CREATE TABLE dataset_version_deltas (
+    version_id INTEGER NOT NULL REFERENCES dataset_versions(id) ON DELETE CASCADE,
+    annotation_id BIGINT NOT NULL,
+    image_id BIGINT NOT NULL,
+    x_min REAL,
+    y_min REAL,
+    x_max REAL,
+    y_max REAL,
+    class_id SMALLINT,
+    op CHAR(1) NOT NULL CHECK (op IN ('A', 'R', 'C')),
+    PRIMARY KEY (version_id, annotation_id)
+);
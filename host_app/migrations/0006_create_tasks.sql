@@ -0,0 +1,26 @@
+-- Work queue for the modify / review / verify workflow. Workers claim rows
+-- with FOR UPDATE SKIP LOCKED, so concurrent claims never wait on each other
+-- and never get the same task. A claim is a lease: when it expires without
+-- the task being completed the task goes back to the queue.
+CREATE TABLE tasks (
+    id BIGSERIAL PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    image_id BIGINT REFERENCES images(id) ON DELETE CASCADE,
+    kind VARCHAR(10) NOT NULL CHECK (kind IN ('modify', 'review', 'verify')),
+    priority SMALLINT NOT NULL DEFAULT 1,  -- lane, lower is served first (0 urgent, 1 normal, 2 background)
+    status VARCHAR(10) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'claimed', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    assigned_to INTEGER REFERENCES users(id),
+    lease_expires_at TIMESTAMP,
+    created_by INTEGER REFERENCES users(id),
+    payload JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+-- Claim order. Partial, so finished tasks never bloat it.
+CREATE INDEX tasks_queue_idx ON tasks (project_id, priority, id) WHERE status = 'queued';
+-- Expired lease scan and per user outstanding counts
+CREATE INDEX tasks_lease_idx ON tasks (lease_expires_at) WHERE status = 'claimed';
+CREATE INDEX tasks_assigned_idx ON tasks (assigned_to) WHERE status = 'claimed';
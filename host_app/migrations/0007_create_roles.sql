@@ -0,0 +1,76 @@
+-- Role based access control. A user's effective permissions are the union of
+-- the permissions of their roles, admins (users.is_admin) have all of them.
+CREATE TABLE roles (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(50) UNIQUE NOT NULL,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE role_permissions (
+    role_id INTEGER NOT NULL REFERENCES roles(id) ON DELETE CASCADE,
+    permission VARCHAR(50) NOT NULL,
+    PRIMARY KEY (role_id, permission)
+);
+
+CREATE TABLE user_roles (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    role_id INTEGER NOT NULL REFERENCES roles(id) ON DELETE CASCADE,
+    granted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, role_id)
+);
+
+CREATE INDEX user_roles_role_idx ON user_roles (role_id);
+
+INSERT INTO roles (name, description) VALUES
+    ('annotator', 'Modifies annotations'),
+    ('reviewer', 'Reviews modified annotations'),
+    ('verifier', 'Verifies reviewed annotations'),
+    ('viewer', 'Read only access to datasets');
+
+INSERT INTO role_permissions (role_id, permission)
+SELECT r.id, p.permission
+FROM roles r
+JOIN (VALUES
+    ('annotator', 'datasets.view'), ('annotator', 'annotations.modify'), ('annotator', 'tasks.claim'),
+    ('reviewer', 'datasets.view'), ('reviewer', 'annotations.review'), ('reviewer', 'tasks.claim'),
+    ('verifier', 'datasets.view'), ('verifier', 'annotations.verify'), ('verifier', 'tasks.claim'),
+    ('viewer', 'datasets.view')
+) AS p(role_name, permission) ON p.role_name = r.name;
+
+-- Permission caches LISTEN on this channel. The payload is 'user:<id>' when a
+-- single user is affected and '*' when a role changed. NOTIFY is delivered on
+-- commit and identical payloads of one transaction are sent once.
+CREATE FUNCTION oddm_notify_permissions_changed() RETURNS trigger AS $$
+DECLARE
+    row_data RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := OLD;
+    ELSE
+        row_data := NEW;
+    END IF;
+
+    IF TG_TABLE_NAME = 'user_roles' THEN
+        PERFORM pg_notify('oddm_permissions', 'user:' || row_data.user_id);
+    ELSIF TG_TABLE_NAME = 'users' THEN
+        PERFORM pg_notify('oddm_permissions', 'user:' || row_data.id);
+    ELSE
+        PERFORM pg_notify('oddm_permissions', '*');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER user_roles_notify AFTER INSERT OR UPDATE OR DELETE ON user_roles
+    FOR EACH ROW EXECUTE FUNCTION oddm_notify_permissions_changed();
+
+CREATE TRIGGER role_permissions_notify AFTER INSERT OR UPDATE OR DELETE ON role_permissions
+    FOR EACH ROW EXECUTE FUNCTION oddm_notify_permissions_changed();
+
+CREATE TRIGGER roles_notify AFTER DELETE ON roles
+    FOR EACH ROW EXECUTE FUNCTION oddm_notify_permissions_changed();
+
+-- New users and the columns that change permissions, password or profile updates stay silent
+CREATE TRIGGER users_permissions_notify AFTER INSERT OR UPDATE OF is_admin, is_active OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION oddm_notify_permissions_changed();
@@ -0,0 +1,19 @@
+-- Login sessions. Only the sha256 of the session id is stored, a leaked row
+-- cannot be turned back into a working token.
+CREATE TABLE sessions (
+    token_hash CHAR(64) PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    user_agent TEXT
+);
+
+CREATE INDEX sessions_user_idx ON sessions (user_id);
+CREATE INDEX sessions_expires_idx ON sessions (expires_at);
+
+-- Secrets shared by every host process, e.g. the session token signing key
+CREATE TABLE host_secrets (
+    name VARCHAR(50) PRIMARY KEY,
+    value BYTEA NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,5 @@
+-- Optimistic concurrency for box edits. Every write bumps row_version, a client
+-- sends the version its edit is based on and the write is refused when the box
+-- changed in the meantime. A constant default only touches the catalog, the
+-- existing rows are not rewritten. 0011 adds it to annotations_image_idx.
+ALTER TABLE annotations ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1;
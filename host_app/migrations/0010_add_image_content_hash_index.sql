@@ -0,0 +1,4 @@
+-- oddm:no-transaction
+-- Lookup of images by stored file (content_hash added in 0004). Built
+-- concurrently so inserts into images are not blocked while it builds.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS images_content_hash_idx ON images (content_hash);
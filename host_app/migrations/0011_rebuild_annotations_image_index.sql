@@ -0,0 +1,75 @@
+-- oddm:no-transaction
+-- Rebuilds annotations_image_idx with row_version (added in 0009) in INCLUDE,
+-- so the per-image box reads stay index-only scans. CONCURRENTLY is not
+-- supported on a partitioned table: the new index is created on the parent
+-- only (invalid until every partition has one), each partition index is built
+-- concurrently and attached, then the old index is dropped. Every statement
+-- can be run again after a failure.
+CREATE INDEX IF NOT EXISTS annotations_image_version_idx ON ONLY annotations (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p0_image_version_idx ON annotations_p0 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p0_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p1_image_version_idx ON annotations_p1 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p1_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p2_image_version_idx ON annotations_p2 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p2_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p3_image_version_idx ON annotations_p3 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p3_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p4_image_version_idx ON annotations_p4 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p4_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p5_image_version_idx ON annotations_p5 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p5_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p6_image_version_idx ON annotations_p6 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p6_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p7_image_version_idx ON annotations_p7 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p7_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p8_image_version_idx ON annotations_p8 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p8_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p9_image_version_idx ON annotations_p9 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p9_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p10_image_version_idx ON annotations_p10 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p10_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p11_image_version_idx ON annotations_p11 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p11_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p12_image_version_idx ON annotations_p12 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p12_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p13_image_version_idx ON annotations_p13 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p13_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p14_image_version_idx ON annotations_p14 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p14_image_version_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS annotations_p15_image_version_idx ON annotations_p15 (project_id, image_id)
+    INCLUDE (id, class_id, x_min, y_min, x_max, y_max, row_version);
+ALTER INDEX annotations_image_version_idx ATTACH PARTITION annotations_p15_image_version_idx;
+
+DROP INDEX IF EXISTS annotations_image_idx;
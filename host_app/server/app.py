@@ -0,0 +1,234 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.annotations import get_project_classes, get_image_page, get_image_annotations, apply_annotation_changes
+from utils.annotations import IMAGE_PAGE_SIZE
+from utils.auth_service import get_auth_service
+from utils.blob_store import get_blob_store
+from utils.hashing import get_hashing_service
+from utils.permissions import has_permission
+from utils.tasks import claim_tasks, complete_tasks, extend_lease, release_tasks, TASK_KINDS
+from utils.thumbnails import get_thumbnail_cache
+from .protocol import HTTPServer, HTTPError, json_response, error_response
+from .files import open_file_response, etag_matches, not_modified_response
+
+# JSON API for the annotator clients. Clients log in with a username and
+# password and send the returned token as "Authorization: Bearer <token>",
+# they never see the PostgreSQL credentials. All database and file system
+# calls run on a thread pool the size of the connection pool, the event loop
+# only parses requests and moves bytes. Logins wait on Argon2 in the hashing
+# process pool, so they get their own small pool and a burst of logins can
+# not take every database thread.
+
+DB_EXECUTOR_WORKERS = 16
+SOCKET_BACKLOG = 1024
+IMAGE_CACHE_CONTROL = "private, max-age=31536000, immutable"  # URLs are content hashes
+
+_HASH_PATTERN = r"(?P<content_hash>[0-9a-f]{64})"
+_ROUTES = []
+
+def route(method, pattern, permission=None, public=False):
+    """Registers `handler(api, request, **path_params)`. Routes are authenticated unless public."""
+    def decorator(handler):
+        _ROUTES.append((method, re.compile(pattern + "$"), handler, permission, public))
+        return handler
+    return decorator
+
+def _bearer_token(request):
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else None
+
+def _query_int(request, name, default, minimum=0, maximum=None):
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise HTTPError(400, f"Query parameter '{name}' must be an integer.")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise HTTPError(400, f"Query parameter '{name}' is out of range.")
+    return value
+
+def _id_list(data, name):
+    ids = data.get(name) if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(value, int) for value in ids):
+        raise HTTPError(400, f"'{name}' must be a list of integers.")
+    return ids
+
+def _result_response(res, error_status=400):
+    """Turns a {"success", "error", "error_id"} result into a response."""
+    return json_response(res, status=200 if res["success"] else error_status)
+
+class ApiServer:
+    def __init__(self, db_workers=DB_EXECUTOR_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="oddm-api")
+        self.http = HTTPServer(self.dispatch, self.executor)
+        # One thread per hashing process, more would only queue in front of the pool
+        self.auth_executor = ThreadPoolExecutor(max_workers=get_hashing_service().max_workers,
+                                                thread_name_prefix="oddm-auth")
+        self.blob_store = None
+        self.thumbnails = None
+        self._server = None
+
+    async def run_blocking(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def run_auth(self, fn, *args, **kwargs):
+        """Like run_blocking, for calls that wait on password hashing."""
+        return await asyncio.get_running_loop().run_in_executor(self.auth_executor, partial(fn, *args, **kwargs))
+
+    async def dispatch(self, request):
+        allowed = []
+        for method, pattern, handler, permission, public in _ROUTES:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            if method != request.method and not (method == "GET" and request.method == "HEAD"):
+                allowed.append(method)
+                continue
+            if not public:
+                await self.authenticate(request, permission)
+            return await handler(self, request, **match.groupdict())
+        if allowed:
+            return error_response(405, "Method not allowed.", headers={"Allow": ", ".join(allowed)})
+        return error_response(404, "Not found.")
+
+    async def authenticate(self, request, permission=None):
+        token = _bearer_token(request)
+        user_id = await self.run_blocking(get_auth_service().validate, token) if token else None
+        if user_id is None:
+            raise HTTPError(401, "Missing or expired session.", headers={"WWW-Authenticate": "Bearer"})
+        if permission is not None and not await self.run_blocking(has_permission, user_id, permission):
+            raise HTTPError(403, "You do not have permission to do this.")
+        request.user_id = user_id
+
+    async def start(self, host, port):
+        self.blob_store = await self.run_blocking(get_blob_store)
+        self.thumbnails = await self.run_blocking(get_thumbnail_cache)
+        self._server = await self.http.start(host, port, backlog=SOCKET_BACKLOG)
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self.http.close_connections()
+            await self._server.wait_closed()
+            self._server = None
+        self.auth_executor.shutdown(wait=True)
+        self.executor.shutdown(wait=True)
+
+@route("GET", r"/api/health", public=True)
+async def health(api, request):
+    return json_response({"success": True})
+
+@route("POST", r"/api/login", public=True)
+async def login(api, request):
+    data = request.json()
+    if not isinstance(data, dict) or not isinstance(data.get("login"), str) or not isinstance(data.get("password"), str):
+        raise HTTPError(400, "'login' and 'password' are required.")
+    res = await api.run_auth(get_auth_service().login, data["login"], data["password"],
+                             request.headers.get("user-agent"))
+    return _result_response(res, error_status=401)
+
+@route("POST", r"/api/logout")
+async def logout(api, request):
+    await api.run_blocking(get_auth_service().logout, _bearer_token(request))
+    return json_response({"success": True})
+
+@route("GET", r"/api/projects/(?P<project_id>\d+)/classes", permission="datasets.view")
+async def project_classes(api, request, project_id):
+    classes = await api.run_blocking(get_project_classes, int(project_id))
+    return json_response({"success": True, "classes": classes})
+
+@route("GET", r"/api/projects/(?P<project_id>\d+)/images", permission="datasets.view")
+async def project_images(api, request, project_id):
+    after = _query_int(request, "after", 0)
+    limit = _query_int(request, "limit", IMAGE_PAGE_SIZE, minimum=1, maximum=IMAGE_PAGE_SIZE)
+    rows = await api.run_blocking(get_image_page, int(project_id), after, limit)
+    columns = ("id", "file_name", "width", "height", "content_hash")
+    images = [dict(zip(columns, row)) for row in rows]
+    # Keyset pagination: pass next_after as ?after= for the following page
+    next_after = images[-1]["id"] if len(images) == limit else None
+    return json_response({"success": True, "images": images, "next_after": next_after})
+
+@route("GET", r"/api/projects/(?P<project_id>\d+)/images/(?P<image_id>\d+)/annotations", permission="datasets.view")
+async def image_annotations(api, request, project_id, image_id):
+    rows = await api.run_blocking(get_image_annotations, int(project_id), int(image_id))
+    columns = ("id", "class_id", "x_min", "y_min", "x_max", "y_max", "row_version")
+    return json_response({"success": True, "annotations": [dict(zip(columns, row)) for row in rows]})
+
+@route("POST", r"/api/projects/(?P<project_id>\d+)/annotations/batch", permission="annotations.modify")
+async def annotations_batch(api, request, project_id):
+    """Applies the edits an AnnotationWriteBuffer coalesced, conflicts come back in the body."""
+    data = request.json()
+    if not isinstance(data, dict) or not isinstance(data.get("changes"), list):
+        raise HTTPError(400, "'changes' must be a list.")
+    res = await api.run_blocking(apply_annotation_changes, int(project_id), data["changes"], request.user_id)
+    return _result_response(res)
+
+@route("POST", r"/api/projects/(?P<project_id>\d+)/tasks/claim", permission="tasks.claim")
+async def tasks_claim(api, request, project_id):
+    data = request.json() or {}
+    kinds = data.get("kinds", list(TASK_KINDS))
+    limit = data.get("limit", 10)
+    if not isinstance(kinds, list) or not set(kinds) <= set(TASK_KINDS):
+        raise HTTPError(400, f"'kinds' must be a list of {', '.join(TASK_KINDS)}.")
+    if not isinstance(limit, int) or not 1 <= limit <= 100:
+        raise HTTPError(400, "'limit' must be an integer between 1 and 100.")
+    res = await api.run_blocking(claim_tasks, int(project_id), request.user_id, kinds=kinds, limit=limit)
+    return _result_response(res, error_status=403)
+
+@route("POST", r"/api/tasks/(?P<action>complete|extend|release)", permission="tasks.claim")
+async def tasks_update(api, request, action):
+    task_ids = _id_list(request.json(), "task_ids")
+    fn = {"complete": complete_tasks, "extend": extend_lease, "release": release_tasks}[action]
+    updated = await api.run_blocking(fn, task_ids, request.user_id)
+    return json_response({"success": True, "task_ids": updated})
+
+async def _serve_file(api, request, etag, resolve_path, content_type=None):
+    """Answers a revalidation without touching the disk, otherwise sends the file `resolve_path()` returns."""
+    headers = {"Cache-Control": IMAGE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified_response(etag, headers)
+
+    def open_response():
+        path = resolve_path()
+        if path is None:
+            raise HTTPError(404, "Image not found.")
+        return open_file_response(path, request, content_type=content_type, headers=headers, etag=etag)
+    return await api.run_blocking(open_response)
+
+@route("GET", r"/api/images/" + _HASH_PATTERN, permission="datasets.view")
+async def image_file(api, request, content_hash):
+    return await _serve_file(api, request, f'"{content_hash}"', partial(api.blob_store.path_for, content_hash))
+
+@route("GET", r"/api/thumbnails/" + _HASH_PATTERN, permission="datasets.view")
+async def thumbnail_file(api, request, content_hash):
+    size = _query_int(request, "size", 128, minimum=1, maximum=4096)
+    level = api.thumbnails.level_for(size)
+    source_path = api.blob_store.path_for(content_hash)
+    return await _serve_file(api, request, f'"{content_hash}-{level}"',
+                             partial(api.thumbnails.ensure, content_hash, level, source_path),
+                             content_type="image/jpeg")
@@ -0,0 +1,166 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import mmap
+import asyncio
+from .protocol import Response, HTTPError
+
+# File bodies for the HTTP server: single byte ranges, ETags and zero-copy
+# sending of files from the data storage path. Blobs are content addressed,
+# so their hash is a strong ETag that never needs revalidating against disk.
+
+MMAP_WRITE_SIZE = 1024 * 1024  # slice size handed to the transport per drain()
+
+# Blobs are stored without an extension, the type is sniffed from the first bytes
+_MAGIC_TYPES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+def sniff_content_type(head):
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, content_type in _MAGIC_TYPES:
+        if head.startswith(magic):
+            return content_type
+    return "application/octet-stream"
+
+def parse_range(header, size):
+    """Parses a single range "bytes=a-b", "bytes=a-" or "bytes=-n" into (start, end) inclusive.
+
+    Returns None when the header should be ignored (missing, multiple ranges
+    or another unit), raises HTTPError 416 when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None  # multipart ranges are answered with the whole file
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPError(416, headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+class FileResponse(Response):
+    """Sends `length` bytes of an open file from `offset` without copying them through Python.
+
+    os.sendfile (through loop.sendfile) when the transport supports it, else
+    memoryview slices of an mmap handed straight to the transport. The file is
+    closed with the response.
+    """
+
+    def __init__(self, file, offset, length, status=200, content_type="application/octet-stream", headers=None):
+        super().__init__(b"", status=status, content_type=content_type, headers=headers)
+        self.file = file
+        self.offset = offset
+        self.length = length
+
+    @property
+    def content_length(self):
+        return self.length
+
+    async def write_body(self, writer, loop):
+        if self.length == 0:
+            return
+        try:
+            await loop.sendfile(writer.transport, self.file, self.offset, self.length, fallback=False)
+            return
+        except (asyncio.SendfileNotAvailableError, NotImplementedError):
+            pass
+        await self.write_mapped(writer)
+
+    async def write_mapped(self, writer):
+        """Fallback for transports without sendfile (TLS, some event loops)."""
+        mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        end = self.offset + self.length
+        if end > len(mapped):
+            raise ConnectionError("File was truncated while it was being sent.")
+        for position in range(self.offset, end, MMAP_WRITE_SIZE):
+            writer.write(view[position:min(position + MMAP_WRITE_SIZE, end)])
+            await writer.drain()
+        # The transport may still hold slices of the map, it is unmapped once they are released
+
+    def close(self):
+        self.file.close()
+
+def etag_matches(header, etag):
+    """If-None-Match check, weak comparison as RFC 9110 asks for."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+def not_modified_response(etag, headers=None):
+    return Response(b"", status=304, content_type=None, headers=dict(headers or {}, ETag=etag))
+
+def open_file_response(path, request, content_type=None, headers=None, etag=None):
+    """Opens a file and answers `request` with all of it or the requested byte range.
+
+    Blocking (open and stat), run it on an executor. Raises HTTPError 404 when
+    the file does not exist. A Range with an If-Range that no longer matches
+    `etag` gets the whole file.
+    """
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        raise HTTPError(404, "File not found.")
+    try:
+        size = os.fstat(file.fileno()).st_size
+        if content_type is None:
+            content_type = sniff_content_type(file.read(16))
+        headers = dict(headers or {}, **{"Accept-Ranges": "bytes"})
+        if etag is not None:
+            headers["ETag"] = etag
+
+        byte_range = None
+        if_range = request.headers.get("if-range")
+        if not if_range or (etag is not None and if_range == etag):
+            byte_range = parse_range(request.headers.get("range"), size)
+        if byte_range is None:
+            return FileResponse(file, 0, size, content_type=content_type, headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return FileResponse(file, start, end - start + 1, status=206, content_type=content_type, headers=headers)
+    except BaseException:
+        file.close()
+        raise
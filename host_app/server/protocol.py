@@ -0,0 +1,302 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import gzip
+import time
+import asyncio
+import traceback
+from http import HTTPStatus
+from email.utils import formatdate
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+try:
+    import zstandard  # optional, gzip is used when it is not installed
+except ImportError:
+    zstandard = None
+
+# Minimal HTTP/1.1 server on asyncio streams, made for the JSON API and image
+# downloads of annotator clients on the local network:
+#
+# - keep-alive by default, idle connections are closed after KEEP_ALIVE_TIMEOUT
+# - pipelining: requests of one connection are handled concurrently (up to
+#   MAX_PIPELINE_DEPTH) and their responses are written in request order
+# - zstd or gzip compression of text responses, negotiated with Accept-Encoding
+# - file bodies are streamed, they are never read into memory as a whole
+
+SERVER_NAME = "ODDM-Toolkit-Host"
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 30          # seconds a connection may stay idle
+MAX_PIPELINE_DEPTH = 16          # requests of one connection in flight at once
+COMPRESS_MIN_BYTES = 1024        # smaller bodies are not worth compressing
+COMPRESS_INLINE_MAX_BYTES = 256 * 1024  # larger bodies are compressed on the executor
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/xml")
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None, headers=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+        self.message = message or HTTPStatus(status).phrase
+        self.headers = headers or {}
+
+class Request:
+    def __init__(self, method, target, version, headers, body=b""):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers  # lower case names
+        self.body = body
+        parts = urlsplit(target)
+        self.path = unquote(parts.path)
+        self.query = dict(parse_qsl(parts.query))
+        self.user_id = None     # set once the bearer token was validated
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON.")
+
+class Response:
+    def __init__(self, body=b"", status=200, content_type="application/json", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = {"Content-Type": content_type} if content_type else {}
+        self.headers.update(headers or {})
+
+    async def write_body(self, writer, loop):
+        writer.write(self.body)
+
+    @property
+    def content_length(self):
+        return len(self.body)
+
+    def close(self):
+        """Releases what the body holds, called after the response was written or dropped."""
+
+def json_response(data, status=200, headers=None):
+    return Response(json.dumps(data, default=str, separators=(",", ":")).encode(), status=status, headers=headers)
+
+def error_response(status, message, headers=None):
+    return json_response({"success": False, "error": message}, status=status, headers=headers)
+
+async def read_request(reader):
+    """Reads a request head, returns (request, body length) or None when the client closed the connection."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise HTTPError(400, "Incomplete request.")
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431)
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line.")
+    if version not in ("HTTP/1.1", "HTTP/1.0"):
+        raise HTTPError(505)
+
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(411, "Chunked request bodies are not supported, send Content-Length.")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length.")
+    if length < 0 or length > MAX_BODY_BYTES:
+        raise HTTPError(413)
+
+    return Request(method.upper(), target, version, headers), length
+
+def choose_encoding(accept_encoding):
+    """Picks zstd (if available) or gzip from an Accept-Encoding header, None for identity."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.strip().split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if zstandard is not None and accepted.get("zstd", 0) > 0:
+        return "zstd"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+def compress(body, encoding):
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+class HTTPServer:
+    """Serves `handler(request) -> Response` coroutines over HTTP/1.1."""
+
+    def __init__(self, handler, executor=None):
+        self.handler = handler
+        self.executor = executor    # for CPU work like compressing large bodies
+        self._date = (0, "")
+        self._connections = set()
+
+    def http_date(self):
+        now = int(time.time())
+        if self._date[0] != now:
+            self._date = (now, formatdate(now, usegmt=True))
+        return self._date[1]
+
+    async def start(self, host, port, **server_kwargs):
+        return await asyncio.start_server(self.serve_connection, host, port, limit=MAX_HEADER_BYTES, **server_kwargs)
+
+    async def serve_connection(self, reader, writer):
+        self._connections.add(writer)
+        pipeline = asyncio.Queue(MAX_PIPELINE_DEPTH)
+        responder = asyncio.create_task(self._write_responses(pipeline, writer))
+        try:
+            while True:
+                try:
+                    parsed = await asyncio.wait_for(read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except HTTPError as e:
+                    await pipeline.put((None, self._resolved(error_response(e.status, e.message, e.headers))))
+                    break
+                except (asyncio.TimeoutError, ConnectionError):
+                    break
+                if parsed is None:
+                    break
+
+                request, length = parsed
+                if length:
+                    if request.headers.get("expect", "").lower() == "100-continue":
+                        # Queued like a response, so it is not written into the middle of an earlier one
+                        await pipeline.put((request, None))
+                    try:
+                        request.body = await asyncio.wait_for(reader.readexactly(length), KEEP_ALIVE_TIMEOUT)
+                    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                        break
+
+                # Blocks once MAX_PIPELINE_DEPTH responses are pending, which stops reading from this client
+                await pipeline.put((request, asyncio.create_task(self._handle(request))))
+                if not request.keep_alive:
+                    break
+        finally:
+            await pipeline.put(None)
+            await responder
+            self._connections.discard(writer)
+            writer.close()
+
+    def _resolved(self, response):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(response)
+        return future
+
+    async def _handle(self, request):
+        try:
+            return await self.handler(request)
+        except HTTPError as e:
+            return error_response(e.status, e.message, e.headers)
+        except Exception:
+            traceback.print_exc()
+            return error_response(500, "Internal server error.")
+
+    async def _write_responses(self, pipeline, writer):
+        """Writes responses strictly in request order, as pipelining requires."""
+        loop = asyncio.get_running_loop()
+        broken = False
+        while True:
+            item = await pipeline.get()
+            if item is None:
+                return
+            request, pending = item
+            if pending is None:
+                if not broken:
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                continue
+            response = await pending
+            try:
+                if not broken:
+                    await self._write_response(request, response, writer, loop)
+            except OSError as e:
+                # Client gone or file read failed after the head was sent, the connection cannot be reused.
+                # The remaining handlers still run to completion.
+                if not isinstance(e, ConnectionError):
+                    print(f"Failed to write a response body: {e}")
+                broken = True
+                writer.close()
+            finally:
+                response.close()
+
+    async def _write_response(self, request, response, writer, loop):
+        headers = response.headers
+        body_allowed = request is None or request.method != "HEAD"
+        no_body_status = response.status in (204, 304)
+
+        content_type = headers.get("Content-Type", "")
+        if (request is not None and isinstance(response.body, bytes)
+                and len(response.body) >= COMPRESS_MIN_BYTES and content_type.startswith(COMPRESSIBLE_TYPES)):
+            headers["Vary"] = "Accept-Encoding"
+            encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+            if encoding is not None:
+                if len(response.body) > COMPRESS_INLINE_MAX_BYTES:
+                    response.body = await loop.run_in_executor(self.executor, compress, response.body, encoding)
+                else:
+                    response.body = compress(response.body, encoding)
+                headers["Content-Encoding"] = encoding
+
+        keep_alive = request is not None and request.keep_alive
+        head = [f"HTTP/1.1 {response.status} {HTTPStatus(response.status).phrase}",
+                f"Date: {self.http_date()}",
+                f"Server: {SERVER_NAME}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if not no_body_status:
+            head.append(f"Content-Length: {response.content_length}")
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+        if body_allowed and not no_body_status:
+            await response.write_body(writer, loop)
+        await writer.drain()
+
+    def close_connections(self):
+        for writer in list(self._connections):
+            writer.close()
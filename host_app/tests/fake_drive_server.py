@@ -0,0 +1,164 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# In-process fake of the parts of the Drive v3 API that DriveClient uses:
+# folder creation, file metadata and resumable uploads. Files are kept in
+# memory. `faults` lets a test break individual upload requests.
+
+import json
+import threading
+import itertools
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+class FakeDrive:
+    def __init__(self):
+        self.files = {}          # id -> {"name", "parents", "mimeType", "data"}
+        self.sessions = {}       # session id -> {"file_id", "name", "parents", "size", "data"}
+        self.requests = []       # (method, path, Content-Range) of every request
+        # Callables (session, start, data) -> None or (status, bytes stored from the chunk),
+        # consumed one per chunk PUT
+        self.faults = []
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def new_id(self, prefix):
+        return f"{prefix}{next(self._ids)}"
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def drive(self):
+        return self.server.drive
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        if data:
+            self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _record(self):
+        with self.drive.lock:
+            self.drive.requests.append((self.command, urlsplit(self.path).path, self.headers.get("Content-Range")))
+
+    def do_GET(self):
+        self._record()
+        path = urlsplit(self.path).path
+        file_id = path.rsplit("/", 1)[1]
+        entry = self.drive.files.get(file_id)
+        if not path.startswith("/drive/v3/files/") or entry is None:
+            return self._send(404, {"error": "not found"})
+        self._send(200, {"id": file_id, "name": entry["name"]})
+
+    def do_POST(self):
+        self._record()
+        path = urlsplit(self.path).path
+        metadata = json.loads(self._body() or b"{}")
+        if path == "/drive/v3/files":
+            file_id = self.drive.new_id("folder")
+            self.drive.files[file_id] = dict(metadata, data=None)
+            return self._send(200, {"id": file_id})
+        if path == "/upload/drive/v3/files":
+            return self._start_session(None, metadata)
+        self._send(404, {"error": "not found"})
+
+    def do_PATCH(self):
+        self._record()
+        path = urlsplit(self.path).path
+        file_id = path.rsplit("/", 1)[1]
+        self._body()
+        if not path.startswith("/upload/drive/v3/files/") or file_id not in self.drive.files:
+            return self._send(404, {"error": "not found"})
+        self._start_session(file_id, {})
+
+    def _start_session(self, file_id, metadata):
+        session_id = self.drive.new_id("session")
+        self.drive.sessions[session_id] = {"file_id": file_id, "name": metadata.get("name"),
+                                           "parents": metadata.get("parents"),
+                                           "size": int(self.headers["X-Upload-Content-Length"]), "data": b""}
+        host, port = self.server.server_address[:2]
+        self._send(200, headers={"Location": f"http://{host}:{port}/upload/session/{session_id}"})
+
+    def do_PUT(self):
+        self._record()
+        path = urlsplit(self.path).path
+        body = self._body()
+        session = self.drive.sessions.get(path.rsplit("/", 1)[1])
+        if not path.startswith("/upload/session/") or session is None:
+            return self._send(404, {"error": "upload session not found"})
+
+        spec = self.headers.get("Content-Range", "").removeprefix("bytes ")
+        if not spec.startswith("*"):
+            start = int(spec.split("-", 1)[0])
+            if start != len(session["data"]):
+                return self._send(400, {"error": f"expected offset {len(session['data'])}, got {start}"})
+            fault = self.drive.faults.pop(0)(session, start, body) if self.drive.faults else None
+            if fault is not None:
+                status, stored = fault
+                session["data"] += body[:stored]
+                return self._send(status, {"error": "injected fault"})
+            session["data"] += body
+
+        if len(session["data"]) < session["size"]:
+            headers = {"Range": f"bytes=0-{len(session['data']) - 1}"} if session["data"] else {}
+            return self._send(308, headers=headers)
+
+        file_id = session["file_id"] or self.drive.new_id("file")
+        entry = self.drive.files.setdefault(file_id, {"name": session["name"], "parents": session["parents"]})
+        entry["data"] = session["data"]
+        self._send(200, {"id": file_id})
+
+class FakeDriveServer:
+    """Serves a FakeDrive on a free localhost port. Use base_url with DriveClient."""
+
+    def __init__(self):
+        self.drive = FakeDrive()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.drive = self.drive
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,161 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Run from host_app: python -m unittest discover -s tests
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.gdrive_backup import BackupEngine, BackupManifest, DriveClient, CHUNK_SIZE_MULTIPLE, MANIFEST_FILE_NAME
+from fake_drive_server import FakeDriveServer
+
+CHUNK_SIZE = CHUNK_SIZE_MULTIPLE  # 256 KiB, the smallest chunk Drive accepts
+
+class GdriveBackupTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.server = FakeDriveServer().__enter__()
+        self.drive = self.server.drive
+        self.drive.files["root"] = {"name": "backup", "parents": [], "data": None}
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.server.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def write_file(self, rel_path, size):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = os.urandom(size)
+        path.write_bytes(data)
+        return data
+
+    def engine(self):
+        client = DriveClient(lambda: "test-token", base_url=self.server.base_url, max_retries=3, backoff_base=0)
+        self.clients.append(client)
+        return BackupEngine(self.root, "root", client, chunk_size=CHUNK_SIZE, max_workers=2)
+
+    def uploaded(self, name):
+        return [entry["data"] for entry in self.drive.files.values() if entry.get("name") == name]
+
+    def chunk_puts(self):
+        return [request for request in self.drive.requests if request[0] == "PUT" and not request[2].startswith("bytes *")]
+
+    def test_backup_uploads_in_chunks_and_mirrors_folders(self):
+        data = self.write_file("objects/ab/image.jpg", 3 * CHUNK_SIZE + 100)
+        engine = self.engine()
+        res = engine.run()
+        engine.manifest.close()
+
+        self.assertTrue(res["success"], res)
+        self.assertEqual(res["uploaded"], 1)
+        self.assertEqual(self.uploaded("image.jpg"), [data])
+        self.assertEqual(len(self.chunk_puts()), 4)
+        folders = {entry["name"] for file_id, entry in self.drive.files.items() if file_id.startswith("folder")}
+        self.assertEqual(folders, {"objects", "ab"})
+
+    def test_resumes_from_the_offset_drive_stored_after_a_failed_chunk(self):
+        data = self.write_file("big.bin", 4 * CHUNK_SIZE)
+        # The second chunk is half stored, then the request fails
+        self.drive.faults = [lambda session, start, body: None,
+                             lambda session, start, body: (503, len(body) // 2)]
+        engine = self.engine()
+        res = engine.run()
+        engine.manifest.close()
+
+        self.assertTrue(res["success"], res)
+        self.assertEqual(self.uploaded("big.bin"), [data])
+        status_queries = [request for request in self.drive.requests if request[2] and request[2].startswith("bytes *")]
+        self.assertEqual(len(status_queries), 1)
+        # The retry starts where Drive stopped, the stored half is not sent again
+        self.assertEqual(self.chunk_puts()[2][2], f"bytes {CHUNK_SIZE + CHUNK_SIZE // 2}-{2 * CHUNK_SIZE + CHUNK_SIZE // 2 - 1}/{4 * CHUNK_SIZE}")
+
+    def test_interrupted_backup_resumes_the_same_session_on_the_next_run(self):
+        data = self.write_file("big.bin", 4 * CHUNK_SIZE)
+        # A non retryable failure after two chunks ends the first run
+        self.drive.faults = [lambda session, start, body: None, lambda session, start, body: None,
+                             lambda session, start, body: (400, 0)]
+        engine = self.engine()
+        first = engine.run()
+        engine.manifest.close()
+        self.assertFalse(first["success"])
+        self.assertEqual(self.uploaded("big.bin"), [])
+
+        engine = self.engine()  # a new process: state comes from the manifest and its journal
+        second = engine.run()
+        engine.manifest.close()
+
+        self.assertTrue(second["success"], second)
+        self.assertEqual(self.uploaded("big.bin"), [data])
+        self.assertEqual(len(self.drive.sessions), 1)
+        self.assertEqual(len(self.chunk_puts()), 3 + 2)
+
+    def test_unchanged_files_are_skipped(self):
+        self.write_file("a.bin", 1000)
+        self.write_file("b.bin", 2000)
+        engine = self.engine()
+        self.assertEqual(engine.run()["uploaded"], 2)
+        engine.manifest.close()
+
+        engine = self.engine()
+        res = engine.run()
+        engine.manifest.close()
+        self.assertEqual((res["uploaded"], res["skipped"]), (0, 2))
+
+    def test_cancelled_backup_opens_no_upload_sessions(self):
+        self.write_file("a.bin", 1000)
+        self.write_file("b.bin", 1000)
+        cancel_event = threading.Event()
+        cancel_event.set()
+        engine = self.engine()
+        res = engine.run(cancel_event=cancel_event)
+        engine.manifest.close()
+
+        self.assertFalse(res["success"])
+        self.assertEqual(self.drive.sessions, {})
+        self.assertIsNone(engine.manifest.get_file("a.bin"))
+
+    def test_manifest_replays_the_journal_after_a_crash(self):
+        manifest = BackupManifest(self.root / MANIFEST_FILE_NAME, "root")
+        manifest.set_folder("objects", "folder1")
+        manifest.update_file("objects/a.jpg", file_id="file1", size=10)
+        manifest._journal.close()  # no compaction, as if the process died
+        with open(manifest.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"file": "objects/b.jp')  # cut short mid write
+
+        reopened = BackupManifest(self.root / MANIFEST_FILE_NAME, "root")
+        self.assertEqual(reopened.get_folder("objects"), "folder1")
+        self.assertEqual(reopened.get_file("objects/a.jpg"), {"file_id": "file1", "size": 10})
+        self.assertIsNone(reopened.get_file("objects/b.jpg"))
+        reopened.close()
+
+if __name__ == "__main__":
+    unittest.main()
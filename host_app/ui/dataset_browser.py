@@ -0,0 +1,389 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+from functools import partial
+from collections import OrderedDict
+from PySide6.QtCore import Qt, QSize, QObject, QRunnable, QThreadPool, QTimer, QAbstractListModel, QModelIndex, Signal
+from PySide6.QtGui import QColor, QPalette, QImage, QImageReader, QPixmap
+from PySide6.QtWidgets import QWidget, QLabel, QListView, QPushButton, QVBoxLayout, QHBoxLayout, QAbstractItemView
+from .theme import *
+from .workers import Worker
+from utils.annotations import get_image_page, get_image_count, IMAGE_PAGE_SIZE
+from utils.blob_store import get_blob_store
+from utils.thumbnails import get_thumbnail_cache
+
+# Only the rows that have been scrolled to are fetched (keyset pagination on
+# images.id) and only the thumbnails of visible items are decoded. With
+# uniform item sizes the view never asks for data of off-screen rows, so a
+# 1M image project costs the same to scroll as a 1k one.
+
+GRID_THUMBNAIL_SIZE = 128
+LIST_THUMBNAIL_SIZE = 32
+PIXMAP_CACHE_SIZE = 3000          # decoded thumbnails kept in memory
+PRUNE_DELAY_MS = 50               # after scrolling stops, drop decodes that are no longer visible
+
+IMAGE_ID_ROLE = Qt.UserRole
+CONTENT_HASH_ROLE = Qt.UserRole + 1
+
+class PixmapCache:
+    """Least recently used cache of thumbnails, keyed by (content_hash, size)."""
+
+    def __init__(self, capacity=PIXMAP_CACHE_SIZE):
+        self.capacity = capacity
+        self._items = OrderedDict()
+
+    def get(self, key):
+        pixmap = self._items.get(key)
+        if pixmap is not None:
+            self._items.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        self._items[key] = pixmap
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+def decode_thumbnail(path, size):
+    """Decodes an image straight to thumbnail size. JPEG decoders scale while decoding."""
+    reader = QImageReader(str(path))
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid():
+        reader.setScaledSize(original.scaled(size, size, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        print(f"Could not decode thumbnail for {path}: {reader.errorString()}")
+    return image
+
+class ThumbnailSignals(QObject):
+    ready = Signal(object, QImage)  # key, decoded image (null when decoding failed)
+
+class ThumbnailTask(QRunnable):
+    """`source()` returns the file to decode, it runs on the pool thread as it may build thumbnails."""
+
+    def __init__(self, key, source, size, signals):
+        super().__init__()
+        self.setAutoDelete(False)  # the loader holds it until the result arrives, see prune()
+        self.key = key
+        self.source = source
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        self.signals.ready.emit(self.key, decode_thumbnail(self.source(), self.size))
+
+class ThumbnailLoader(QObject):
+    """Decodes thumbnails on a dedicated thread pool, one request per key at a time.
+
+    QImage is safe to create off the GUI thread, the QPixmap conversion happens
+    in the receiving slot.
+    """
+    thumbnail_ready = Signal(object, QPixmap)
+
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads or max(2, (os.cpu_count() or 2) - 1))
+        self.signals = ThumbnailSignals(self)
+        self.signals.ready.connect(self._on_ready)
+        self._pending = {}  # key -> queued or running task
+
+    def request(self, key, source, size):
+        if key in self._pending:
+            return
+        task = ThumbnailTask(key, source, size, self.signals)
+        self._pending[key] = task
+        self.pool.start(task)
+
+    def prune(self, wanted_keys):
+        """Takes queued decodes for items that are no longer visible off the queue."""
+        for key, task in list(self._pending.items()):
+            if key not in wanted_keys and self.pool.tryTake(task):
+                del self._pending[key]
+
+    def clear(self):
+        self.pool.clear()
+        self._pending.clear()
+
+    def _on_ready(self, key, image):
+        if self._pending.pop(key, None) is None:
+            return  # cleared in the meantime
+        self.thumbnail_ready.emit(key, QPixmap.fromImage(image) if not image.isNull() else QPixmap())
+
+class ImageListModel(QAbstractListModel):
+    """Images of one project, fetched page by page as the view scrolls."""
+    fetch_failed = Signal(str)
+    total_count_changed = Signal(int)
+
+    def __init__(self, project_id, page_size=IMAGE_PAGE_SIZE, thumbnail_size=GRID_THUMBNAIL_SIZE, parent=None):
+        super().__init__(parent)
+        self.project_id = project_id
+        self.page_size = page_size
+        self.thumbnail_size = thumbnail_size
+        self.total_count = None
+
+        self._rows = []              # (id, file_name, width, height, content_hash)
+        self._row_by_hash = {}       # content_hash -> rows showing it
+        self._exhausted = False
+        self._fetch_worker = None
+        self._count_worker = None
+
+        self._cache = PixmapCache()
+        self._loader = ThumbnailLoader(parent=self)
+        self._loader.thumbnail_ready.connect(self._on_thumbnail_ready)
+        self._placeholder = self._make_placeholder(thumbnail_size)
+        self._blob_store = None
+        self._thumbnails = None
+
+    def _make_placeholder(self, size):
+        pixmap = QPixmap(size, size)
+        pixmap.fill(QColor(CARD_BACKGROUND_COLOR))
+        return pixmap
+
+    def load_total_count(self):
+        """The total is only informative, rows keep coming from fetchMore."""
+        self._count_worker = Worker(get_image_count, self.project_id)
+        self._count_worker.signals.finished.connect(self._on_count)
+        self._count_worker.start()
+
+    def _on_count(self, count):
+        self._count_worker = None
+        self.total_count = count
+        self.total_count_changed.emit(count)
+
+    def set_thumbnail_size(self, size):
+        if size == self.thumbnail_size:
+            return
+        self.thumbnail_size = size
+        self._loader.clear()
+        self._placeholder = self._make_placeholder(size)
+        if self._rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self._rows) - 1), [Qt.DecorationRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and self._fetch_worker is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        after_id = self._rows[-1][0] if self._rows else 0
+        self._fetch_worker = Worker(get_image_page, self.project_id, after_id, self.page_size)
+        self._fetch_worker.signals.finished.connect(self._on_page)
+        self._fetch_worker.signals.failed.connect(self._on_page_failed)
+        self._fetch_worker.start()
+
+    def _on_page(self, page):
+        self._fetch_worker = None
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        for offset, row in enumerate(page):
+            self._rows.append(row)
+            if row[4]:
+                self._row_by_hash.setdefault(row[4], []).append(first + offset)
+        self.endInsertRows()
+
+    def _on_page_failed(self, error):
+        self._fetch_worker = None
+        self.fetch_failed.emit(error)
+
+    def thumbnail_source(self, content_hash, size):
+        """Runs on a pool thread. Prefers the cached pyramid level, builds it if it is missing."""
+        original = self._blob_store.path_for(content_hash)
+        return self._thumbnails.ensure(content_hash, size, original) or original
+
+    def thumbnail_key(self, content_hash):
+        return (content_hash, self.thumbnail_size)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        image_id, file_name, width, height, content_hash = self._rows[index.row()]
+
+        if role == Qt.DisplayRole:
+            return file_name
+        if role == Qt.ToolTipRole:
+            return f"{file_name}\n{width} x {height}"
+        if role == Qt.DecorationRole:
+            if not content_hash:
+                return self._placeholder
+            key = self.thumbnail_key(content_hash)
+            pixmap = self._cache.get(key)
+            if pixmap is not None:
+                return pixmap
+            if self._blob_store is None:
+                self._blob_store = get_blob_store()
+                self._thumbnails = get_thumbnail_cache()
+            self._loader.request(key, partial(self.thumbnail_source, content_hash, self.thumbnail_size),
+                                 self.thumbnail_size)
+            return self._placeholder
+        if role == IMAGE_ID_ROLE:
+            return image_id
+        if role == CONTENT_HASH_ROLE:
+            return content_hash
+        return None
+
+    def _on_thumbnail_ready(self, key, pixmap):
+        content_hash, size = key
+        if size != self.thumbnail_size:
+            return
+        # A failed decode is cached as the placeholder so it is not retried on every repaint
+        self._cache.put(key, pixmap if not pixmap.isNull() else self._placeholder)
+        for row in self._row_by_hash.get(content_hash, ()):
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def prune_thumbnail_requests(self, first_row, last_row):
+        """Keeps only the decodes for rows first_row..last_row."""
+        wanted = {self.thumbnail_key(row[4]) for row in self._rows[first_row:last_row + 1] if row[4]}
+        self._loader.prune(wanted)
+
+    def shutdown(self):
+        self._loader.clear()
+        self._loader.pool.waitForDone()
+
+class DatasetBrowser(QWidget):
+    """Thumbnail grid / list of the images in a project."""
+    image_activated = Signal(int)  # image id
+
+    def __init__(self, project_id, parent=None):
+        super().__init__(parent)
+        self.project_id = project_id
+        self.setupUi()
+
+    def setupUi(self):
+        self.setObjectName("dataset_browser")
+        self.setWindowTitle("ODDM Toolkit - Dataset")
+        self.resize(900, 600)
+
+        self.setAutoFillBackground(True)
+        palette = self.palette()
+        palette.setColor(QPalette.Window, QColor(BACKGROUND_COLOR))
+        self.setPalette(palette)
+
+        self.model = ImageListModel(self.project_id, parent=self)
+        self.model.total_count_changed.connect(self.update_status)
+        self.model.rowsInserted.connect(lambda *args: self.update_status())
+        self.model.fetch_failed.connect(lambda error: self.status_label.setText(f"Could not load images: {error}"))
+
+        self.view = QListView()
+        self.view.setObjectName("dataset_view")
+        self.view.setModel(self.model)
+        self.view.setUniformItemSizes(True)  # lets the view skip measuring every row
+        self.view.setLayoutMode(QListView.Batched)
+        self.view.setBatchSize(200)
+        self.view.setMovement(QListView.Static)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.view.activated.connect(lambda index: self.image_activated.emit(index.data(IMAGE_ID_ROLE)))
+
+        # Dropping queued decodes is debounced, doing it on every scroll step would cost more than it saves
+        self.prune_timer = QTimer(self)
+        self.prune_timer.setSingleShot(True)
+        self.prune_timer.setInterval(PRUNE_DELAY_MS)
+        self.prune_timer.timeout.connect(self.prune_thumbnail_requests)
+        self.view.verticalScrollBar().valueChanged.connect(self.prune_timer.start)
+
+        self.grid_button = QPushButton("Grid")
+        self.grid_button.setObjectName("grid_button")
+        self.grid_button.setProperty("variant", "primary")
+        self.grid_button.setFixedSize(60, 28)
+        self.grid_button.clicked.connect(self.show_grid)
+
+        self.list_button = QPushButton("List")
+        self.list_button.setObjectName("list_button")
+        self.list_button.setProperty("variant", "primary")
+        self.list_button.setFixedSize(60, 28)
+        self.list_button.clicked.connect(self.show_list)
+
+        self.status_label = QLabel()
+        self.status_label.setObjectName("status_label")
+        self.status_label.setProperty("role", "status")
+
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(self.grid_button)
+        toolbar.addWidget(self.list_button)
+        toolbar.addStretch()
+        toolbar.addWidget(self.status_label)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(toolbar)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+        self.show_grid()
+        self.model.load_total_count()
+
+    def show_grid(self):
+        size = GRID_THUMBNAIL_SIZE
+        self.model.set_thumbnail_size(size)
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setFlow(QListView.LeftToRight)
+        self.view.setWrapping(True)
+        self.view.setIconSize(QSize(size, size))
+        self.view.setGridSize(QSize(size + 24, size + 36))
+        self.view.setWordWrap(False)
+        self.view.setTextElideMode(Qt.ElideMiddle)
+
+    def show_list(self):
+        size = LIST_THUMBNAIL_SIZE
+        self.model.set_thumbnail_size(size)
+        self.view.setViewMode(QListView.ListMode)
+        self.view.setFlow(QListView.TopToBottom)
+        self.view.setWrapping(False)
+        self.view.setIconSize(QSize(size, size))
+        self.view.setGridSize(QSize())
+
+    def visible_row_range(self):
+        viewport = self.view.viewport().rect()
+        first = self.view.indexAt(viewport.topLeft())
+        last = self.view.indexAt(viewport.bottomRight())
+        first_row = first.row() if first.isValid() else 0
+        last_row = last.row() if last.isValid() else self.model.rowCount() - 1
+        return first_row, last_row
+
+    def prune_thumbnail_requests(self):
+        self.model.prune_thumbnail_requests(*self.visible_row_range())
+
+    def update_status(self, *args):
+        loaded = self.model.rowCount()
+        if self.model.total_count is None:
+            self.status_label.setText(f"{loaded} images loaded")
+        else:
+            self.status_label.setText(f"{loaded} of {self.model.total_count} images loaded")
+
+    def closeEvent(self, event):
+        self.model.shutdown()
+        super().closeEvent(event)
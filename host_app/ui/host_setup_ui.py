@@ -25,11 +25,10 @@ from PySide6.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayo
 from PySide6.QtGui import QColor, QPalette, QIcon, QPixmap
 from .theme import *
 import re
-import os
 from pathlib import Path
 import json
-import utils.gdrive as gdrive
 from utils.auth import check_if_oddm_setup_file_exists
+from utils.blob_store import BlobStore
 
 # Get the absolute path of the current file (the script inside 'ui' folder)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent  # Moves 3 levels up to project root
@@ -40,6 +39,8 @@ class PasswordLineEdit(QLineEdit):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.setProperty("role", "input")
+        self.setProperty("state", "normal")
         self.Error_State = False
 
     def keyPressEvent(self, event):
@@ -55,45 +56,20 @@ class PasswordLineEdit(QLineEdit):
             super().keyPressEvent(event)  # Call the original key event handler
     
     def set_error_state(self):
-        self.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {ERROR_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
+        set_style_property(self, "state", "error")
         self.Error_State = True
 
     def set_ok_state(self):
-        self.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {SUCCESS_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
+        set_style_property(self, "state", "ok")
 
     def reset_state(self):
-        self.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
+        set_style_property(self, "state", "normal")
 
 class SimpleLineEdit(QLineEdit):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.setProperty("role", "input")
+        self.setProperty("state", "normal")
         self.Error_State = False
 
     def keyPressEvent(self, event):
@@ -104,46 +80,45 @@ class SimpleLineEdit(QLineEdit):
         super().keyPressEvent(event)
 
     def set_error_state(self):
-        self.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {ERROR_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
+        set_style_property(self, "state", "error")
         self.Error_State = True
 
     def set_ok_state(self):
-        self.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {SUCCESS_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
+        set_style_property(self, "state", "ok")
 
     def reset_state(self):
-        self.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
+        set_style_property(self, "state", "normal")
+
+class LazyStackedWidget(QStackedWidget):
+    """QStackedWidget whose pages are built the first time they are shown."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._page_factories = {}
+
+    def add_lazy_page(self, factory):
+        """Adds a placeholder for the page returned by `factory()` and returns its index."""
+        index = self.addWidget(QWidget())
+        self._page_factories[index] = factory
+        return index
+
+    def ensure_page(self, index):
+        factory = self._page_factories.pop(index, None)
+        if factory is None:
+            return
+        placeholder = self.widget(index)
+        self.insertWidget(index, factory())
+        self.removeWidget(placeholder)
+        placeholder.deleteLater()
+
+    def setCurrentIndex(self, index):
+        self.ensure_page(index)
+        super().setCurrentIndex(index)
 
 class SetupPasswordWidget(QWidget):
     passwordSubmitted = Signal(str)
     userDetailsSubmitted = Signal(str, str, str, str)
-    local_storage_selected = Signal(str, str)
+    local_storage_selected = Signal(str, str, str)
 
     def __init__(self):
         super().__init__()
@@ -161,34 +136,49 @@ class SetupPasswordWidget(QWidget):
         palette.setColor(QPalette.Window, QColor(BACKGROUND_COLOR))  # Apply theme background
         self.setPalette(palette)
 
-        # Create QStackedWidget
-        self.stacked_widget = QStackedWidget(self)
-
-        # Create pages
-        self.password_page = self.create_db_password_widget()
-        self.user_page = self.create_user_page()
-        self.re_verify_page = self.create_user_password_re_verify_page()
-        self.setup_already_done_page = self.get_user_concent_for_setup_alreasdy_done()
-        self.admin_already_exists_page = self.get_user_concent_for_admin_already_exists()
-        self.setup_storage_page = self.show_setup_storage_page()
-        self.setup_completed_page = self.show_setup_completed_page()
-
-        self.stacked_widget.addWidget(self.password_page)
-        self.stacked_widget.addWidget(self.user_page)
-        self.stacked_widget.addWidget(self.re_verify_page)
-        self.stacked_widget.addWidget(self.setup_already_done_page)
-        self.stacked_widget.addWidget(self.admin_already_exists_page)
-        self.stacked_widget.addWidget(self.setup_storage_page)
-        self.stacked_widget.addWidget(self.setup_completed_page)
+        # Create QStackedWidget. Pages are only built when they are first shown,
+        # most runs never visit half of them.
+        self.stacked_widget = LazyStackedWidget(self)
+
+        self.stacked_widget.add_lazy_page(self.create_db_password_widget)
+        self.stacked_widget.add_lazy_page(self.create_user_page)
+        self.stacked_widget.add_lazy_page(self.create_user_password_re_verify_page)
+        self.stacked_widget.add_lazy_page(self.get_user_concent_for_setup_alreasdy_done)
+        self.stacked_widget.add_lazy_page(self.get_user_concent_for_admin_already_exists)
+        self.stacked_widget.add_lazy_page(self.show_setup_storage_page)
+        self.stacked_widget.add_lazy_page(self.show_setup_completed_page)
 
         if check_if_oddm_setup_file_exists()["success"]:
             self.stacked_widget.setCurrentIndex(3)
+        else:
+            self.stacked_widget.setCurrentIndex(0)
+
+        # Status line shown while database work runs in the background
+        self.status_label = QLabel()
+        self.status_label.setObjectName("status_label")
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setProperty("role", "status")
+        self.status_label.setVisible(False)
 
         # Layout
         main_layout = QVBoxLayout(self)
         main_layout.addWidget(self.stacked_widget)
+        main_layout.addWidget(self.status_label)
         self.setLayout(main_layout)
 
+    def set_busy(self, busy, message=""):
+        """Locks the pages while background work runs, the window itself stays responsive."""
+        self.stacked_widget.setEnabled(not busy)
+        self.status_label.setText(message)
+        self.status_label.setVisible(busy)
+        if busy:
+            self.setCursor(Qt.BusyCursor)
+        else:
+            self.unsetCursor()
+
+    def show_progress(self, step_index, step_count, description):
+        self.status_label.setText(f"Step {step_index + 1}/{step_count}: {description}...")
+
     def show_setup_completed_page(self):
         page = QWidget()
         # Layout
@@ -202,12 +192,7 @@ class SetupPasswordWidget(QWidget):
         label.setText("The host setup has been successfully completed.")
         label.setWordWrap(True)
         label.setAlignment(Qt.AlignCenter)
-        label.setStyleSheet(f"""
-            color: {TEXT_PRIMARY_COLOR}; 
-            font-size: {TEXT_SIZE_HEADING}; 
-            font-weight: bold;
-            font-family: {TEXT_FONT_FAMILY};
-        """)
+        label.setProperty("role", "heading")
         layout.addWidget(label)
 
         layout.addSpacerItem(QSpacerItem(20, 10, QSizePolicy.Minimum, QSizePolicy.Fixed))
@@ -215,23 +200,7 @@ class SetupPasswordWidget(QWidget):
         button = QPushButton()
         button.setObjectName("final_button")
         button.setText("Close")
-        button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {SUCCESS_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        button.setProperty("variant", "success")
         button.setFixedSize(80, 28)
         layout.addWidget(button, alignment=Qt.AlignCenter)
 
@@ -253,12 +222,7 @@ class SetupPasswordWidget(QWidget):
         label.setText("ODDM Toolkit setup has already been completed on this system. Do you still want to proceed with the setup ?")
         label.setWordWrap(True)
         label.setAlignment(Qt.AlignCenter)
-        label.setStyleSheet(f"""
-            color: {TEXT_PRIMARY_COLOR}; 
-            font-size: {TEXT_SIZE_HEADING}; 
-            font-weight: bold;
-            font-family: {TEXT_FONT_FAMILY};
-        """)
+        label.setProperty("role", "heading")
         layout.addWidget(label)
 
         layout.addSpacerItem(QSpacerItem(20, 15, QSizePolicy.Minimum, QSizePolicy.Fixed))
@@ -269,46 +233,14 @@ class SetupPasswordWidget(QWidget):
         yes_button = QPushButton()
         yes_button.setObjectName("yes_button")
         yes_button.setText("Yes, Continue")
-        yes_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {SUCCESS_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        yes_button.setProperty("variant", "success")
         yes_button.setFixedSize(110, 28)
         button_layout.addWidget(yes_button, alignment=Qt.AlignCenter)
 
         no_button = QPushButton()
         no_button.setObjectName("no_button")
         no_button.setText("No, Close")
-        no_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {ERROR_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        no_button.setProperty("variant", "danger")
         no_button.setFixedSize(110, 28)
         button_layout.addWidget(no_button, alignment=Qt.AlignCenter)
 
@@ -340,12 +272,7 @@ class SetupPasswordWidget(QWidget):
         label.setAlignment(Qt.AlignCenter)
         label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
         label.setMaximumWidth(380)  # Prevent excessive stretching
-        label.setStyleSheet(f"""
-            color: {TEXT_PRIMARY_COLOR}; 
-            font-size: {TEXT_SIZE_INPUT_FEILD}; 
-            font-weight: bold;
-            font-family: {TEXT_FONT_FAMILY};
-        """)
+        label.setProperty("role", "message")
         layout.addWidget(label)
 
         button_layout = QHBoxLayout()
@@ -355,46 +282,14 @@ class SetupPasswordWidget(QWidget):
         yes_button = QPushButton()
         yes_button.setObjectName("yes_button")
         yes_button.setText("Yes, Continue")
-        yes_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {SUCCESS_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        yes_button.setProperty("variant", "success")
         yes_button.setFixedSize(110, 28)
         button_layout.addWidget(yes_button, alignment=Qt.AlignCenter)
 
         no_button = QPushButton()
         no_button.setObjectName("no_button")
         no_button.setText("No, Close")
-        no_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {ERROR_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        no_button.setProperty("variant", "danger")
         no_button.setFixedSize(110, 28)
         button_layout.addWidget(no_button, alignment=Qt.AlignCenter)
 
@@ -419,12 +314,7 @@ class SetupPasswordWidget(QWidget):
         label.setText("Please enter your PostgreSQL password to kickstart the ODDM Toolkit host setup. We just need it to set things up.")
         label.setWordWrap(True)
         label.setAlignment(Qt.AlignCenter)
-        label.setStyleSheet(f"""
-            color: {TEXT_PRIMARY_COLOR}; 
-            font-size: {TEXT_SIZE_HEADING}; 
-            font-weight: bold;
-            font-family: {TEXT_FONT_FAMILY};
-        """)
+        label.setProperty("role", "heading")
         layout.addWidget(label)
 
         # Add vertical space
@@ -435,16 +325,6 @@ class SetupPasswordWidget(QWidget):
         self.password_input.setObjectName("password_input")
         self.password_input.setPlaceholderText("Enter PostgreSQL password")
         self.password_input.setEchoMode(QLineEdit.Password)  # Hide password input
-        self.password_input.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         self.password_input.setFixedWidth(250)
         layout.addWidget(self.password_input, alignment=Qt.AlignCenter)
         
@@ -452,23 +332,7 @@ class SetupPasswordWidget(QWidget):
         self.submit_button = QPushButton()
         self.submit_button.setObjectName("submit_button")
         self.submit_button.setText("Submit")
-        self.submit_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {PRIMARY_BUTTON_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        self.submit_button.setProperty("variant", "primary")
         self.submit_button.setFixedSize(80, 28)
         layout.addWidget(self.submit_button, alignment=Qt.AlignCenter)
         
@@ -514,60 +378,25 @@ class SetupPasswordWidget(QWidget):
         label.setText("Setup ODDM Superuser")
         label.setWordWrap(True)
         label.setAlignment(Qt.AlignCenter)
-        label.setStyleSheet(f"""
-            color: {TEXT_PRIMARY_COLOR}; 
-            font-size: {TEXT_SIZE_HEADING}; 
-            font-weight: bold;
-            font-family: {TEXT_FONT_FAMILY};
-        """)
+        label.setProperty("role", "heading")
         layout.addWidget(label)
 
         self.oddm_db_password_input = PasswordLineEdit()
         self.oddm_db_password_input.setObjectName("oddm_db_password_input")
         self.oddm_db_password_input.setPlaceholderText("ODDM DB Preferred Password")
         self.oddm_db_password_input.setEchoMode(QLineEdit.Password)  # Hide password input
-        self.oddm_db_password_input.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         self.oddm_db_password_input.setFixedWidth(250)
         layout.addWidget(self.oddm_db_password_input, alignment=Qt.AlignCenter)
 
         self.superuser_email_input = SimpleLineEdit()
         self.superuser_email_input.setObjectName("superuser_email_input")
         self.superuser_email_input.setPlaceholderText("Superuser email")
-        self.superuser_email_input.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         self.superuser_email_input.setFixedWidth(250)
         layout.addWidget(self.superuser_email_input, alignment=Qt.AlignCenter)
 
         self.superuser_username_input = SimpleLineEdit()
         self.superuser_username_input.setObjectName("superuser_username_input")
         self.superuser_username_input.setPlaceholderText("Superuser Username")
-        self.superuser_username_input.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         self.superuser_username_input.setFixedWidth(250)
         layout.addWidget(self.superuser_username_input, alignment=Qt.AlignCenter)
 
@@ -575,16 +404,6 @@ class SetupPasswordWidget(QWidget):
         self.superuser_password_input.setObjectName("superuser_password_input")
         self.superuser_password_input.setPlaceholderText("Superuser Password")
         self.superuser_password_input.setEchoMode(QLineEdit.Password)  # Hide password input
-        self.superuser_password_input.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         self.superuser_password_input.setFixedWidth(250)
         layout.addWidget(self.superuser_password_input, alignment=Qt.AlignCenter)
 
@@ -592,23 +411,7 @@ class SetupPasswordWidget(QWidget):
         self.user_next_button = QPushButton()
         self.user_next_button.setObjectName("user_next_button")
         self.user_next_button.setText("Next")
-        self.user_next_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {PRIMARY_BUTTON_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        self.user_next_button.setProperty("variant", "primary")
         self.user_next_button.setFixedSize(80, 28)
         layout.addWidget(self.user_next_button, alignment=Qt.AlignCenter)
         self.user_next_button.clicked.connect(self.submit_user_details)
@@ -660,28 +463,13 @@ class SetupPasswordWidget(QWidget):
         label.setText("Re-enter your passwords for verification")
         label.setWordWrap(True)
         label.setAlignment(Qt.AlignCenter)
-        label.setStyleSheet(f"""
-            color: {TEXT_PRIMARY_COLOR}; 
-            font-size: {TEXT_SIZE_HEADING}; 
-            font-weight: bold;
-            font-family: {TEXT_FONT_FAMILY};
-        """)
+        label.setProperty("role", "heading")
         layout.addWidget(label)
 
         self.re_enter_oddm_db_password_input = PasswordLineEdit()
         self.re_enter_oddm_db_password_input.setObjectName("re_enter_oddm_db_password_input")
         self.re_enter_oddm_db_password_input.setPlaceholderText("Re-enter ODDM DB Preferred Password")
         self.re_enter_oddm_db_password_input.setEchoMode(QLineEdit.Password)  # Hide password input
-        self.re_enter_oddm_db_password_input.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         self.re_enter_oddm_db_password_input.setFixedWidth(250)
         layout.addWidget(self.re_enter_oddm_db_password_input, alignment=Qt.AlignCenter)
 
@@ -689,16 +477,6 @@ class SetupPasswordWidget(QWidget):
         self.re_enter_superuser_password_input.setObjectName("re_enter_superuser_password_input")
         self.re_enter_superuser_password_input.setPlaceholderText("Re-enter Superuser Password")
         self.re_enter_superuser_password_input.setEchoMode(QLineEdit.Password)  # Hide password input
-        self.re_enter_superuser_password_input.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         self.re_enter_superuser_password_input.setFixedWidth(250)
         layout.addWidget(self.re_enter_superuser_password_input, alignment=Qt.AlignCenter)
 
@@ -706,23 +484,7 @@ class SetupPasswordWidget(QWidget):
         self.re_verify_submit_button = QPushButton()
         self.re_verify_submit_button.setObjectName("re_verify_submit_button")
         self.re_verify_submit_button.setText("Submit")
-        self.re_verify_submit_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {PRIMARY_BUTTON_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        self.re_verify_submit_button.setProperty("variant", "primary")
         self.re_verify_submit_button.setFixedSize(80, 28)
         layout.addWidget(self.re_verify_submit_button, alignment=Qt.AlignCenter)
         self.re_verify_submit_button.clicked.connect(self.check_for_password_mismatch)
@@ -808,27 +570,12 @@ class SetupPasswordWidget(QWidget):
         default_path = Path( BASE_DIR ) / "ODDM_data"
 
         local_storage_label = QLabel("Select Local Storage Location:")
-        local_storage_label.setStyleSheet(f"""
-            color: {TEXT_PRIMARY_COLOR}; 
-            font-size: {TEXT_SIZE_HEADING}; 
-            font-weight: bold;
-            font-family: {TEXT_FONT_FAMILY};
-        """)
+        local_storage_label.setProperty("role", "heading")
         layout.addWidget(local_storage_label)
 
         self.local_storage_path = SimpleLineEdit()
         self.local_storage_path.setObjectName("local_storage_path")
         self.local_storage_path.setPlaceholderText("Select local storage path")
-        self.local_storage_path.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         self.local_storage_path.setText( str(default_path) )
 
         browse_local_button = QPushButton()
@@ -836,23 +583,7 @@ class SetupPasswordWidget(QWidget):
         icon = QIcon(QPixmap(browse_icon_pth).scaled(32, 32))
         browse_local_button.setIcon(icon)
         browse_local_button.setIconSize(QSize(26, 26))
-        browse_local_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {PRIMARY_BUTTON_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        browse_local_button.setProperty("variant", "primary")
         browse_local_button.setFixedSize(34, 34)
         browse_local_button.clicked.connect(self.select_local_folder)
 
@@ -865,31 +596,12 @@ class SetupPasswordWidget(QWidget):
         # 2. Google Drive Backup (Optional)
         self.enable_cloud_checkbox = QCheckBox("Enable Google Drive Backup")
         self.enable_cloud_checkbox.stateChanged.connect(self.toggle_cloud_options)
-        self.enable_cloud_checkbox.setStyleSheet(f"""
-            QCheckBox {{
-                color: {TEXT_PRIMARY_COLOR};
-                font-size: {TEXT_SIZE_INPUT_FEILD};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-                spacing: 8px;
-            }}
-        """)
         layout.addWidget(self.enable_cloud_checkbox)
 
         # Google Drive JSON File Selection
         self.service_account_path = SimpleLineEdit()
         self.service_account_path.setObjectName("local_storage_path")
         self.service_account_path.setPlaceholderText("Select service account JSON")
-        self.service_account_path.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         self.service_account_path.setVisible(False)
 
         self.browse_json_button = QPushButton()
@@ -898,23 +610,7 @@ class SetupPasswordWidget(QWidget):
         file_icon = QIcon(QPixmap(browse_file_pth).scaled(32, 32))
         self.browse_json_button.setIcon(file_icon)
         self.browse_json_button.setIconSize(QSize(26, 26))
-        self.browse_json_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {PRIMARY_BUTTON_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        self.browse_json_button.setProperty("variant", "primary")
         self.browse_json_button.setFixedSize(34, 34)
         self.browse_json_button.clicked.connect(self.select_service_json)
 
@@ -929,38 +625,12 @@ class SetupPasswordWidget(QWidget):
         self.folder_id_input.setObjectName("folder_id_input")
         self.folder_id_input.setPlaceholderText("Enter Google Drive Folder ID")
         self.folder_id_input.setVisible(False)
-        self.folder_id_input.setStyleSheet(f"""
-            background-color: {INPUT_BG_COLOR};
-            border: 2px solid {INPUT_BORDER_COLOR};
-            color: {TEXT_PRIMARY_COLOR};
-            padding: 5px;
-            font-size: {TEXT_SIZE_INPUT_FEILD};
-            border-radius: 4px;
-            font-family: {TEXT_FONT_FAMILY};
-            font-weight: bold;
-        """)
         layout.addWidget(self.folder_id_input)
 
         submit_button = QPushButton()
         submit_button.setObjectName("submit_button_storage")
         submit_button.setText("Submit")
-        submit_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {PRIMARY_BUTTON_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};  /* Hover effect */
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};  /* Click effect */
-            }}
-        """)
+        submit_button.setProperty("variant", "primary")
         submit_button.setFixedSize(80, 28)
         layout.addWidget(submit_button, alignment=Qt.AlignCenter)
 
@@ -1040,18 +710,21 @@ class SetupPasswordWidget(QWidget):
         service_json_file = self.service_account_path.text()
         folder_id = self.folder_id_input.text()
 
-        # creates the selected local path
-        os.makedirs(local_path, exist_ok=True)
+        # creates the selected local path and the image store inside it
+        BlobStore(local_path).initialize()
 
         # Google Drive Backup is checked
         if self.enable_cloud_checkbox.isChecked():
+            # Imported here, the Google API client is slow to import and only needed for cloud backup
+            import utils.gdrive as gdrive
+
             gdrive_res = gdrive.establish_connection( service_json_file )
             if gdrive_res['success']:
                 id_check_res = gdrive.check_if_gdrive_folder_exists( gdrive_res['gdrive_connection'], folder_id )
                 if id_check_res['success']:
                     with open(service_json_file, "r") as f:
                         service_json_data = json.load(f)
-                    self.local_storage_selected.emit( json.dumps(service_json_data), local_path )
+                    self.local_storage_selected.emit( json.dumps(service_json_data), local_path, folder_id )
                 else:
                     self.show_error_dialog( id_check_res['error'] )
                     return
@@ -1059,7 +732,7 @@ class SetupPasswordWidget(QWidget):
                 self.show_error_dialog( gdrive_res['error'] )
                 return
         else:
-            self.local_storage_selected.emit( "", local_path )
+            self.local_storage_selected.emit( "", local_path, "" )
 
 class ErrorDialog(QMessageBox):
     def __init__(self, message, parent=None):
@@ -1067,29 +740,7 @@ class ErrorDialog(QMessageBox):
         self.setWindowTitle("Error")
         self.setText(message)
         self.setIcon(QMessageBox.Critical)
-        self.setStyleSheet(
-            f"""
-            QMessageBox {{
-                background-color: {BACKGROUND_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                font-size: {TEXT_SIZE_BUTTONS};
-                font-family: {TEXT_FONT_FAMILY};
-                font-weight: bold;
-            }}
-            QPushButton {{
-                background-color: {ERROR_COLOR};
-                color: {TEXT_PRIMARY_COLOR};
-                border-radius: 5px;
-                padding: 6px;
-            }}
-            QPushButton:hover {{
-                background-color: {HOVER_COLOR};
-            }}
-            QPushButton:pressed {{
-                background-color: {ACTIVE_COLOR};
-            }}
-            """
-        )
+        self.setProperty("variant", "error")
 
         ok_button = self.addButton("OK", QMessageBox.AcceptRole)
         ok_button.setFixedSize(32, 28)
\ No newline at end of file
@@ -0,0 +1,305 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import math
+import time
+from collections import OrderedDict, deque
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QImageReader
+from .workers import Worker
+from utils.annotations import get_images
+from utils.blob_store import get_blob_store
+from utils.thumbnails import get_thumbnail_cache
+
+# Look-ahead loader for annotators stepping through the images of their tasks.
+#
+# The next images are decoded on a dedicated thread pool into a byte bounded
+# LRU of QImages, so "next" is a cache hit and only costs the QPixmap upload.
+# The look-ahead depth follows the labeler: it covers the time one decode
+# takes at the current pace (EWMA of the time spent per image), bounded by
+# what the cache can hold. On a miss the largest cached thumbnail is shown
+# while the full image decodes.
+
+IMAGE_CACHE_BYTES = 768 * 1024 * 1024
+MIN_LOOKAHEAD = 2
+MAX_LOOKAHEAD = 32
+DEFAULT_LOOKAHEAD = 4            # until there are timings to adapt to
+LOOKAHEAD_MARGIN = 2             # extra images for bursts of quick "next" presses
+LOOKBEHIND = 1                   # keep the previous image for "back"
+EWMA_ALPHA = 0.2
+MAX_DWELL_SECONDS = 60           # longer pauses are breaks, not labeling pace
+PAINT_TARGET_MS = 50
+PREVIEW_SIZE = 256
+LATENCY_SAMPLES = 200
+
+class ImageCache:
+    """Least recently used cache of decoded images, bounded by their size in bytes."""
+
+    def __init__(self, max_bytes=IMAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        image = self._items.get(key)
+        if image is not None:
+            self._items.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        previous = self._items.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.sizeInBytes()
+        self._items[key] = image
+        self.bytes += image.sizeInBytes()
+        # The newest image is kept even when it alone is over the limit
+        while self.bytes > self.max_bytes and len(self._items) > 1:
+            _, evicted = self._items.popitem(last=False)
+            self.bytes -= evicted.sizeInBytes()
+
+    def clear(self):
+        self._items.clear()
+        self.bytes = 0
+
+def decode_image(path, max_size=None):
+    """Decodes a full image, scaled down while decoding when it is larger than max_size (a QSize)."""
+    reader = QImageReader(str(path))
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if max_size is not None and original.isValid() and (original.width() > max_size.width()
+                                                        or original.height() > max_size.height()):
+        reader.setScaledSize(original.scaled(max_size, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        print(f"Could not decode image {path}: {reader.errorString()}")
+        return image
+    # Formats QPixmap.fromImage takes without converting on the GUI thread
+    if image.format() not in (QImage.Format_RGB32, QImage.Format_ARGB32_Premultiplied):
+        image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    return image
+
+class DecodeSignals(QObject):
+    ready = Signal(str, QImage, float)  # content hash, decoded image (null when decoding failed), decode ms
+
+class DecodeTask(QRunnable):
+    def __init__(self, content_hash, path, max_size, signals):
+        super().__init__()
+        self.setAutoDelete(False)  # the prefetcher holds it until the result arrives, see _prune()
+        self.content_hash = content_hash
+        self.path = path
+        self.max_size = max_size
+        self.signals = signals
+
+    def run(self):
+        start = time.perf_counter()
+        image = decode_image(self.path, self.max_size)
+        self.signals.ready.emit(self.content_hash, image, (time.perf_counter() - start) * 1000)
+
+class ImagePrefetcher(QObject):
+    """Serves the images of a sequence by position and decodes the ones ahead in the background.
+
+    The viewer calls next() / previous() / go_to(), paints what image_ready
+    delivers for the current position and calls mark_painted() afterwards.
+    """
+    image_ready = Signal(int, QImage)     # position, full image (null when it could not be decoded)
+    preview_ready = Signal(int, QImage)   # position, thumbnail shown until the full image is decoded
+    sequence_loaded = Signal(int)         # number of images
+    load_failed = Signal(str)
+
+    def __init__(self, cache_bytes=IMAGE_CACHE_BYTES, max_threads=None, max_size=None, source=None, parent=None):
+        super().__init__(parent)
+        self.cache = ImageCache(cache_bytes)
+        self.max_size = max_size
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads or max(2, min(4, (os.cpu_count() or 2) - 1)))
+        self.signals = DecodeSignals(self)
+        self.signals.ready.connect(self._on_decoded)
+
+        self._source = source          # content_hash -> path, the blob store by default
+        self._thumbnails = None
+        self._images = []              # (image_id, content_hash)
+        self._pending = {}             # content_hash -> queued or running DecodeTask
+        self._load_worker = None
+        self.position = -1
+
+        self._dwell_ms = None          # EWMA of the time spent on one image
+        self._decode_ms = None         # EWMA of a full decode
+        self._image_bytes = None       # EWMA of a decoded image's size
+        self._last_move = None
+        self._shown_at = None
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.hits = 0
+        self.misses = 0
+
+    def load_task_images(self, project_id, image_ids):
+        """Loads the content hashes of the task images in the background, keeping the given order."""
+        image_ids = list(image_ids)
+        self._load_worker = Worker(get_images, project_id, image_ids)
+        self._load_worker.signals.finished.connect(
+            lambda rows: self._on_images_loaded([rows[image_id] for image_id in image_ids if image_id in rows]))
+        self._load_worker.signals.failed.connect(self._on_load_failed)
+        self._load_worker.start()
+
+    def _on_images_loaded(self, rows):
+        self._load_worker = None
+        self.set_sequence([(row[0], row[4]) for row in rows if row[4]])
+
+    def _on_load_failed(self, error):
+        self._load_worker = None
+        self.load_failed.emit(error)
+
+    def set_sequence(self, images):
+        """`images` is an ordered list of (image_id, content_hash). Decoded images are kept."""
+        if self._source is None:
+            blob_store = get_blob_store()
+            self._source = blob_store.path_for
+            self._thumbnails = get_thumbnail_cache()
+        self._images = list(images)
+        self.position = -1
+        self._last_move = None
+        self._prune(set())
+        self.sequence_loaded.emit(len(self._images))
+
+    def __len__(self):
+        return len(self._images)
+
+    def image_id(self, position):
+        return self._images[position][0]
+
+    def next(self):
+        return self.go_to(self.position + 1)
+
+    def previous(self):
+        return self.go_to(self.position - 1)
+
+    def go_to(self, position):
+        """Makes `position` current. Returns its image on a cache hit, None while it is being decoded."""
+        if not 0 <= position < len(self._images):
+            return None
+        now = time.perf_counter()
+        if self._last_move is not None and position == self.position + 1:
+            dwell = now - self._last_move
+            if dwell < MAX_DWELL_SECONDS:
+                self._dwell_ms = self._ewma(self._dwell_ms, dwell * 1000)
+        self._last_move = now
+        self._shown_at = now
+        self.position = position
+
+        content_hash = self._images[position][1]
+        image = self.cache.get(content_hash)
+        if image is not None:
+            self.hits += 1
+            self.image_ready.emit(position, image)
+        else:
+            self.misses += 1
+            self._request(content_hash, priority=MAX_LOOKAHEAD + 1)
+            preview = self._preview(content_hash)
+            if preview is not None:
+                self.preview_ready.emit(position, preview)
+        self._schedule_lookahead()
+        return image
+
+    def mark_painted(self):
+        """Records the time from the last move to the painted image."""
+        if self._shown_at is None:
+            return
+        self._latencies.append((time.perf_counter() - self._shown_at) * 1000)
+        self._shown_at = None
+
+    def lookahead_depth(self):
+        """Images to have decoded ahead, so the next ones are ready at the labeler's pace."""
+        if self._dwell_ms is None or self._decode_ms is None:
+            depth = DEFAULT_LOOKAHEAD
+        else:
+            depth = math.ceil(self._decode_ms / max(self._dwell_ms, 1.0)) + LOOKAHEAD_MARGIN
+        if self._image_bytes:
+            # Leave half of the cache for what was already seen, so "back" stays cheap
+            depth = min(depth, int(self.cache.max_bytes / 2 // self._image_bytes))
+        return max(MIN_LOOKAHEAD, min(MAX_LOOKAHEAD, depth))
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else None
+        return {"hits": self.hits, "misses": self.misses, "lookahead": self.lookahead_depth(),
+                "dwell_ms": self._dwell_ms, "decode_ms": self._decode_ms, "cache_bytes": self.cache.bytes,
+                "paint_p95_ms": p95,
+                "paint_over_target": sum(1 for latency in latencies if latency > PAINT_TARGET_MS)}
+
+    def shutdown(self):
+        self.pool.clear()
+        self._pending.clear()
+        self.pool.waitForDone()
+
+    def _ewma(self, average, sample):
+        return sample if average is None else average + EWMA_ALPHA * (sample - average)
+
+    def _request(self, content_hash, priority):
+        task = self._pending.get(content_hash)
+        if task is not None:
+            # Already queued: move it up if it became more urgent. A running task cannot be taken.
+            if priority > MAX_LOOKAHEAD and self.pool.tryTake(task):
+                self.pool.start(task, priority)
+            return
+        task = DecodeTask(content_hash, self._source(content_hash), self.max_size, self.signals)
+        self._pending[content_hash] = task
+        self.pool.start(task, priority)
+
+    def _schedule_lookahead(self):
+        depth = self.lookahead_depth()
+        first = max(0, self.position - LOOKBEHIND)
+        last = min(len(self._images) - 1, self.position + depth)
+        wanted = {self._images[position][1] for position in range(first, last + 1)}
+        self._prune(wanted)
+        for position in range(self.position + 1, last + 1):
+            content_hash = self._images[position][1]
+            if content_hash not in self.cache:
+                # Closer images first
+                self._request(content_hash, priority=MAX_LOOKAHEAD - (position - self.position))
+
+    def _prune(self, wanted):
+        """Takes queued decodes that fell out of the window off the queue."""
+        for content_hash, task in list(self._pending.items()):
+            if content_hash not in wanted and self.pool.tryTake(task):
+                del self._pending[content_hash]
+
+    def _preview(self, content_hash):
+        if self._thumbnails is None:
+            return None
+        path = self._thumbnails.get(content_hash, PREVIEW_SIZE)
+        if path is None:
+            return None
+        image = QImage(str(path))
+        return image if not image.isNull() else None
+
+    def _on_decoded(self, content_hash, image, decode_ms):
+        if self._pending.pop(content_hash, None) is None:
+            return  # cleared in the meantime
+        if not image.isNull():
+            self._decode_ms = self._ewma(self._decode_ms, decode_ms)
+            self._image_bytes = self._ewma(self._image_bytes, image.sizeInBytes())
+            self.cache.put(content_hash, image)
+        if 0 <= self.position < len(self._images) and self._images[self.position][1] == content_hash:
+            self.image_ready.emit(self.position, image)
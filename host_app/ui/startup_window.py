@@ -20,21 +20,60 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from PySide6.QtCore import QSize, QRect, QCoreApplication, QMetaObject, QTimer, Qt, Signal
+import time
+import traceback
+from PySide6.QtCore import QSize, QRect, QCoreApplication, QMetaObject, QTimer, QElapsedTimer, Qt, Signal
 from PySide6.QtGui import QPixmap
-from PySide6.QtWidgets import QLabel, QWidget
+from PySide6.QtWidgets import QLabel, QWidget, QProgressBar
 from pathlib import Path
+from ui.workers import Worker
 
 # Get the absolute path of the current file (the script inside 'ui' folder)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent  # Moves 3 levels up to project root
 # Construct the path to the assets folder
 boot_screen_img = str( BASE_DIR / "assets" / "App_boot_screen.png" )
 
+BOOT_MIN_DISPLAY_MS = 800    # keep the splash up at least this long so it does not just flash
+BOOT_TIMEOUT_MS = 30000      # give up waiting for the warm-up tasks after this long
+
+def run_readiness_tasks(tasks, progress_callback=None, cancel_event=None):
+    """Runs on a worker thread. Runs the boot tasks in order and collects their results.
+
+    `tasks` is a list of (name, description, fn). Each fn receives the results of
+    the tasks before it, so it can skip work that depends on a failed task. A task
+    that raises does not stop the boot, its result is {"success": False, "error": ...}.
+    """
+    results = {}
+    for index, (name, description, fn) in enumerate(tasks):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        if progress_callback is not None:
+            progress_callback(index, len(tasks), description)
+
+        start = time.perf_counter()
+        try:
+            res = fn(results)
+        except Exception as e:
+            traceback.print_exc()
+            res = {"success": False, "error": str(e)}
+        res["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        results[name] = res
+        print(f"Boot task '{name}': {'ok' if res['success'] else res.get('error')} ({res['elapsed_ms']} ms)")
+
+    if progress_callback is not None:
+        progress_callback(len(tasks), len(tasks), "Ready")
+    return results
+
 class boot_window(QWidget):
     boot_complete = Signal()
 
-    def __init__(self):
+    def __init__(self, readiness_tasks=(), min_display_ms=BOOT_MIN_DISPLAY_MS, timeout_ms=BOOT_TIMEOUT_MS):
         super().__init__()
+        self.readiness_tasks = list(readiness_tasks)
+        self.readiness_results = {}
+        self.min_display_ms = min_display_ms
+        self.timeout_ms = timeout_ms
+        self.worker = None
         self.setupUi()
 
     def setupUi(self):
@@ -52,15 +91,52 @@ class boot_window(QWidget):
         self.label.setMaximumSize(QSize(600, 200))
         self.label.setPixmap(QPixmap(boot_screen_img))
 
+        # Thin progress bar along the bottom edge of the splash image
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setObjectName("boot_progress")
+        self.progress_bar.setGeometry(QRect(0, 184, 600, 16))
+        self.progress_bar.setRange(0, max(1, len(self.readiness_tasks)))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setTextVisible(True)
+        self.progress_bar.setAlignment(Qt.AlignCenter)
+
         self.retranslateUi()
         self.show()
 
-        QTimer.singleShot(3000, self.close_boot_screen)
+        self.shown_timer = QElapsedTimer()
+        self.shown_timer.start()
+        self.start_readiness_tasks()
 
     def retranslateUi(self):
         self.setWindowTitle(QCoreApplication.translate("boot_screen", "ODDM Toolkit", None))
         self.label.setText("")
 
+    def start_readiness_tasks(self):
+        """Runs the warm-up tasks in the background, the splash closes as soon as they finish."""
+        if not self.readiness_tasks:
+            self.on_readiness_finished({})
+            return
+
+        self.worker = Worker(run_readiness_tasks, self.readiness_tasks, pass_controls=True)
+        self.worker.signals.progress.connect(self.show_progress)
+        self.worker.signals.finished.connect(self.on_readiness_finished)
+        self.worker.signals.failed.connect(lambda error: self.on_readiness_finished({}))
+        self.worker.signals.timed_out.connect(lambda: self.on_readiness_finished({}))
+        self.worker.signals.cancelled.connect(lambda: self.on_readiness_finished({}))
+        self.worker.start(timeout_ms=self.timeout_ms)
+
+    def show_progress(self, step_index, step_count, description):
+        self.progress_bar.setMaximum(max(1, step_count))
+        self.progress_bar.setValue(step_index)
+        self.progress_bar.setFormat(description)
+
+    def on_readiness_finished(self, results):
+        """Boot is never blocked by a failed task, the app handles a missing piece itself."""
+        self.worker = None
+        self.readiness_results = results
+        remaining_ms = max(0, self.min_display_ms - self.shown_timer.elapsed())
+        QTimer.singleShot(remaining_ms, self.close_boot_screen)
+
     def close_boot_screen(self):
         self.boot_complete.emit()  # Emit signal before closing
         self.close()
\ No newline at end of file
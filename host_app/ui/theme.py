@@ -20,6 +20,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from functools import lru_cache
+
 # **Background & Containers**
 BACKGROUND_COLOR = "#24293E"  # Deep Navy Blue
 CARD_BACKGROUND_COLOR = "#2E3448"  # Slightly Lighter Dark Blue
@@ -56,4 +58,145 @@ TEXT_FONT_FAMILY = "Segoe UI, 'Arial', sans-serif"
 TEXT_SIZE_HEADING = '16px'
 TEXT_SIZE_INPUT_FEILD = '14px'
 TEXT_SIZE_BUTTONS = '14px'
-TEXT_SIZE_HINT_OR_DESCRIPTION = '12px'
\ No newline at end of file
+TEXT_SIZE_HINT_OR_DESCRIPTION = '12px'
+
+# Buttons pick their colour through the "variant" property, labels their size
+# through "role" and inputs their border through "state". Changing a property
+# only needs a re-polish of that widget, the stylesheet itself is parsed once.
+BUTTON_VARIANTS = {
+    "primary": PRIMARY_BUTTON_COLOR,
+    "success": SUCCESS_COLOR,
+    "danger": ERROR_COLOR,
+}
+
+INPUT_STATE_BORDERS = {
+    "normal": INPUT_BORDER_COLOR,
+    "error": ERROR_COLOR,
+    "ok": SUCCESS_COLOR,
+}
+
+@lru_cache(maxsize=1)
+def build_application_stylesheet() -> str:
+    """Builds the stylesheet for the whole application from the constants above."""
+    rules = [f"""
+        QLabel[role="heading"] {{
+            color: {TEXT_PRIMARY_COLOR};
+            font-size: {TEXT_SIZE_HEADING};
+            font-weight: bold;
+            font-family: {TEXT_FONT_FAMILY};
+        }}
+        QLabel[role="message"] {{
+            color: {TEXT_PRIMARY_COLOR};
+            font-size: {TEXT_SIZE_INPUT_FEILD};
+            font-weight: bold;
+            font-family: {TEXT_FONT_FAMILY};
+        }}
+        QLabel[role="status"] {{
+            color: {TEXT_SECONDARY_COLOR};
+            font-size: {TEXT_SIZE_HINT_OR_DESCRIPTION};
+            font-family: {TEXT_FONT_FAMILY};
+        }}
+        QLineEdit[role="input"] {{
+            background-color: {INPUT_BG_COLOR};
+            border: 2px solid {INPUT_BORDER_COLOR};
+            color: {TEXT_PRIMARY_COLOR};
+            padding: 5px;
+            font-size: {TEXT_SIZE_INPUT_FEILD};
+            border-radius: 4px;
+            font-family: {TEXT_FONT_FAMILY};
+            font-weight: bold;
+        }}
+        QCheckBox {{
+            color: {TEXT_PRIMARY_COLOR};
+            font-size: {TEXT_SIZE_INPUT_FEILD};
+            font-family: {TEXT_FONT_FAMILY};
+            font-weight: bold;
+            spacing: 8px;
+        }}
+        QPushButton[variant] {{
+            color: {TEXT_PRIMARY_COLOR};
+            border-radius: 4px;
+            padding: 5px;
+            font-size: {TEXT_SIZE_BUTTONS};
+            font-family: {TEXT_FONT_FAMILY};
+            font-weight: bold;
+        }}
+        QMessageBox[variant="error"] {{
+            background-color: {BACKGROUND_COLOR};
+            color: {TEXT_PRIMARY_COLOR};
+            font-size: {TEXT_SIZE_BUTTONS};
+            font-family: {TEXT_FONT_FAMILY};
+            font-weight: bold;
+        }}
+        QMessageBox[variant="error"] QPushButton {{
+            background-color: {ERROR_COLOR};
+            color: {TEXT_PRIMARY_COLOR};
+            border-radius: 5px;
+            padding: 6px;
+        }}
+        QMessageBox[variant="error"] QPushButton:hover {{
+            background-color: {HOVER_COLOR};
+        }}
+        QMessageBox[variant="error"] QPushButton:pressed {{
+            background-color: {ACTIVE_COLOR};
+        }}
+        QListView#dataset_view {{
+            background-color: {CARD_BACKGROUND_COLOR};
+            color: {TEXT_SECONDARY_COLOR};
+            border: 1px solid {INPUT_BORDER_COLOR};
+            font-size: {TEXT_SIZE_HINT_OR_DESCRIPTION};
+            font-family: {TEXT_FONT_FAMILY};
+        }}
+        QListView#dataset_view::item:hover {{
+            background-color: {ACTIVE_COLOR};
+        }}
+        QListView#dataset_view::item:selected {{
+            background-color: {HOVER_COLOR};
+            color: {TEXT_PRIMARY_COLOR};
+        }}
+        QProgressBar#boot_progress {{
+            background-color: {BACKGROUND_COLOR};
+            color: {TEXT_PRIMARY_COLOR};
+            border: none;
+            font-family: {TEXT_FONT_FAMILY};
+            font-size: {TEXT_SIZE_HINT_OR_DESCRIPTION};
+        }}
+        QProgressBar#boot_progress::chunk {{
+            background-color: {PRIMARY_BUTTON_COLOR};
+        }}
+    """]
+
+    for variant, color in BUTTON_VARIANTS.items():
+        rules.append(f"""
+        QPushButton[variant="{variant}"] {{
+            background-color: {color};
+        }}""")
+    # After the variants so hover and pressed win over the base colour
+    rules.append(f"""
+        QPushButton[variant]:hover {{
+            background-color: {HOVER_COLOR};  /* Hover effect */
+        }}
+        QPushButton[variant]:pressed {{
+            background-color: {ACTIVE_COLOR};  /* Click effect */
+        }}""")
+
+    for state, color in INPUT_STATE_BORDERS.items():
+        rules.append(f"""
+        QLineEdit[role="input"][state="{state}"] {{
+            border: 2px solid {color};
+        }}""")
+
+    return "\n".join(rules)
+
+def apply_application_theme(app):
+    """Installs the shared stylesheet on the QApplication, call once at startup."""
+    app.setStyleSheet(build_application_stylesheet())
+
+def set_style_property(widget, name, value):
+    """Sets a dynamic property used by the stylesheet and re-polishes only this widget."""
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
@@ -0,0 +1,110 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading
+import traceback
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+class WorkerSignals(QObject):
+    progress = Signal(int, int, str)  # step index, step count, description
+    finished = Signal(object)         # return value of the task
+    failed = Signal(str)              # unexpected exception raised by the task
+    cancelled = Signal()
+    timed_out = Signal()
+    stopped = Signal()                # run() returned, always the last signal, also after a timeout
+
+class Worker(QRunnable):
+    """Runs a blocking function on the global QThreadPool.
+
+    Results are delivered through `signals`, which live in the GUI thread, so
+    connected slots can touch widgets. When `pass_controls` is True the function
+    also receives `progress_callback` and `cancel_event` keyword arguments.
+    """
+
+    def __init__(self, fn, *args, pass_controls=False, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)  # the owner keeps a reference until a final signal
+
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+        self._lock = threading.Lock()
+        self._done = False
+        self._timer = None
+
+        if pass_controls:
+            self.kwargs["progress_callback"] = self.signals.progress.emit
+            self.kwargs["cancel_event"] = self.cancel_event
+
+    def start(self, timeout_ms=None):
+        """Queues the worker. After `timeout_ms` it is cancelled and `timed_out` is emitted."""
+        if timeout_ms:
+            self._timer = QTimer(self.signals)
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self._on_timeout)
+            self._timer.start(timeout_ms)
+        QThreadPool.globalInstance().start(self)
+
+    def cancel(self):
+        """Requests cancellation, the task stops at its next checkpoint.
+
+        Results produced after cancellation are dropped and `cancelled` is emitted instead.
+        """
+        self.cancel_event.set()
+
+    def _finish(self):
+        """Marks the worker done, returns False if it already was."""
+        with self._lock:
+            if self._done:
+                return False
+            self._done = True
+            return True
+
+    def _on_timeout(self):
+        if self._finish():
+            self.cancel()
+            self.signals.timed_out.emit()
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            self.signals.stopped.emit()
+
+    def _run(self):
+        try:
+            res = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            if self._finish():
+                self.signals.failed.emit(str(e))
+            return
+
+        if not self._finish():
+            return  # timed out, the result is no longer wanted
+        if self.cancel_event.is_set():
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(res)
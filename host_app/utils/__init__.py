@@ -1,4 +1,10 @@
 from .auth import create_oddm_setup_file
 from .auth import get_oddm_setup_credentials
 from .auth import check_if_oddm_setup_file_exists
-from .database import connect_to_psql_db, get_psql_connection, setup_oddm_toolkit_db
\ No newline at end of file
+from .auth import get_setup_config, watch_setup_config, stop_watching_setup_config
+from .database import connect_to_psql_db, get_psql_connection, setup_oddm_toolkit_db
+from .database import connect_to_oddm_toolkit_db, bulk_insert_users, import_users_from_csv
+from .database import bulk_upsert, bulk_delete
+from .db_pool import get_pool, close_all_pools
+from .hashing import get_hashing_service, shutdown_hashing_service, calibrate_profile, load_calibrated_profile
+from .migrations import migrate, resolve_migration
\ No newline at end of file
@@ -0,0 +1,260 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+import itertools
+import threading
+import traceback
+from .annotations import MAX_WRITE_BATCH
+
+# Client side write buffer for box edits. Edits are coalesced per box (a box
+# moved ten times is written once, a box created and deleted before a flush is
+# never written) and sent as one batch per flush, at most every
+# `flush_interval` seconds or as soon as `max_pending` boxes are dirty. A flush
+# is sent in chunks the host accepts, failed sends are retried with backoff.
+#
+# `send(changes)` delivers a batch, e.g. a POST to /api/projects/<id>/annotations/batch
+# or apply_annotation_changes on the host, and returns its result dict.
+# Flushes are serialised, so the next batch is always based on the versions
+# the previous one produced.
+
+DEFAULT_FLUSH_INTERVAL = 1.0   # seconds an edit may wait before it is sent
+DEFAULT_MAX_PENDING = 500      # dirty boxes that trigger a flush straight away
+MAX_RETRY_DELAY = 30.0         # seconds between attempts while the host keeps failing
+MAX_BUFFERED_BOXES = 50000     # dirty boxes kept while sends fail, further new edits are refused
+
+class AnnotationBufferFull(Exception):
+    """Raised by the edit methods when the host has not accepted edits for too long."""
+
+def _coalesce(older, newer):
+    """Merges two edits of the same box into one, None when nothing is left to write."""
+    if older["op"] == "create":
+        if newer["op"] == "delete":
+            return None
+        return dict(newer, op="create")
+    if older["op"] == "update":
+        # Keep the version the first edit was based on, that is what the server has
+        return dict(newer, row_version=older["row_version"])
+    return newer
+
+class AnnotationWriteBuffer:
+    def __init__(self, send, flush_interval=DEFAULT_FLUSH_INTERVAL, max_pending=DEFAULT_MAX_PENDING,
+                 result_callback=None):
+        self.send = send
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.result_callback = result_callback  # called with every batch result, conflicts included
+
+        self._pending = {}            # box key (id, or ref of a new box) -> coalesced edit
+        self._first_pending_at = None
+        self._created = {}            # ref -> id of boxes created by earlier flushes
+        self._versions = {}           # id -> row_version written by earlier flushes
+        self._refs = itertools.count(1)
+        self._retry_delay = 0.0
+        self._retry_at = None         # no sends before this time after a failed one
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stop = False
+        self._thread = threading.Thread(target=self._flush_loop, name="oddm-annotation-writer", daemon=True)
+        self._thread.start()
+
+    def create_box(self, image_id, class_id, box):
+        """Records a new box and returns its ref. Later edits may use the ref until the box has an id."""
+        ref = f"new-{next(self._refs)}"
+        self._record(ref, {"op": "create", "image_id": image_id, "class_id": class_id, "box": list(box)})
+        return ref
+
+    def update_box(self, image_id, box_id, row_version, class_id, box):
+        """`box_id` is an id or a ref from create_box, row_version the version the box was loaded with."""
+        self._record(box_id, {"op": "update", "image_id": image_id, "row_version": row_version,
+                              "class_id": class_id, "box": list(box)})
+
+    def delete_box(self, image_id, box_id, row_version):
+        self._record(box_id, {"op": "delete", "image_id": image_id, "row_version": row_version})
+
+    def box_id(self, key):
+        """Resolves a ref to the id the server gave the box, None until its create was flushed."""
+        return key if isinstance(key, int) else self._created.get(key)
+
+    def row_version(self, box_id):
+        """Latest version written through this buffer, None when it did not write the box."""
+        return self._versions.get(box_id)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _record(self, key, edit):
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= MAX_BUFFERED_BOXES:
+                raise AnnotationBufferFull(f"{len(self._pending)} box edits are waiting to be saved, "
+                                           "the host is not accepting them.")
+            older = self._pending.pop(key, None)
+            merged = _coalesce(older, edit) if older is not None else edit
+            if merged is not None:
+                self._pending[key] = merged
+            if self._pending and self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+                self._wakeup.notify()  # starts the flush interval
+            elif len(self._pending) >= self.max_pending:
+                self._wakeup.notify()
+
+    def _take_batch(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._first_pending_at = None
+        return batch
+
+    def _requeue(self, batch):
+        """Puts a batch that could not be sent back under the edits recorded since."""
+        with self._lock:
+            for key, edit in batch.items():
+                newer = self._pending.pop(key, None)
+                merged = _coalesce(edit, newer) if newer is not None else edit
+                if merged is not None:
+                    self._pending[key] = merged
+            if self._pending and self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+                self._wakeup.notify()
+
+    def _build_changes(self, batch):
+        """Groups a batch by image in the format of apply_annotation_changes."""
+        changes = {}
+        for key, edit in batch.items():
+            image_changes = changes.setdefault(edit["image_id"], {"image_id": edit["image_id"], "upserts": [], "deletes": []})
+            if edit["op"] == "create":
+                image_changes["upserts"].append({"ref": key, "class_id": edit["class_id"], "box": edit["box"]})
+                continue
+            box_id = self.box_id(key)
+            if box_id is None:
+                continue  # edit of a box whose create failed, nothing to apply it to
+            # Boxes this buffer wrote before are based on the version that write produced
+            row_version = self._versions.get(box_id, edit["row_version"])
+            if edit["op"] == "delete":
+                image_changes["deletes"].append({"id": box_id, "row_version": row_version})
+            else:
+                image_changes["upserts"].append({"id": box_id, "row_version": row_version,
+                                                 "class_id": edit["class_id"], "box": edit["box"]})
+        return list(changes.values())
+
+    def _chunks(self, batch, size):
+        """Splits a batch into sub-batches of at most `size` boxes, keeping an image's boxes together where possible."""
+        keys = sorted(batch, key=lambda key: batch[key]["image_id"])
+        return [{key: batch[key] for key in keys[i:i + size]} for i in range(0, len(keys), size)]
+
+    def _apply_result(self, res):
+        for ref, created in res["created"].items():
+            self._created[ref] = created["id"]
+            self._versions[created["id"]] = created["row_version"]
+        for box_id, row_version in res["updated"].items():
+            self._versions[int(box_id)] = row_version  # JSON object keys are strings
+        for box_id in res["deleted"]:
+            self._versions.pop(box_id, None)
+        for conflict in res["conflicts"]:
+            self._versions.pop(conflict["id"], None)
+
+    def _report(self, res):
+        if self.result_callback is None:
+            return
+        try:
+            self.result_callback(res)
+        except Exception:
+            traceback.print_exc()  # a broken callback must not stop the flushes
+
+    def flush(self):
+        """Sends everything recorded so far, in chunks of at most MAX_WRITE_BATCH boxes.
+
+        Returns the merged result of the chunks, None when there was nothing to send.
+        """
+        with self._flush_lock:
+            batch = self._take_batch()
+            if not batch:
+                return None
+
+            merged = {"success": True, "created": {}, "updated": {}, "deleted": [], "conflicts": []}
+            chunks = self._chunks(batch, MAX_WRITE_BATCH)
+            while chunks:
+                chunk = chunks.pop(0)
+                try:
+                    res = self.send(self._build_changes(chunk))
+                except Exception as e:
+                    traceback.print_exc()
+                    res = {"success": False, "error": str(e)}
+
+                if res.get("success"):
+                    self._apply_result(res)
+                    for name in ("created", "updated"):
+                        merged[name].update(res[name])
+                    merged["deleted"].extend(res["deleted"])
+                    merged["conflicts"].extend(res["conflicts"])
+                    self._report(res)
+                    continue
+
+                if res.get("error_id") == "ERR-ANN-002" and len(chunk) > 1:
+                    # The host accepts smaller batches than this one, split it and resend
+                    chunks[:0] = self._chunks(chunk, (len(chunk) + 1) // 2)
+                    continue
+
+                print(f"Annotation batch rejected: {res.get('error')}")
+                merged.update(success=False, error=res.get("error"), error_id=res.get("error_id"))
+                self._report(res)
+                if res.get("error_id") not in ("ERR-ANN-001", "ERR-ANN-002", "ERR-ANN-003", "ERR-ANN-004"):
+                    # Transient, e.g. the host was unreachable: keep this and the unsent chunks for later
+                    for unsent in [chunk] + chunks:
+                        self._requeue(unsent)
+                    self._retry_delay = min(self._retry_delay * 2 or self.flush_interval, MAX_RETRY_DELAY)
+                    self._retry_at = time.monotonic() + self._retry_delay
+                    return merged
+
+            self._retry_delay = 0.0
+            self._retry_at = None
+            return merged
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                while not self._stop:
+                    now = time.monotonic()
+                    if self._retry_at is not None and now < self._retry_at:
+                        self._wakeup.wait(self._retry_at - now)  # backing off after a failed send
+                        continue
+                    if len(self._pending) >= self.max_pending:
+                        break
+                    if self._first_pending_at is not None:
+                        remaining = self._first_pending_at + self.flush_interval - now
+                        if remaining <= 0:
+                            break
+                        self._wakeup.wait(remaining)
+                    else:
+                        self._wakeup.wait()
+                if self._stop:
+                    return
+            self.flush()
+
+    def close(self):
+        """Stops the background flushes and sends what is left."""
+        with self._lock:
+            self._stop = True
+            self._wakeup.notify()
+        self._thread.join()
+        return self.flush()
@@ -0,0 +1,329 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from psycopg2.errors import ForeignKeyViolation
+from .database import get_psql_connection, copy_rows, bulk_upsert, bulk_delete
+
+# Set-based access to projects, images and bounding box annotations.
+# Everything here works on batches: one COPY or one query per call, never a
+# query per row. Box coordinates are absolute pixels (x_min, y_min, x_max, y_max).
+
+IMAGE_PAGE_SIZE = 1000
+MAX_WRITE_BATCH = 5000  # box changes per apply_annotation_changes call
+
+def create_project(name, created_by=None, description=None, class_names=()):
+    """Creates a project and its classes. class_names are stored in order as class ids 0..n-1."""
+    with get_psql_connection(autocommit=False) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM projects WHERE name = %s;", (name,))
+        if cursor.fetchone():
+            cursor.close()
+            return {"success": False, "error": "A project with this name already exists.", "error_id": "ERR-PRJ-001"}
+
+        cursor.execute(
+            "INSERT INTO projects (name, description, created_by) VALUES (%s, %s, %s) RETURNING id;",
+            (name, description, created_by)
+        )
+        project_id = cursor.fetchone()[0]
+        if class_names:
+            copy_rows(cursor, "project_classes", ("project_id", "class_id", "name"),
+                      ((project_id, class_id, class_name) for class_id, class_name in enumerate(class_names)))
+        cursor.close()
+
+    return {"success": True, "id": project_id}
+
+def get_project_classes(project_id):
+    """Returns {class_id: name} for a project."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT class_id, name FROM project_classes WHERE project_id = %s ORDER BY class_id;", (project_id,))
+            return dict(cursor.fetchall())
+
+def ensure_project_classes(project_id, class_names):
+    """Adds the classes that do not exist yet and returns {name: class_id} for all of them."""
+    with get_psql_connection(autocommit=False) as conn:
+        cursor = conn.cursor()
+        # Serialise class id allocation per project
+        cursor.execute("SELECT id FROM projects WHERE id = %s FOR UPDATE;", (project_id,))
+        cursor.execute("""
+            INSERT INTO project_classes (project_id, class_id, name)
+            SELECT %(project_id)s,
+                   COALESCE((SELECT MAX(class_id) FROM project_classes WHERE project_id = %(project_id)s), -1)
+                       + ROW_NUMBER() OVER (ORDER BY ord),
+                   name
+            FROM unnest(%(names)s::text[]) WITH ORDINALITY AS new_classes(name, ord)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM project_classes pc WHERE pc.project_id = %(project_id)s AND pc.name = new_classes.name
+            );
+        """, {"project_id": project_id, "names": list(dict.fromkeys(class_names))})
+        cursor.execute("SELECT name, class_id FROM project_classes WHERE project_id = %s AND name = ANY(%s);",
+                       (project_id, list(class_names)))
+        classes = dict(cursor.fetchall())
+        cursor.close()
+    return classes
+
+def bulk_insert_images(project_id, images, cursor=None):
+    """Inserts images given as (file_name, width, height, content_hash) tuples.
+
+    content_hash is the key of the file in the blob store, it may be None.
+    Existing file names are updated in place. Returns {file_name: image_id}.
+    Pass a cursor to run inside the caller's transaction (once per transaction,
+    the staging table lives until commit).
+    """
+    if cursor is None:
+        with get_psql_connection(autocommit=False) as conn:
+            with conn.cursor() as own_cursor:
+                return bulk_insert_images(project_id, images, own_cursor)
+
+    cursor.execute("""
+        CREATE TEMP TABLE images_staging (
+            file_name TEXT,
+            width INTEGER,
+            height INTEGER,
+            content_hash CHAR(64)
+        ) ON COMMIT DROP;
+    """)
+    copy_rows(cursor, "images_staging", ("file_name", "width", "height", "content_hash"), images)
+    cursor.execute("""
+        INSERT INTO images (project_id, file_name, width, height, content_hash)
+        SELECT DISTINCT ON (file_name) %s, file_name, width, height, content_hash FROM images_staging
+        ON CONFLICT (project_id, file_name) DO UPDATE
+            SET width = EXCLUDED.width, height = EXCLUDED.height, content_hash = EXCLUDED.content_hash
+        RETURNING file_name, id;
+    """, (project_id,))
+    return dict(cursor.fetchall())
+
+def bulk_insert_annotations(project_id, boxes, created_by=None, cursor=None):
+    """Streams boxes given as (image_id, class_id, x_min, y_min, x_max, y_max) tuples with COPY.
+
+    Returns the number of rows inserted.
+    """
+    if cursor is None:
+        with get_psql_connection(autocommit=False) as conn:
+            with conn.cursor() as own_cursor:
+                return bulk_insert_annotations(project_id, boxes, created_by, own_cursor)
+
+    rows = ((project_id, image_id, class_id, x_min, y_min, x_max, y_max, created_by)
+            for image_id, class_id, x_min, y_min, x_max, y_max in boxes)
+    copy_rows(cursor, "annotations",
+              ("project_id", "image_id", "class_id", "x_min", "y_min", "x_max", "y_max", "created_by"), rows)
+    return cursor.rowcount
+
+def delete_image_annotations(project_id, image_ids, cursor=None):
+    """Removes every box of the given images, returns the number of rows deleted."""
+    if cursor is None:
+        with get_psql_connection() as conn:
+            with conn.cursor() as own_cursor:
+                return delete_image_annotations(project_id, image_ids, own_cursor)
+
+    cursor.execute("DELETE FROM annotations WHERE project_id = %s AND image_id = ANY(%s);",
+                   (project_id, list(image_ids)))
+    return cursor.rowcount
+
+def get_image_annotations(project_id, image_id):
+    """Returns the boxes of one image as (id, class_id, x_min, y_min, x_max, y_max, row_version) tuples."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, class_id, x_min, y_min, x_max, y_max, row_version
+                FROM annotations
+                WHERE project_id = %s AND image_id = %s;
+            """, (project_id, image_id))
+            return cursor.fetchall()
+
+def get_annotations_for_images(project_id, image_ids):
+    """Returns {image_id: [(id, class_id, x_min, y_min, x_max, y_max), ...]} in one query."""
+    image_ids = list(image_ids)
+    annotations = {image_id: [] for image_id in image_ids}
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT image_id, id, class_id, x_min, y_min, x_max, y_max
+                FROM annotations
+                WHERE project_id = %s AND image_id = ANY(%s);
+            """, (project_id, image_ids))
+            for image_id, *box in cursor:
+                annotations[image_id].append(tuple(box))
+    return annotations
+
+def get_images_with_class(project_id, class_id, after_image_id=0, limit=IMAGE_PAGE_SIZE):
+    """Returns up to `limit` image ids containing `class_id`, after `after_image_id` (keyset pagination)."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT DISTINCT image_id
+                FROM annotations
+                WHERE project_id = %s AND class_id = %s AND image_id > %s
+                ORDER BY image_id
+                LIMIT %s;
+            """, (project_id, class_id, after_image_id, limit))
+            return [row[0] for row in cursor.fetchall()]
+
+def get_image_page(project_id, after_image_id=0, limit=IMAGE_PAGE_SIZE):
+    """Returns up to `limit` images as (id, file_name, width, height, content_hash) after `after_image_id`."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, file_name, width, height, content_hash
+                FROM images
+                WHERE project_id = %s AND id > %s
+                ORDER BY id
+                LIMIT %s;
+            """, (project_id, after_image_id, limit))
+            return cursor.fetchall()
+
+def get_image_count(project_id):
+    """Number of images in a project, counted through images_project_id_idx."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM images WHERE project_id = %s;", (project_id,))
+            return cursor.fetchone()[0]
+
+def get_images(project_id, image_ids):
+    """Returns {id: (id, file_name, width, height, content_hash)} for the given images in one query."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, file_name, width, height, content_hash
+                FROM images
+                WHERE project_id = %s AND id = ANY(%s);
+            """, (project_id, list(image_ids)))
+            return {row[0]: row for row in cursor.fetchall()}
+
+def _parse_annotation_changes(changes):
+    """Splits a change batch into creates, updates and deletes. Raises ValueError when it is malformed."""
+    creates, updates, deletes = [], {}, {}
+    for image_changes in changes:
+        image_id = int(image_changes["image_id"])
+        for upsert in image_changes.get("upserts", ()):
+            class_id = int(upsert["class_id"])
+            x_min, y_min, x_max, y_max = (float(value) for value in upsert["box"])
+            if upsert.get("id") is None:
+                creates.append((str(upsert["ref"]), image_id, class_id, x_min, y_min, x_max, y_max))
+            else:
+                box_id = int(upsert["id"])
+                if box_id in updates:
+                    raise ValueError(f"Box {box_id} is changed twice.")
+                updates[box_id] = (image_id, int(upsert["row_version"]), class_id, x_min, y_min, x_max, y_max)
+        for delete in image_changes.get("deletes", ()):
+            box_id = int(delete["id"])
+            if box_id in updates or box_id in deletes:
+                raise ValueError(f"Box {box_id} is changed twice.")
+            deletes[box_id] = (image_id, int(delete["row_version"]))
+    return creates, updates, deletes
+
+def apply_annotation_changes(project_id, changes, user_id=None):
+    """Applies a batch of box edits in one transaction, with optimistic version checks.
+
+    `changes` is a list of {"image_id", "upserts", "deletes"}. An upsert is
+    {"id", "row_version", "class_id", "box"} for an existing box or {"ref",
+    "class_id", "box"} for a new one, ref being the client's key for it. A
+    delete is {"id", "row_version"}. Edits of boxes that changed since their
+    row_version are not applied, they come back in "conflicts" with the
+    current box (None when it was deleted).
+    Returns {"success", "created": {ref: {"id", "row_version"}}, "updated": {id: row_version},
+    "deleted": [id, ...], "conflicts": [{"id", "image_id", "current"}]}.
+
+    ERROR IDS:
+    ERR-ANN-001: The batch references images outside the project.
+    ERR-ANN-002: The batch is too large.
+    ERR-ANN-003: The batch is malformed.
+    ERR-ANN-004: The batch uses classes that do not exist in this project.
+    """
+    try:
+        creates, updates, deletes = _parse_annotation_changes(changes)
+    except (KeyError, TypeError, ValueError) as e:
+        return {"success": False, "error": f"Malformed annotation changes: {e}", "error_id": "ERR-ANN-003"}
+    if len(creates) + len(updates) + len(deletes) > MAX_WRITE_BATCH:
+        return {"success": False, "error": f"At most {MAX_WRITE_BATCH} box changes per batch.", "error_id": "ERR-ANN-002"}
+
+    image_ids = {row[1] for row in creates} | {row[0] for row in updates.values()} | {row[0] for row in deletes.values()}
+    result = {"success": True, "created": {}, "updated": {}, "deleted": [], "conflicts": []}
+
+    try:
+        with get_psql_connection(autocommit=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM images WHERE project_id = %s AND id = ANY(%s);", (project_id, list(image_ids)))
+            if len(cursor.fetchall()) != len(image_ids):
+                cursor.close()
+                return {"success": False, "error": "Some images do not belong to this project.", "error_id": "ERR-ANN-001"}
+
+            # Lock the edited boxes in id order (no deadlocks between batches), a concurrent delete cannot
+            # slip in between the version check and the write
+            cursor.execute("""
+                SELECT id, image_id, class_id, x_min, y_min, x_max, y_max, row_version
+                FROM annotations
+                WHERE project_id = %s AND id = ANY(%s)
+                ORDER BY id
+                FOR UPDATE;
+            """, (project_id, list(updates) + list(deletes)))
+            current = {row[0]: row for row in cursor.fetchall()}
+
+            def conflict(box_id, image_id):
+                row = current.get(box_id)
+                result["conflicts"].append({"id": box_id, "image_id": image_id, "current": row and {
+                    "image_id": row[1], "class_id": row[2], "box": list(row[3:7]), "row_version": row[7]}})
+
+            rows = []
+            for box_id, (image_id, base_version, *box) in updates.items():
+                row = current.get(box_id)
+                if row is None or row[1] != image_id or row[7] != base_version:
+                    conflict(box_id, image_id)
+                else:
+                    rows.append((project_id, box_id, image_id, *box, user_id, base_version + 1))
+
+            delete_keys = []
+            for box_id, (image_id, base_version) in deletes.items():
+                row = current.get(box_id)
+                if row is None:
+                    result["deleted"].append(box_id)  # already gone, which is what the client wanted
+                elif row[1] != image_id or row[7] != base_version:
+                    conflict(box_id, image_id)
+                else:
+                    delete_keys.append((project_id, box_id, base_version))
+
+            if creates:
+                cursor.execute("SELECT nextval(pg_get_serial_sequence('annotations', 'id')) FROM generate_series(1, %s);",
+                               (len(creates),))
+                new_ids = [row[0] for row in cursor.fetchall()]
+                for box_id, (ref, image_id, *box) in zip(new_ids, creates):
+                    rows.append((project_id, box_id, image_id, *box, user_id, 1))
+                    result["created"][ref] = {"id": box_id, "row_version": 1}
+
+            written = bulk_upsert(
+                cursor, "annotations",
+                ("project_id", "id", "image_id", "class_id", "x_min", "y_min", "x_max", "y_max", "created_by", "row_version"),
+                rows, conflict_columns=("project_id", "id"),
+                update_columns=("class_id", "x_min", "y_min", "x_max", "y_max", "row_version"),
+                version_column="row_version", timestamp_columns=("updated_at",), returning=("id", "row_version"))
+            created_ids = {entry["id"] for entry in result["created"].values()}
+            result["updated"] = {box_id: version for box_id, version in written if box_id not in created_ids}
+
+            deleted = bulk_delete(cursor, "annotations", ("project_id", "id"), delete_keys,
+                                  version_column="row_version", returning=("id",))
+            result["deleted"].extend(row[0] for row in deleted)
+            cursor.close()
+    except ForeignKeyViolation:
+        return {"success": False, "error": "The batch uses classes that do not exist in this project.",
+                "error_id": "ERR-ANN-004"}
+
+    return result
@@ -21,15 +21,22 @@
 # SOFTWARE.
 
 import os
+import copy
 import uuid
 import base64
 import hashlib
+import threading
+from functools import lru_cache
 from cryptography.fernet import Fernet
 import json
 import platform
 import subprocess
 from pathlib import Path
 
+CONFIG_FILE_NAME = ".oddm_setup_config"
+CONFIG_WATCH_INTERVAL = 2.0  # seconds between checks in watch mode
+
+@lru_cache(maxsize=1)
 def _generate_encryption_key():
     """Generate a unique encryption key based on the system's UUID."""
     machine_id = str(uuid.getnode()).encode()  # Get the machine's UUID
@@ -37,6 +44,7 @@ def _generate_encryption_key():
     _key = base64.urlsafe_b64encode(hashed_uuid) # Convert to base64 to make it a valid Fernet key
     return Fernet(_key)  # Return the encryption key
 
+@lru_cache(maxsize=None)
 def find_project_root(folder_name="ODDM_Toolkit") -> Path:
     """Walks up from the current file or cwd to locate the project root."""
     path = Path(__file__).resolve().parent
@@ -47,6 +55,129 @@ def find_project_root(folder_name="ODDM_Toolkit") -> Path:
 
     raise FileNotFoundError(f"Could not find root directory named '{folder_name}' from path {path}")
 
+class SetupConfig:
+    """Typed, read-only view over the decrypted setup file."""
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    @property
+    def oddm_db_name(self) -> str:
+        return self._data["oddm_db_name"]
+
+    @property
+    def oddm_db_user(self) -> str:
+        return self._data["oddm_db_user"]
+
+    @property
+    def oddm_db_password(self) -> str:
+        return self._data["oddm_db_password"]
+
+    @property
+    def data_storage_path(self) -> Path:
+        return Path(self._data["data_storage_path"])
+
+    @property
+    def gdrive_enabled(self) -> bool:
+        return bool((self._data.get("gdrive_service_json_data") or {}).get("status"))
+
+    @property
+    def gdrive_service_json(self):
+        return (self._data.get("gdrive_service_json_data") or {}).get("data")
+
+    @property
+    def gdrive_folder_id(self):
+        return self._data.get("gdrive_folder_id") or None
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def to_dict(self) -> dict:
+        return copy.deepcopy(self._data)
+
+# The setup file is decrypted once and cached until its mtime, inode or size
+# changes. In watch mode a background thread does the stat() calls instead of
+# every reader.
+_CONFIG_LOCK = threading.Lock()
+_CONFIG_CACHE = {"signature": None, "config": None}
+_CONFIG_WATCHER = {"thread": None, "stop": None, "callbacks": []}
+
+def _config_file_path() -> Path:
+    return find_project_root() / CONFIG_FILE_NAME
+
+def _file_signature(config_file):
+    try:
+        stat = os.stat(config_file)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+def invalidate_setup_config_cache():
+    with _CONFIG_LOCK:
+        _CONFIG_CACHE["signature"] = None
+        _CONFIG_CACHE["config"] = None
+
+def get_setup_config() -> SetupConfig:
+    """Returns the cached setup config, reloading it only when the file changed.
+
+    Raises FileNotFoundError when the setup has not been completed.
+    """
+    config_file = _config_file_path()
+    watching = _CONFIG_WATCHER["thread"] is not None
+
+    with _CONFIG_LOCK:
+        config = _CONFIG_CACHE["config"]
+        if config is not None and watching:
+            return config  # the watcher invalidates the cache on change
+        signature = _file_signature(config_file)
+        if signature is None:
+            raise FileNotFoundError("ODDM Toolkit setup file does not exist.")
+        if config is not None and signature == _CONFIG_CACHE["signature"]:
+            return config
+
+        with open(config_file, "rb") as file:
+            encrypted_data = file.read()
+        config = SetupConfig(json.loads(_generate_encryption_key().decrypt(encrypted_data)))
+        _CONFIG_CACHE["signature"] = signature
+        _CONFIG_CACHE["config"] = config
+        return config
+
+def _watch_setup_config(stop_event, interval):
+    config_file = _config_file_path()
+    last_signature = _file_signature(config_file)
+    while not stop_event.wait(interval):
+        signature = _file_signature(config_file)
+        if signature == last_signature:
+            continue
+        last_signature = signature
+        invalidate_setup_config_cache()
+        for callback in list(_CONFIG_WATCHER["callbacks"]):
+            callback()
+
+def watch_setup_config(callback=None, interval=CONFIG_WATCH_INTERVAL):
+    """Starts watch mode. `callback()` is called from the watcher thread after the file changes."""
+    with _CONFIG_LOCK:
+        if callback is not None:
+            _CONFIG_WATCHER["callbacks"].append(callback)
+        if _CONFIG_WATCHER["thread"] is not None:
+            return
+        stop_event = threading.Event()
+        thread = threading.Thread(target=_watch_setup_config, args=(stop_event, interval),
+                                  name="oddm-config-watcher", daemon=True)
+        _CONFIG_WATCHER["stop"] = stop_event
+        _CONFIG_WATCHER["thread"] = thread
+        # Start from a fresh read so a change made before the watcher started is not missed
+        _CONFIG_CACHE["config"] = None
+    thread.start()
+
+def stop_watching_setup_config():
+    with _CONFIG_LOCK:
+        thread, stop_event = _CONFIG_WATCHER["thread"], _CONFIG_WATCHER["stop"]
+        _CONFIG_WATCHER.update(thread=None, stop=None, callbacks=[])
+    if thread is not None:
+        stop_event.set()
+        thread.join()
+
 def create_oddm_setup_file(data: dict):
     """Creates the ODDM Toolkits first time setup file."""
 
@@ -58,7 +189,7 @@ def create_oddm_setup_file(data: dict):
     except FileNotFoundError as e:
         return {"success": False, "error": str(e)}
     
-    config_file = config_dir / ".oddm_setup_config"
+    config_file = config_dir / CONFIG_FILE_NAME
     print(f"Config file path: {config_file}")
 
     gen_key = _generate_encryption_key()
@@ -71,42 +202,38 @@ def create_oddm_setup_file(data: dict):
         file.write(encrypted_data)
     if platform.system() == "Windows":
         subprocess.call(["attrib", "+h", config_file])  # Hide file on Windows
-    
+
+    invalidate_setup_config_cache()
+
     return {"success": True, "message": "ODDM Toolkit setup file created."}
 
 def get_oddm_setup_credentials():
     """Get the ODDM Toolkit setup credentials."""
 
     try:
-        config_dir = find_project_root()
+        config = get_setup_config()
     except FileNotFoundError as e:
         return {"success": False, "error": str(e)}
-    
-    config_file = config_dir / ".oddm_setup_config"
-    print(f"Config file path: {config_file}")
-
-    if not os.path.exists(config_file):
-        return {"success": False, "error": "ODDM Toolkit setup file does not exist."}
 
-    gen_key = _generate_encryption_key()
-    with open(config_file, "rb") as file:
-        encrypted_data = file.read()
-    decrypted_data = gen_key.decrypt(encrypted_data)
-
-    return {"success": True, "data":json.loads(decrypted_data) }
+    return {"success": True, "data": config.to_dict() }
 
 def check_if_oddm_setup_file_exists():
     """Check if the ODDM Toolkit setup file exists."""
     
     try:
-        config_dir = find_project_root()
+        config_file = _config_file_path()
     except FileNotFoundError as e:
         return {"success": False, "error": str(e)}
-    
-    config_file = config_dir / ".oddm_setup_config"
-    print(f"Config file path: {config_file}")
 
     if os.path.exists(config_file):
         return {"success": True, "message": "ODDM Toolkit setup file exists."}
     else:
-        return {"success": False, "error": "ODDM Toolkit setup file does not exist."}
\ No newline at end of file
+        return {"success": False, "error": "ODDM Toolkit setup file does not exist."}
+
+def get_data_storage_path() -> Path:
+    """Returns the local data storage path chosen during setup."""
+    return get_setup_config().data_storage_path
+
+def get_export_dir(project_id, export_format) -> Path:
+    """Returns <data_storage_path>/exports/project_<id>/<format>."""
+    return get_data_storage_path() / "exports" / f"project_{project_id}" / export_format
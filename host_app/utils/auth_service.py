@@ -0,0 +1,273 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hmac
+import time
+import base64
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from .database import get_psql_connection
+from .hashing import get_hashing_service
+
+# Logins and sessions for the host.
+#
+# Token: <session id>.<HMAC-SHA256 of the id>, both base64url. The signature
+# is checked in constant time before anything else, forged tokens never reach
+# the cache or the database. Valid sessions are cached in memory for a short
+# TTL, the sessions table is the source of truth (only sha256(session id) is
+# stored there). Successful password checks are remembered for a few minutes,
+# keyed by an HMAC of the credentials, so repeated logins skip Argon2 as long
+# as the stored hash has not changed.
+
+SESSION_TTL = timedelta(hours=12)
+SESSION_CACHE_TTL = 60          # seconds a validated session is trusted without the database
+SESSION_CACHE_SIZE = 100000
+CREDENTIAL_CACHE_TTL = 300      # seconds a verified password is remembered
+CREDENTIAL_CACHE_SIZE = 10000
+TOKEN_SECRET_NAME = "session_token_key"
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after at most `ttl` seconds.
+
+    Entries are evicted from the front (oldest first) when they expired or the
+    cache is full. An entry put with a shorter TTL may linger until it reaches
+    the front, get() never returns it once expired.
+    """
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._items[key]
+                return None
+            return item[1]
+
+    def put(self, key, value, ttl=None):
+        now = time.monotonic()
+        expires_at = now + min(self.ttl, ttl) if ttl is not None else now + self.ttl
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (expires_at, value)
+            while self._items:
+                oldest_key, (oldest_expiry, _) = next(iter(self._items.items()))
+                if oldest_expiry >= now and len(self._items) <= self.max_size:
+                    break
+                del self._items[oldest_key]
+
+    def pop(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _token_hash(session_id):
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+class AuthService:
+    def __init__(self, session_ttl=SESSION_TTL, session_cache_ttl=SESSION_CACHE_TTL,
+                 credential_cache_ttl=CREDENTIAL_CACHE_TTL):
+        self.session_ttl = session_ttl
+        self._sessions = TTLCache(session_cache_ttl, SESSION_CACHE_SIZE)         # token hash -> (user_id, expires_at)
+        self._credentials = TTLCache(credential_cache_ttl, CREDENTIAL_CACHE_SIZE)  # credential digest -> (user_id, password_hash)
+        self._credential_key = secrets.token_bytes(32)  # per process, cached digests mean nothing elsewhere
+        self._token_key = None
+        self._lock = threading.Lock()
+        self._dummy_hash = None
+
+    def _get_token_key(self):
+        """The signing key is shared through host_secrets so every host process accepts the same tokens."""
+        with self._lock:
+            if self._token_key is None:
+                with get_psql_connection() as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute("""
+                            INSERT INTO host_secrets (name, value) VALUES (%s, %s)
+                            ON CONFLICT (name) DO NOTHING;
+                        """, (TOKEN_SECRET_NAME, secrets.token_bytes(32)))
+                        cursor.execute("SELECT value FROM host_secrets WHERE name = %s;", (TOKEN_SECRET_NAME,))
+                        self._token_key = bytes(cursor.fetchone()[0])
+            return self._token_key
+
+    def _sign(self, session_id):
+        return _b64(hmac.new(self._get_token_key(), session_id.encode(), hashlib.sha256).digest())
+
+    def _credential_digest(self, login, password):
+        return hmac.new(self._credential_key, f"{login}\0{password}".encode(), hashlib.sha256).digest()
+
+    def _get_dummy_hash(self):
+        # Unknown users still pay for one Argon2 verification, so response times do not reveal which logins exist
+        if self._dummy_hash is None:
+            self._dummy_hash = get_hashing_service().hash_password(secrets.token_urlsafe(16)).result()
+        return self._dummy_hash
+
+    def _verify_password(self, login, password, user_id, password_hash):
+        digest = self._credential_digest(login, password)
+        cached = self._credentials.get(digest)
+        if cached is not None and cached[0] == user_id and hmac.compare_digest(cached[1], password_hash):
+            return {"success": True, "rehash": None}
+
+        res = get_hashing_service().verify_password(password_hash, password).result()
+        if res["success"]:
+            self._credentials.put(digest, (user_id, res["rehash"] or password_hash))
+        return res
+
+    def login(self, login, password, user_agent=None):
+        """Checks a username or email and password, returns a new session token.
+
+        ERROR IDS:
+        ERR-AUTH-001: Invalid username, email or password.
+        ERR-AUTH-002: The account is not active.
+        """
+        login = login.strip().lower()
+        with get_psql_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, password_hash, is_active FROM users
+                    WHERE username = %s OR email = %s
+                    LIMIT 1;
+                """, (login, login))
+                user = cursor.fetchone()
+
+        if user is None or not user[1]:
+            get_hashing_service().verify_password(self._get_dummy_hash(), password).result()
+            return {"success": False, "error": "Invalid username, email or password.", "error_id": "ERR-AUTH-001"}
+
+        user_id, password_hash, is_active = user
+        res = self._verify_password(login, password, user_id, password_hash)
+        if not res["success"]:
+            return {"success": False, "error": "Invalid username, email or password.", "error_id": "ERR-AUTH-001"}
+        if not is_active:
+            return {"success": False, "error": "This account is not active.", "error_id": "ERR-AUTH-002"}
+
+        session_id = secrets.token_urlsafe(32)
+        token_hash = _token_hash(session_id)
+        expires_at = datetime.now() + self.session_ttl
+        with get_psql_connection(autocommit=False) as conn:
+            with conn.cursor() as cursor:
+                if res["rehash"]:
+                    # Upgrade the hash to the current profile, unless it was changed in the meantime
+                    cursor.execute("""
+                        UPDATE users SET password_hash = %s, updated_at = CURRENT_TIMESTAMP
+                        WHERE id = %s AND password_hash = %s;
+                    """, (res["rehash"], user_id, password_hash))
+                cursor.execute("""
+                    INSERT INTO sessions (token_hash, user_id, expires_at, user_agent)
+                    VALUES (%s, %s, %s, %s);
+                """, (token_hash, user_id, expires_at, user_agent))
+
+        self._sessions.put(token_hash, (user_id, expires_at))
+        return {"success": True, "token": f"{session_id}.{self._sign(session_id)}", "user_id": user_id,
+                "expires_at": expires_at}
+
+    def _parse_token(self, token):
+        """Returns the session id of a correctly signed token, None otherwise."""
+        session_id, _, signature = (token or "").partition(".")
+        if not session_id or not signature:
+            return None
+        if not hmac.compare_digest(signature.encode(), self._sign(session_id).encode()):
+            return None
+        return session_id
+
+    def validate(self, token):
+        """Returns the user id of a valid session, None when the token is forged, expired or revoked."""
+        session_id = self._parse_token(token)
+        if session_id is None:
+            return None
+        token_hash = _token_hash(session_id)
+
+        cached = self._sessions.get(token_hash)
+        if cached is None:
+            with get_psql_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT s.user_id, s.expires_at FROM sessions s
+                        JOIN users u ON u.id = s.user_id
+                        WHERE s.token_hash = %s AND u.is_active;
+                    """, (token_hash,))
+                    cached = cursor.fetchone()
+            if cached is None:
+                return None
+            remaining = (cached[1] - datetime.now()).total_seconds()
+            if remaining > 0:
+                self._sessions.put(token_hash, tuple(cached), ttl=remaining)
+
+        user_id, expires_at = cached
+        if expires_at <= datetime.now():
+            self._sessions.pop(token_hash)
+            return None
+        return user_id
+
+    def logout(self, token):
+        session_id = self._parse_token(token)
+        if session_id is None:
+            return False
+        token_hash = _token_hash(session_id)
+        self._sessions.pop(token_hash)
+        with get_psql_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM sessions WHERE token_hash = %s;", (token_hash,))
+                return cursor.rowcount > 0
+
+    def revoke_user_sessions(self, user_id):
+        """Ends every session of a user. Other host processes notice within SESSION_CACHE_TTL."""
+        with get_psql_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM sessions WHERE user_id = %s RETURNING token_hash;", (user_id,))
+                for (token_hash,) in cursor.fetchall():
+                    self._sessions.pop(token_hash)
+                return cursor.rowcount
+
+    def purge_expired_sessions(self):
+        with get_psql_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM sessions WHERE expires_at < CURRENT_TIMESTAMP;")
+                return cursor.rowcount
+
+_AUTH_SERVICE = None
+_AUTH_SERVICE_LOCK = threading.Lock()
+
+def get_auth_service():
+    """Returns the process wide authentication service."""
+    global _AUTH_SERVICE
+    with _AUTH_SERVICE_LOCK:
+        if _AUTH_SERVICE is None:
+            _AUTH_SERVICE = AuthService()
+        return _AUTH_SERVICE
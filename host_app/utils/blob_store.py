@@ -0,0 +1,154 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import uuid
+import shutil
+import hashlib
+from pathlib import Path
+from .auth import get_data_storage_path
+
+# Content addressed store for image files under data_storage_path:
+#
+#   <data_storage_path>/objects/ab/cd/abcd1234...   (sha256 of the file content)
+#
+# Identical files are stored once no matter how many projects, datasets or
+# releases use them, the images table only keeps the hash. Objects are written
+# to objects/.tmp first and then renamed, so readers never see partial files.
+
+OBJECTS_DIR_NAME = "objects"
+TMP_DIR_NAME = ".tmp"  # hidden, skipped by the Google Drive backup
+HASH_BLOCK_SIZE = 1024 * 1024
+
+def hash_file(path):
+    """Returns the sha256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects_dir = self.root / OBJECTS_DIR_NAME
+        self.tmp_dir = self.objects_dir / TMP_DIR_NAME
+
+    def initialize(self):
+        """Creates the store layout, safe to call on an existing store."""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def path_for(self, content_hash):
+        """Two levels of fan-out (65536 directories) keep directory sizes small."""
+        if len(content_hash) != 64:
+            raise ValueError(f"Invalid content hash '{content_hash}'")
+        return self.objects_dir / content_hash[:2] / content_hash[2:4] / content_hash
+
+    def exists(self, content_hash):
+        return self.path_for(content_hash).exists()
+
+    def _commit(self, tmp_path, content_hash):
+        """Atomically moves a fully written temporary file into place."""
+        target = self.path_for(content_hash)
+        if target.exists():
+            os.remove(tmp_path)  # Another writer stored the same content first
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+        return True
+
+    def _tmp_path(self):
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        return self.tmp_dir / uuid.uuid4().hex
+
+    def put_file(self, src_path, content_hash=None):
+        """Stores a file and returns {"hash", "size", "stored"}.
+
+        The file is hashed before anything is written, a duplicate therefore
+        costs one read and no writes. Pass content_hash when it is already known.
+        """
+        content_hash = content_hash or hash_file(src_path)
+        size = os.path.getsize(src_path)
+        if self.exists(content_hash):
+            return {"hash": content_hash, "size": size, "stored": False}
+
+        tmp_path = self._tmp_path()
+        try:
+            with open(src_path, "rb") as src, open(tmp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, HASH_BLOCK_SIZE)
+                dst.flush()
+                os.fsync(dst.fileno())
+            stored = self._commit(tmp_path, content_hash)
+        except BaseException:
+            if tmp_path.exists():
+                os.remove(tmp_path)
+            raise
+        return {"hash": content_hash, "size": size, "stored": stored}
+
+    def put_bytes(self, data):
+        """Stores in-memory content and returns {"hash", "size", "stored"}."""
+        content_hash = hashlib.sha256(data).hexdigest()
+        if self.exists(content_hash):
+            return {"hash": content_hash, "size": len(data), "stored": False}
+
+        tmp_path = self._tmp_path()
+        try:
+            with open(tmp_path, "wb") as dst:
+                dst.write(data)
+                dst.flush()
+                os.fsync(dst.fileno())
+            stored = self._commit(tmp_path, content_hash)
+        except BaseException:
+            if tmp_path.exists():
+                os.remove(tmp_path)
+            raise
+        return {"hash": content_hash, "size": len(data), "stored": stored}
+
+    def open(self, content_hash):
+        return open(self.path_for(content_hash), "rb")
+
+    def remove(self, content_hash):
+        """Deletes an object. Only call once no images row references it."""
+        try:
+            os.remove(self.path_for(content_hash))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def verify(self, content_hash):
+        """Re-hashes an object and checks it still matches its key."""
+        return hash_file(self.path_for(content_hash)) == content_hash
+
+    def iter_hashes(self):
+        for first in os.scandir(self.objects_dir):
+            if not first.is_dir() or first.name == TMP_DIR_NAME:
+                continue
+            for second in os.scandir(first.path):
+                if second.is_dir():
+                    for entry in os.scandir(second.path):
+                        if entry.is_file():
+                            yield entry.name
+
+def get_blob_store():
+    """Returns the store under the data_storage_path chosen during setup."""
+    return BlobStore(get_data_storage_path()).initialize()
@@ -20,127 +20,98 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import csv
 import psycopg2
 from psycopg2 import sql, OperationalError
-from argon2 import PasswordHasher
+from psycopg2.extras import execute_values
+from .db_pool import get_pool, PoolError
+from .auth import get_setup_config
+from .hashing import get_hashing_service
 
-pass_hash = PasswordHasher()
+ODDM_DB_NAME = "oddm_toolkit_db"
+ODDM_DB_USER = "oddm_admin"
+BULK_PAGE_SIZE = 1000  # rows per statement sent by execute_values
+USERNAME_MAX_LENGTH = 50   # users.username VARCHAR(50)
+EMAIL_MAX_LENGTH = 100     # users.email VARCHAR(100)
 
-# Global variable to store connection
-PSQL_DB_CONNECTION = None
+# Pool of the role/database selected by the last successful connect_to_psql_db call
+PSQL_DB_POOL = None
 
-def connect_to_psql_db(password: str, host="localhost", user="postgres", db_name="postgres"):
-    """Establishes a connection to the PostgreSQL database."""
-    global PSQL_DB_CONNECTION
+def connect_to_psql_db(password: str, host="localhost", user="postgres", db_name="postgres", **pool_kwargs):
+    """Selects (and creates on first use) the connection pool for the given role and database.
+
+    pool_kwargs (minconn, maxconn, ...) only apply when the pool is created.
+    """
+    global PSQL_DB_POOL
     try:
-        PSQL_DB_CONNECTION = psycopg2.connect(
-            dbname=db_name,
-            user=user,
-            password=password,
-            host=host
-        )
+        PSQL_DB_POOL = get_pool(password, host=host, user=user, db_name=db_name, **pool_kwargs)
         return True  # Connection successful
-    except OperationalError as e:
+    except (OperationalError, PoolError) as e:
         print(f"Database connection failed: {e}")
         return False  # Connection failed
 
-def get_psql_connection():
-    """Returns the established database connection."""
-    return PSQL_DB_CONNECTION
+def get_psql_connection(autocommit=True):
+    """Borrows a connection from the active pool. Use as `with get_psql_connection() as conn:`."""
+    if PSQL_DB_POOL is None:
+        raise PoolError("No active database pool. Call connect_to_psql_db first.")
+    return PSQL_DB_POOL.connection(autocommit=autocommit)
 
-def check_if_admin_exists_in_oddm_db(password: str):
-    db_name = "oddm_toolkit_db"
+def open_dedicated_psql_connection(autocommit=True):
+    """Opens a long lived connection outside the pool, with the credentials of the active pool."""
+    if PSQL_DB_POOL is None:
+        raise PoolError("No active database pool. Call connect_to_psql_db first.")
+    return PSQL_DB_POOL.connect_dedicated(autocommit=autocommit)
 
-    # Checking if the database exists
-    global PSQL_DB_CONNECTION
+def connect_to_oddm_toolkit_db(**pool_kwargs):
+    """Selects the pool for the ODDM Toolkit database using the credentials saved during setup."""
+    try:
+        config = get_setup_config()
+    except FileNotFoundError as e:
+        print(e)
+        return False
+
+    return connect_to_psql_db(config.oddm_db_password, user=config.oddm_db_user, db_name=config.oddm_db_name,
+                              **pool_kwargs)
 
-    conn = PSQL_DB_CONNECTION
-    conn.autocommit = True
-    cursor = conn.cursor()
+def check_if_admin_exists_in_oddm_db(password: str):
+    db_name = ODDM_DB_NAME
 
     # Check if the database exists
-    cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s;", (db_name,))
-    db_exists = cursor.fetchone() is not None
-    
-    cursor.close()
-    conn.close()
-    PSQL_DB_CONNECTION = None  # Reset the connection
-    connect_to_psql_db(password)  # Reconnect to the default database
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s;", (db_name,))
+            db_exists = cursor.fetchone() is not None
 
     if not db_exists:
         print(f"Database '{db_name}' does not exist.")
         return False  # Database does not exist
 
     try:
-        conn = psycopg2.connect(
-            dbname=db_name,
-            user="postgres",
-            password=password,
-            host="localhost"
-        )
-    except OperationalError as e:
+        oddm_db_pool = get_pool(password, db_name=db_name)
+    except (OperationalError, PoolError) as e:
         print(f"Database connection failed: {e}")
         return False  # Connection failed
 
-    conn.autocommit = True
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT EXISTS (
-            SELECT 1 FROM information_schema.tables 
-            WHERE table_name = 'users'
-        );
-    """)
-    table_exists = cursor.fetchone()[0]
-
-    if table_exists:
-        cursor.execute("SELECT id FROM users WHERE is_admin = TRUE;")
-        admin_exists = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        if admin_exists:
-            return True
-        else:
-            return False
+    with oddm_db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT EXISTS (
+                    SELECT 1 FROM information_schema.tables 
+                    WHERE table_name = 'users'
+                );
+            """)
+            table_exists = cursor.fetchone()[0]
 
-def create_users_table():
-    global PSQL_DB_CONNECTION
+            if not table_exists:
+                return False
 
-    conn = PSQL_DB_CONNECTION
-    conn.autocommit = True
-    cursor = conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE is_admin = TRUE;")
+            admin_exists = cursor.fetchone()
 
-    # Check if table exists
-    cursor.execute("""
-        SELECT EXISTS (
-            SELECT 1 FROM information_schema.tables 
-            WHERE table_name = 'users'
-        );
-    """)
-    exists = cursor.fetchone()[0]
-
-    if not exists:
-        # Create the users table
-        create_table_query = """
-            CREATE TABLE users (
-                id SERIAL PRIMARY KEY,
-                username VARCHAR(50) UNIQUE,  -- Unique, nullable until registration completes
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password_hash VARCHAR(255),   -- Nullable until user sets a password
-                is_admin BOOLEAN DEFAULT FALSE,
-                is_active BOOLEAN DEFAULT FALSE,  -- Becomes TRUE after registration
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """
-        cursor.execute(create_table_query)
-        conn.commit()
-        print("Table 'users' created successfully!")
+    if admin_exists:
+        return True
     else:
-        print("Table 'users' already exists.")
-
-    # Close connection
-    cursor.close()
+        return False
 
 def insert_user_details(username, email, password_hash=None, is_admin=False, is_active=False):
     """Inserts user details into the database.
@@ -149,135 +120,464 @@ def insert_user_details(username, email, password_hash=None, is_admin=False, is_
     ERR-USR-002: Username is already in use.
     ERR-USR-003: Email is already in use.
     """
-    
-    global PSQL_DB_CONNECTION
-    conn = PSQL_DB_CONNECTION
-    conn.autocommit = True
-    cursor = conn.cursor()
 
     username = username.lower()
     email = email.lower()
 
-    # Check if username already exists
-    cursor.execute("SELECT id FROM users WHERE username = %s;", (username,))
-    existing_username = cursor.fetchone()
+    # Start hashing right away so Argon2 overlaps with the duplicate checks
+    hash_future = get_hashing_service().hash_password(password_hash) if password_hash is not None else None
+
+    with get_psql_connection() as conn:
+        cursor = conn.cursor()
+
+        # Check if username already exists
+        cursor.execute("SELECT id FROM users WHERE username = %s;", (username,))
+        existing_username = cursor.fetchone()
+
+        # Check if email already exists
+        cursor.execute("SELECT id FROM users WHERE email = %s;", (email,))
+        existing_email = cursor.fetchone()
 
-    # Check if email already exists
-    cursor.execute("SELECT id FROM users WHERE email = %s;", (email,))
-    existing_email = cursor.fetchone()
+        if (existing_username or existing_email) and hash_future is not None:
+            hash_future.cancel()  # The hash will not be used
 
-     # Return appropriate error messages
-    if existing_username and existing_email:
+        # Return appropriate error messages
+        if existing_username and existing_email:
+            cursor.close()
+            return {"success": False, "error": "Username and Email are already in use.", "error_id": "ERR-USR-001"}
+        elif existing_username:
+            cursor.close()
+            return {"success": False, "error": "Username is already in use.", "error_id": "ERR-USR-002"}
+        elif existing_email:
+            cursor.close()
+            return {"success": False, "error": "Email is already in use.", "error_id": "ERR-USR-003"}
+
+        if hash_future is not None:
+            hashed_password = hash_future.result()
+        else:
+            hashed_password = ""  # Empty password for users who will set it later
+            is_active = False     # Force inactive if no password is provided
+
+        query = sql.SQL("""
+                INSERT INTO users (username, email, password_hash, is_admin, is_active)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id;
+            """)
+
+        cursor.execute(query, (username, email, hashed_password, is_admin, is_active))
+        ret_id = cursor.fetchone()[0]
         cursor.close()
+
+    return {"success": True, "id": ret_id}
+
+def _copy_value(value):
+    """Formats a python value for COPY's text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+class _CopyRowStream:
+    """File-like object that formats rows for COPY as psycopg2 reads them.
+
+    Rows are pulled from the iterator one buffer at a time, so COPYing millions
+    of rows never holds more than a few kilobytes of text in memory.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._pending = ""
+
+    def read(self, size=-1):
+        parts = [self._pending]
+        length = len(self._pending)
+        for row in self._rows:
+            line = "\t".join(_copy_value(value) for value in row) + "\n"
+            parts.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+
+        data = "".join(parts)
+        if 0 <= size < len(data):
+            data, self._pending = data[:size], data[size:]
+        else:
+            self._pending = ""
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+def copy_rows(cursor, table, columns, rows):
+    """Streams rows (an iterable of tuples) into `table` with COPY ... FROM STDIN."""
+    copy_query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(sql.Identifier(column) for column in columns)
+    )
+    cursor.copy_expert(copy_query.as_string(cursor), _CopyRowStream(rows))
+
+def _identifiers(columns):
+    return sql.SQL(", ").join(sql.Identifier(column) for column in columns)
+
+def bulk_upsert(cursor, table, columns, rows, conflict_columns, update_columns=None, version_column=None,
+                timestamp_columns=(), returning=()):
+    """INSERT ... ON CONFLICT DO UPDATE of many rows with execute_values.
+
+    update_columns default to every column outside conflict_columns,
+    timestamp_columns are set to CURRENT_TIMESTAMP on update. With a
+    version_column each row carries the version it should end up with (base
+    version + 1), an existing row is only updated while it is still at the
+    base version. Rows skipped that way are missing from the returned rows.
+    A key may only appear once per call.
+    Returns the `returning` columns of the written rows.
+    """
+    if update_columns is None:
+        update_columns = [column for column in columns if column not in conflict_columns]
+    assignments = [sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column)) for column in update_columns]
+    assignments += [sql.SQL("{} = CURRENT_TIMESTAMP").format(sql.Identifier(column)) for column in timestamp_columns]
+
+    query = sql.SQL("INSERT INTO {} AS t ({}) VALUES %s ON CONFLICT ({}) DO UPDATE SET {}").format(
+        sql.Identifier(table), _identifiers(columns), _identifiers(conflict_columns), sql.SQL(", ").join(assignments)
+    )
+    if version_column is not None:
+        query += sql.SQL(" WHERE t.{0} + 1 = EXCLUDED.{0}").format(sql.Identifier(version_column))
+    if returning:
+        query += sql.SQL(" RETURNING {}").format(_identifiers(returning))
+
+    rows = list(rows)
+    if not rows:
+        return []
+    written = execute_values(cursor, query.as_string(cursor), rows, page_size=BULK_PAGE_SIZE, fetch=bool(returning))
+    return written or []
+
+def bulk_delete(cursor, table, key_columns, keys, version_column=None, returning=()):
+    """Deletes many rows, given as tuples of key_columns values (plus the expected version with a version_column).
+
+    Rows whose version changed are kept. Returns the `returning` columns of the deleted rows.
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+    match_columns = list(key_columns) + ([version_column] if version_column is not None else [])
+    query = sql.SQL("DELETE FROM {} AS t USING (VALUES %s) AS d ({}) WHERE {}").format(
+        sql.Identifier(table), _identifiers(match_columns),
+        sql.SQL(" AND ").join(sql.SQL("t.{0} = d.{0}").format(sql.Identifier(column)) for column in match_columns)
+    )
+    if returning:
+        query += sql.SQL(" RETURNING {}").format(
+            sql.SQL(", ").join(sql.SQL("t.{}").format(sql.Identifier(column)) for column in returning))
+    deleted = execute_values(cursor, query.as_string(cursor), keys, page_size=BULK_PAGE_SIZE, fetch=bool(returning))
+    return deleted or []
+
+def _user_conflict_result(username_taken, email_taken):
+    if username_taken and email_taken:
         return {"success": False, "error": "Username and Email are already in use.", "error_id": "ERR-USR-001"}
-    elif existing_username:
-        cursor.close()
+    elif username_taken:
         return {"success": False, "error": "Username is already in use.", "error_id": "ERR-USR-002"}
-    elif existing_email:
-        cursor.close()
+    else:
         return {"success": False, "error": "Email is already in use.", "error_id": "ERR-USR-003"}
 
-    if password_hash is not None:
-        hashed_password = pass_hash.hash(password_hash)
-    else:
-        hashed_password = ""  # Empty password for users who will set it later
-        is_active = False     # Force inactive if no password is provided
+def _create_users_staging(cursor, rows):
+    """Copies (row_no, username, email, is_admin, is_active, password_hash) rows into a temp table."""
+    cursor.execute("""
+        CREATE TEMP TABLE users_staging (
+            row_no INTEGER PRIMARY KEY,
+            username VARCHAR(50),
+            email VARCHAR(100),
+            is_admin BOOLEAN,
+            is_active BOOLEAN,
+            password_hash VARCHAR(255)
+        ) ON COMMIT DROP;
+    """)
+    copy_rows(cursor, "users_staging", ("row_no", "username", "email", "is_admin", "is_active", "password_hash"), rows)
 
-    query = sql.SQL("""
-            INSERT INTO users (username, email, password_hash, is_admin, is_active)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id;
+def bulk_insert_users(users):
+    """Inserts many users at once.
+
+    `users` is an iterable of dicts with the keys username, email and optionally
+    password, is_admin and is_active (same meaning as insert_user_details).
+    Returns one result dict per input row, in input order, using the same
+    format and error ids as insert_user_details. Within a batch the first
+    occurrence of a username or email wins.
+    ERROR IDS:
+    ERR-USR-001: Username and Email are already in use.
+    ERR-USR-002: Username is already in use.
+    ERR-USR-003: Email is already in use.
+    ERR-USR-004: Username and Email are required.
+    ERR-USR-005: Username is too long.
+    ERR-USR-006: Email is too long.
+    """
+
+    results = []
+    staged_rows = []
+    passwords = {}
+
+    for row_no, user in enumerate(users):
+        username = (user.get("username") or "").strip().lower()
+        email = (user.get("email") or "").strip().lower()
+        if not username or not email:
+            results.append({"success": False, "error": "Username and Email are required.", "error_id": "ERR-USR-004"})
+            continue
+        # Checked here, one value too long for its column would fail the COPY of the whole batch
+        if len(username) > USERNAME_MAX_LENGTH:
+            results.append({"success": False, "error": f"Username must be at most {USERNAME_MAX_LENGTH} characters.", "error_id": "ERR-USR-005"})
+            continue
+        if len(email) > EMAIL_MAX_LENGTH:
+            results.append({"success": False, "error": f"Email must be at most {EMAIL_MAX_LENGTH} characters.", "error_id": "ERR-USR-006"})
+            continue
+
+        password = user.get("password")
+        is_active = bool(user.get("is_active", False))
+        if password is None:
+            is_active = False  # Force inactive if no password is provided
+        else:
+            passwords[row_no] = password
+
+        results.append(None)
+        staged_rows.append((row_no, username, email, bool(user.get("is_admin", False)), is_active))
+
+    if not staged_rows:
+        return results
+
+    # One set-based pass for conflicts against existing users and within the batch
+    with get_psql_connection(autocommit=False) as conn:
+        cursor = conn.cursor()
+        _create_users_staging(cursor, (row + (None,) for row in staged_rows))
+        cursor.execute("""
+            SELECT row_no, username_taken, email_taken FROM (
+                SELECT s.row_no,
+                       EXISTS (SELECT 1 FROM users u WHERE u.username = s.username)
+                           OR ROW_NUMBER() OVER (PARTITION BY s.username ORDER BY s.row_no) > 1 AS username_taken,
+                       EXISTS (SELECT 1 FROM users u WHERE u.email = s.email)
+                           OR ROW_NUMBER() OVER (PARTITION BY s.email ORDER BY s.row_no) > 1 AS email_taken
+                FROM users_staging s
+            ) conflicts
+            WHERE username_taken OR email_taken;
         """)
+        rejected = set()
+        for row_no, username_taken, email_taken in cursor.fetchall():
+            results[row_no] = _user_conflict_result(username_taken, email_taken)
+            rejected.add(row_no)
+        cursor.close()
 
-    cursor.execute(query, (username, email, hashed_password, is_admin, is_active))
-    ret_id = cursor.fetchone()[0]
-    cursor.close()
+    accepted = [row for row in staged_rows if row[0] not in rejected]
+    if not accepted:
+        return results
 
-    return {"success": True, "id": ret_id}
+    # Only hash passwords of rows that will actually be inserted, this is the expensive part.
+    # No connection is held while Argon2 runs.
+    to_hash = [row[0] for row in accepted if row[0] in passwords]
+    hashes = dict(zip(to_hash, get_hashing_service().hash_many([passwords[row_no] for row_no in to_hash], profile="bulk")))
 
-def setup_oddm_toolkit_db(oddm_password, Admin_psql_password, superuser_email, superuser_name, superuser_password):
-    """Sets up the ODDM Toolkit database.
-    EERROR IDS:
-    ERR-ODDM-STUP-001: ODDM Toolkit database already exists. Invalid password provided.
-    ERR-ODDM-STUP-002: ODDM Toolkit user already exists, but the provided password is incorrect.
-    """
+    with get_psql_connection(autocommit=False) as conn:
+        cursor = conn.cursor()
+        # Empty password for users who will set it later
+        _create_users_staging(cursor, (row + (hashes.get(row[0], ""),) for row in accepted))
+        cursor.execute("""
+            INSERT INTO users (username, email, password_hash, is_admin, is_active)
+            SELECT username, email, password_hash, is_admin, is_active
+            FROM users_staging
+            ORDER BY row_no
+            ON CONFLICT DO NOTHING
+            RETURNING id, username;
+        """)
+        row_no_by_username = {row[1]: row[0] for row in accepted}
+        inserted = set()
+        for user_id, username in cursor.fetchall():
+            results[row_no_by_username[username]] = {"success": True, "id": user_id}
+            inserted.add(row_no_by_username[username])
+
+        # Rows that passed the conflict check but lost a race with a concurrent insert
+        lost = [row[0] for row in accepted if row[0] not in inserted]
+        if lost:
+            cursor.execute("""
+                SELECT s.row_no,
+                       EXISTS (SELECT 1 FROM users u WHERE u.username = s.username),
+                       EXISTS (SELECT 1 FROM users u WHERE u.email = s.email)
+                FROM users_staging s
+                WHERE s.row_no = ANY(%s);
+            """, (lost,))
+            for row_no, username_taken, email_taken in cursor.fetchall():
+                results[row_no] = _user_conflict_result(username_taken, email_taken)
 
-    global PSQL_DB_CONNECTION
+        cursor.close()
+
+    return results
+
+def import_users_from_csv(csv_path):
+    """Creates users from a CSV file with the columns username, email and
+    optionally password, is_admin, is_active."""
 
-    db_name = "oddm_toolkit_db"
-    db_user = "oddm_admin"
+    truthy = {"1", "true", "yes", "y", "t"}
 
-    conn = PSQL_DB_CONNECTION
-    conn.autocommit = True
-    cursor = conn.cursor()
+    try:
+        with open(csv_path, "r", newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            columns = {column.strip().lower() for column in (reader.fieldnames or [])}
+            missing_columns = {"username", "email"} - columns
+            if missing_columns:
+                return {"success": False, "error": "CSV file is missing required columns: " + ", ".join(sorted(missing_columns))}
+
+            users = []
+            for row in reader:
+                row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+                users.append({
+                    "username": row.get("username"),
+                    "email": row.get("email"),
+                    "password": row.get("password") or None,
+                    "is_admin": row.get("is_admin", "").lower() in truthy,
+                    "is_active": row.get("is_active", "true").lower() in truthy,
+                })
+    except (OSError, csv.Error, UnicodeDecodeError) as e:
+        return {"success": False, "error": f"Failed to read CSV file: {e}"}
+
+    results = bulk_insert_users(users)
+    inserted = sum(1 for res in results if res["success"])
+
+    return {"success": True, "results": results, "inserted": inserted, "failed": len(results) - inserted}
+
+def create_setup_context(oddm_password, Admin_psql_password, superuser_email, superuser_name, superuser_password):
+    """Builds the state shared by the setup steps."""
+    return {
+        "db_name": ODDM_DB_NAME,
+        "db_user": ODDM_DB_USER,
+        "oddm_password": oddm_password,
+        "admin_password": Admin_psql_password,
+        "superuser_email": superuser_email,
+        "superuser_name": superuser_name,
+        "superuser_password": superuser_password,
+    }
 
+# Each setup step takes the setup context and returns None on success or an
+# error dict. Steps are idempotent so a failed setup can be resumed from the
+# step that failed.
+def _setup_create_database(context):
     # Step 1: Create the ODDM Toolkit database (if it doesn’t exist)
-    cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s;", (db_name,))
-    exists = cursor.fetchone()
-    if not exists:  # If database does not exist, create it
-        cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(db_name)))
+    with get_pool(context["admin_password"]).connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s;", (context["db_name"],))
+        exists = cursor.fetchone()
+        if not exists:  # If database does not exist, create it
+            cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(context["db_name"])))
+        cursor.close()
 
+def _setup_create_oddm_user(context):
     # Step 2: Create the user `oddm_admin`
-    cursor.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", (db_user,))
-    user_exists = cursor.fetchone()
-    if not user_exists: 
-        cursor.execute(sql.SQL("CREATE USER {} WITH PASSWORD %s").format(sql.Identifier(db_user)), [oddm_password])
-    else:
-        # user exists. checking if password is correct
+    db_user = context["db_user"]
+    with get_pool(context["admin_password"]).connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", (db_user,))
+        user_exists = cursor.fetchone()
+        if not user_exists:
+            cursor.execute(sql.SQL("CREATE USER {} WITH PASSWORD %s").format(sql.Identifier(db_user)), [context["oddm_password"]])
+        cursor.close()
+
+    if user_exists:
+        # user exists. checking if password is correct. This is a one-off
+        # credential check, the connection is not worth keeping in a pool.
         try:
             test_conn = psycopg2.connect(
                 dbname="postgres",
                 user=db_user,
-                password=oddm_password,
-                host="localhost"
+                password=context["oddm_password"],
+                host="localhost",
+                connect_timeout=10
             )
             test_conn.close()  # If successful, close test connection
         except OperationalError:
             return { "success": False, "error": "ODDM Toolkit user already exists, but the provided password is incorrect.", "error_id": "ERR-ODDM-STUP-002" }
 
+def _setup_grant_database_privileges(context):
     # Step 3: Grant all privileges to `oddm_admin` on the new database
-    cursor.execute(sql.SQL("GRANT ALL PRIVILEGES ON DATABASE {} TO {}").format(sql.Identifier(db_name), sql.Identifier(db_user)))
-
-    cursor.close()
-    conn.close()
-    PSQL_DB_CONNECTION = None  # Reset the connection
-
-    # Step 4: Connect to the new database
-    connect_to_psql_db(Admin_psql_password, db_name=db_name)  # Reconnect to the new database with the Admin password
-    conn = PSQL_DB_CONNECTION
-    conn.autocommit = True
-    cursor = conn.cursor()
-
-    # Step 5: Grant privileges on schema
-    cursor.execute(sql.SQL("GRANT ALL PRIVILEGES ON SCHEMA public TO {}").format(sql.Identifier(db_user)))
-    
-    # Step 6: Make the user the owner of the schema (important)
-    cursor.execute(sql.SQL("ALTER SCHEMA public OWNER TO {}").format(sql.Identifier(db_user)))
-    
-    cursor.close()
-    conn.close()
-    PSQL_DB_CONNECTION = None  # Reset the connection
+    with get_pool(context["admin_password"]).connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql.SQL("GRANT ALL PRIVILEGES ON DATABASE {} TO {}").format(sql.Identifier(context["db_name"]), sql.Identifier(context["db_user"])))
+        cursor.close()
+
+def _setup_grant_schema_privileges(context):
+    # Step 4: Connect to the new database with the Admin password
+    with get_pool(context["admin_password"], db_name=context["db_name"]).connection() as conn:
+        cursor = conn.cursor()
 
+        # Step 5: Grant privileges on schema
+        cursor.execute(sql.SQL("GRANT ALL PRIVILEGES ON SCHEMA public TO {}").format(sql.Identifier(context["db_user"])))
+
+        # Step 6: Make the user the owner of the schema (important)
+        cursor.execute(sql.SQL("ALTER SCHEMA public OWNER TO {}").format(sql.Identifier(context["db_user"])))
+
+        cursor.close()
+
+def _setup_connect_oddm_user(context):
     # Step 7: Connect to the new database with the new user
-    oddm_db_connect_res = connect_to_psql_db(oddm_password, user=db_user, db_name=db_name)
-    if not oddm_db_connect_res and exists:
-        # Reconnecting to default database
-        connect_to_psql_db(Admin_psql_password)
+    if not connect_to_psql_db(context["oddm_password"], user=context["db_user"], db_name=context["db_name"]):
+        # Switching back to the default database
+        connect_to_psql_db(context["admin_password"])
         return {"success": False, "error": "ODDM Toolkit database already exists. Invalid password provided.", "error_id": "ERR-ODDM-STUP-001"}
 
-    create_users_table()  # Create the users table
+def _setup_apply_migrations(context):
+    # Imported here, the migrations module depends on this one
+    from .migrations import migrate
 
+    res = migrate()  # Create or upgrade the tables
+    if not res["success"]:
+        return res
+
+def _setup_create_admin_user(context):
     # add admin user
-    res = insert_user_details(superuser_name, superuser_email, superuser_password, is_admin=True, is_active=True)
+    res = insert_user_details(context["superuser_name"], context["superuser_email"], context["superuser_password"], is_admin=True, is_active=True)
     if not res["success"]:
         return res
 
-    PSQL_DB_CONNECTION.close()  # Close the connection
-    
+SETUP_STEPS = [
+    ("Creating the ODDM Toolkit database", _setup_create_database),
+    ("Creating the ODDM Toolkit user", _setup_create_oddm_user),
+    ("Granting database privileges", _setup_grant_database_privileges),
+    ("Granting schema privileges", _setup_grant_schema_privileges),
+    ("Connecting as the ODDM Toolkit user", _setup_connect_oddm_user),
+    ("Applying database migrations", _setup_apply_migrations),
+    ("Creating the admin user", _setup_create_admin_user),
+]
+
+def run_setup_steps(context, start_step=0, progress_callback=None, cancel_event=None):
+    """Runs SETUP_STEPS from `start_step` on.
+
+    progress_callback(step_index, step_count, description) is called before each
+    step. When a step fails, or `cancel_event` is set between two steps, the
+    returned error dict carries "failed_step" so the setup can be resumed there.
+    EERROR IDS:
+    ERR-ODDM-STUP-003: ODDM Toolkit setup was cancelled.
+    """
+
+    step_count = len(SETUP_STEPS)
+    for step_index in range(start_step, step_count):
+        description, step = SETUP_STEPS[step_index]
+
+        if cancel_event is not None and cancel_event.is_set():
+            return {"success": False, "error": "ODDM Toolkit setup was cancelled.", "error_id": "ERR-ODDM-STUP-003", "failed_step": step_index}
+
+        if progress_callback is not None:
+            progress_callback(step_index, step_count, description)
+
+        res = step(context)
+        if res is not None and not res["success"]:
+            res["failed_step"] = step_index
+            return res
+
     user_credentials = {
-        "oddm_db_name": db_name,
-        "oddm_db_user": db_user,
-        "oddm_db_password": oddm_password
+        "oddm_db_name": context["db_name"],
+        "oddm_db_user": context["db_user"],
+        "oddm_db_password": context["oddm_password"]
     }
 
-    return {"success": True, "credentials": user_credentials}
\ No newline at end of file
+    return {"success": True, "credentials": user_credentials}
+
+def setup_oddm_toolkit_db(oddm_password, Admin_psql_password, superuser_email, superuser_name, superuser_password):
+    """Sets up the ODDM Toolkit database.
+    EERROR IDS:
+    ERR-ODDM-STUP-001: ODDM Toolkit database already exists. Invalid password provided.
+    ERR-ODDM-STUP-002: ODDM Toolkit user already exists, but the provided password is incorrect.
+    """
+
+    context = create_setup_context(oddm_password, Admin_psql_password, superuser_email, superuser_name, superuser_password)
+    return run_setup_steps(context)
@@ -0,0 +1,280 @@
+# MIT License
+#
+# Copyright (c) 2025 Yahiya Mulla
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, OperationalError, InterfaceError
+
+# Default pool sizing, can be overridden per pool
+DEFAULT_MIN_CONNECTIONS = 1
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_BORROW_TIMEOUT = 30  # seconds to wait for a free connection
+DEFAULT_CONNECT_TIMEOUT = 10  # seconds before giving up on an unreachable server
+
+class PoolError(Exception):
+    """Raised when a connection cannot be borrowed from a pool."""
+
+class PsqlConnectionPool:
+    """Thread-safe pool of connections for a single (host, user, database) triple.
+
+    `minconn` connections are opened when the pool is created, more are opened
+    on demand up to `maxconn`. Returned connections stay open and idle, the
+    pool does not shrink back to `minconn`. Borrowers block (up to `timeout`
+    seconds) when the pool is exhausted instead of failing straight away.
+    """
+
+    def __init__(self, password, host="localhost", user="postgres", db_name="postgres",
+                 minconn=DEFAULT_MIN_CONNECTIONS, maxconn=DEFAULT_MAX_CONNECTIONS,
+                 health_check=True, timeout=DEFAULT_BORROW_TIMEOUT, **connect_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size: expected 0 <= minconn <= maxconn and maxconn >= 1")
+
+        self.host = host
+        self.user = user
+        self.db_name = db_name
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.health_check = health_check
+        self.timeout = timeout
+
+        self._password = password
+        self._connect_kwargs = connect_kwargs
+        self._connect_kwargs.setdefault("connect_timeout", DEFAULT_CONNECT_TIMEOUT)
+        self._idle = []          # connections ready to be borrowed (LIFO)
+        self._in_use = set()     # ids of connections currently borrowed
+        self._size = 0           # idle + in use + connections being opened
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        # Open the minimum number of connections up front. This also validates
+        # the credentials, OperationalError propagates to the caller.
+        for _ in range(minconn):
+            self._idle.append(self._open())
+            self._size += 1
+
+    @property
+    def key(self):
+        return (self.host, self.user, self.db_name)
+
+    def _open(self):
+        return psycopg2.connect(
+            dbname=self.db_name,
+            user=self.user,
+            password=self._password,
+            host=self.host,
+            **self._connect_kwargs
+        )
+
+    def _is_healthy(self, conn):
+        """Cheap liveness check run on borrow when health_check is enabled."""
+        if conn.closed:
+            return False
+        if not self.health_check:
+            return True
+        try:
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            previous_autocommit = conn.autocommit
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            conn.autocommit = previous_autocommit
+            return True
+        except (OperationalError, InterfaceError):
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def getconn(self, timeout=None):
+        """Borrows a connection, opening a new one if the pool is not full."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError(f"Connection pool {self.key} is closed.")
+                if self._idle:
+                    conn = self._idle.pop()
+                    reserved_new = False
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1  # reserve a slot, connect outside the lock
+                    conn = None
+                    reserved_new = True
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolError(f"Timed out waiting for a connection from pool {self.key}.")
+                self._cond.wait(remaining)
+
+        if reserved_new:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        elif not self._is_healthy(conn):
+            # Stale connection (server restart, idle timeout...). Replace it.
+            self._discard(conn)
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        with self._cond:
+            self._in_use.add(id(conn))
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Returns a borrowed connection to the pool."""
+        with self._cond:
+            if id(conn) not in self._in_use:
+                raise PoolError("Trying to return a connection that was not borrowed from this pool.")
+            self._in_use.discard(id(conn))
+
+        if not conn.closed and not close:
+            try:
+                # Never hand out a connection in the middle of a transaction
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                conn.autocommit = False
+            except (OperationalError, InterfaceError):
+                close = True
+
+        with self._cond:
+            keep = not (close or conn.closed or self._closed) and len(self._idle) < self.maxconn
+            if keep:
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+        if not keep:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self, autocommit=True, timeout=None):
+        """Context manager that borrows a connection and always returns it.
+
+        With autocommit disabled the transaction is committed when the block
+        exits normally and rolled back when it raises.
+        """
+        conn = self.getconn(timeout=timeout)
+        broken = False
+        try:
+            conn.autocommit = autocommit
+            yield conn
+            if not autocommit and not conn.closed:
+                conn.commit()
+        except (OperationalError, InterfaceError):
+            broken = True
+            raise
+        except Exception:
+            if not autocommit and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.putconn(conn, close=broken)
+
+    def connect_dedicated(self, autocommit=True):
+        """Opens a connection with the pool's credentials that is not managed by the pool.
+
+        For sessions that must stay open, like a LISTEN loop. The caller closes it.
+        """
+        conn = self._open()
+        conn.autocommit = autocommit
+        return conn
+
+    def stats(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "in_use": len(self._in_use),
+                    "minconn": self.minconn, "maxconn": self.maxconn}
+
+    def closeall(self):
+        """Closes idle connections and refuses further borrows."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+# One pool per (host, user, db_name). This keeps roles and databases isolated
+# from each other while letting every caller reuse already authenticated sockets.
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+def get_pool(password: str, host="localhost", user="postgres", db_name="postgres", **pool_kwargs):
+    """Returns the pool for the given role/database, creating it on first use.
+
+    If a pool already exists but was created with a different password it is
+    replaced, the old password is no longer valid for new connections anyway.
+    """
+    key = (host, user, db_name)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is not None and not pool._closed and pool._password == password:
+            return pool
+
+    # Opening connections can take a while, do it outside the registry lock
+    new_pool = PsqlConnectionPool(password, host=host, user=user, db_name=db_name, **pool_kwargs)
+
+    with _POOLS_LOCK:
+        existing = _POOLS.get(key)
+        if existing is not None and not existing._closed and existing._password == password:
+            # Another thread won the race, keep its pool
+            new_pool.closeall()
+            return existing
+        _POOLS[key] = new_pool
+
+    if existing is not None:
+        existing.closeall()
+    return new_pool
+
+def close_pool(host="localhost", user="postgres", db_name="postgres"):
+    """Closes and forgets the pool for the given role/database, if any."""
+    with _POOLS_LOCK:
+        pool = _POOLS.pop((host, user, db_name), None)
+    if pool is not None:
+        pool.closeall()
+
+def close_all_pools():
+    """Closes every pool. Call on application shutdown."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.closeall()
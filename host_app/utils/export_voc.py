@@ -0,0 +1,225 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import uuid
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import XMLGenerator
+from psycopg2.extras import execute_values
+from .database import get_psql_connection
+from .auth import get_export_dir
+
+EXPORT_FORMAT = "voc"
+# Images fetched from the server side cursor and handed to the process pool at once
+EXPORT_BATCH_SIZE = 2000
+
+# Per image content hash computed by the server, covering everything written to
+# the XML file (file name, size, class names and boxes). Only images whose hash
+# differs from the one stored in export_state are returned.
+_CHANGED_IMAGES_QUERY = """
+    WITH current AS (
+        SELECT i.id, i.file_name, i.width, i.height,
+               array_agg(pc.name ORDER BY a.id) FILTER (WHERE a.id IS NOT NULL) AS class_names,
+               array_agg(a.x_min ORDER BY a.id) FILTER (WHERE a.id IS NOT NULL) AS x_mins,
+               array_agg(a.y_min ORDER BY a.id) FILTER (WHERE a.id IS NOT NULL) AS y_mins,
+               array_agg(a.x_max ORDER BY a.id) FILTER (WHERE a.id IS NOT NULL) AS x_maxs,
+               array_agg(a.y_max ORDER BY a.id) FILTER (WHERE a.id IS NOT NULL) AS y_maxs,
+               md5(concat_ws(':', i.file_name, i.width, i.height,
+                   string_agg(concat_ws(',', pc.name, a.x_min, a.y_min, a.x_max, a.y_max), ';' ORDER BY a.id))) AS content_hash
+        FROM images i
+        LEFT JOIN annotations a ON a.project_id = i.project_id AND a.image_id = i.id
+        LEFT JOIN project_classes pc ON pc.project_id = a.project_id AND pc.class_id = a.class_id
+        WHERE i.project_id = %(project_id)s
+        GROUP BY i.id
+    )
+    SELECT c.id, c.file_name, c.width, c.height, c.class_names, c.x_mins, c.y_mins, c.x_maxs, c.y_maxs, c.content_hash
+    FROM current c
+    LEFT JOIN export_state e
+        ON e.project_id = %(project_id)s AND e.export_format = %(export_format)s AND e.image_id = c.id
+    WHERE e.content_hash IS DISTINCT FROM c.content_hash
+    ORDER BY c.id;
+"""
+
+class _IndentedXMLWriter:
+    """Small wrapper over XMLGenerator that streams indented elements to a file."""
+
+    def __init__(self, f):
+        self._xml = XMLGenerator(f, encoding="utf-8", short_empty_elements=True)
+        self._depth = 0
+
+    def start_document(self):
+        self._xml.startDocument()
+
+    def start(self, name):
+        self._xml.ignorableWhitespace("\n" + "\t" * self._depth)
+        self._xml.startElement(name, {})
+        self._depth += 1
+
+    def end(self, name):
+        self._depth -= 1
+        self._xml.ignorableWhitespace("\n" + "\t" * self._depth)
+        self._xml.endElement(name)
+
+    def element(self, name, value):
+        self._xml.ignorableWhitespace("\n" + "\t" * self._depth)
+        self._xml.startElement(name, {})
+        self._xml.characters(str(value))
+        self._xml.endElement(name)
+
+    def end_document(self):
+        self._xml.ignorableWhitespace("\n")
+        self._xml.endDocument()
+
+def _write_voc_file(annotations_dir, image):
+    """Runs in a worker process. Writes the Pascal VOC XML of one image atomically."""
+    image_id, file_name, width, height, class_names, x_mins, y_mins, x_maxs, y_maxs, content_hash = image
+
+    xml_path = Path(annotations_dir) / Path(file_name).with_suffix(".xml")
+    xml_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = xml_path.with_name(xml_path.name + ".tmp")
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        writer = _IndentedXMLWriter(f)
+        writer.start_document()
+        writer.start("annotation")
+        writer.element("folder", Path(file_name).parent.as_posix() or ".")
+        writer.element("filename", Path(file_name).name)
+        writer.start("source")
+        writer.element("database", "ODDM Toolkit")
+        writer.end("source")
+        writer.start("size")
+        writer.element("width", width)
+        writer.element("height", height)
+        writer.element("depth", 3)
+        writer.end("size")
+        writer.element("segmented", 0)
+
+        for index in range(len(class_names or ())):
+            # VOC coordinates are 1-based integer pixels
+            writer.start("object")
+            writer.element("name", class_names[index])
+            writer.element("pose", "Unspecified")
+            writer.element("truncated", 0)
+            writer.element("difficult", 0)
+            writer.start("bndbox")
+            writer.element("xmin", max(1, round(x_mins[index]) + 1))
+            writer.element("ymin", max(1, round(y_mins[index]) + 1))
+            writer.element("xmax", min(width, round(x_maxs[index]) + 1))
+            writer.element("ymax", min(height, round(y_maxs[index]) + 1))
+            writer.end("bndbox")
+            writer.end("object")
+
+        writer.end("annotation")
+        writer.end_document()
+
+    os.replace(tmp_path, xml_path)
+    return (image_id, file_name, content_hash)
+
+def _save_export_state(project_id, exported):
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            execute_values(cursor, """
+                INSERT INTO export_state (project_id, export_format, image_id, file_name, content_hash)
+                VALUES %s
+                ON CONFLICT (project_id, export_format, image_id) DO UPDATE
+                    SET file_name = EXCLUDED.file_name,
+                        content_hash = EXCLUDED.content_hash,
+                        exported_at = CURRENT_TIMESTAMP;
+            """, [(project_id, EXPORT_FORMAT, image_id, file_name, content_hash)
+                  for image_id, file_name, content_hash in exported])
+
+def _remove_deleted_images(project_id, annotations_dir):
+    """Deletes XML files (and state rows) of images that no longer exist."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM export_state e
+                WHERE e.project_id = %s AND e.export_format = %s
+                  AND NOT EXISTS (SELECT 1 FROM images i WHERE i.id = e.image_id)
+                RETURNING e.file_name;
+            """, (project_id, EXPORT_FORMAT))
+            removed = [row[0] for row in cursor.fetchall()]
+
+    for file_name in removed:
+        xml_path = annotations_dir / Path(file_name).with_suffix(".xml")
+        if xml_path.exists():
+            xml_path.unlink()
+    return len(removed)
+
+def export_voc(project_id, export_dir=None, full=False, batch_size=EXPORT_BATCH_SIZE, max_workers=None,
+               progress_callback=None, cancel_event=None):
+    """Exports a project's labels as Pascal VOC XML files, one per image.
+
+    Only images whose content changed since the previous export are rewritten,
+    pass full=True to rewrite everything. Files go to
+    export_dir/Annotations (default <data_storage_path>/exports/project_<id>/voc).
+    progress_callback(images_done, 0, message) is called after every batch.
+    """
+
+    try:
+        export_dir = Path(export_dir) if export_dir else get_export_dir(project_id, EXPORT_FORMAT)
+    except FileNotFoundError as e:
+        return {"success": False, "error": str(e)}
+
+    annotations_dir = export_dir / "Annotations"
+    annotations_dir.mkdir(parents=True, exist_ok=True)
+
+    if full:
+        with get_psql_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM export_state WHERE project_id = %s AND export_format = %s;",
+                               (project_id, EXPORT_FORMAT))
+
+    removed = _remove_deleted_images(project_id, annotations_dir)
+    exported_count = 0
+    max_workers = max_workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+            get_psql_connection(autocommit=False) as conn:
+        # Named cursor: changed images are streamed from the server in batches
+        cursor = conn.cursor(name=f"oddm_voc_export_{uuid.uuid4().hex}")
+        cursor.itersize = batch_size
+        cursor.execute(_CHANGED_IMAGES_QUERY, {"project_id": project_id, "export_format": EXPORT_FORMAT})
+
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return {"success": False, "error": "Export was cancelled.", "images_exported": exported_count}
+
+                images = cursor.fetchmany(batch_size)
+                if not images:
+                    break
+
+                chunksize = max(1, len(images) // (4 * max_workers))
+                exported = list(executor.map(_write_voc_file, [str(annotations_dir)] * len(images), images, chunksize=chunksize))
+                # Saved per batch, an interrupted export resumes with the remaining images
+                _save_export_state(project_id, exported)
+                exported_count += len(exported)
+
+                if progress_callback is not None:
+                    # The number of changed images is only known at the end, 0 means unknown
+                    progress_callback(exported_count, 0, "Exporting Pascal VOC annotations")
+        finally:
+            cursor.close()
+
+    return {"success": True, "export_dir": str(export_dir), "images_exported": exported_count, "images_removed": removed}
@@ -0,0 +1,175 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import uuid
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .database import get_psql_connection
+from .auth import get_export_dir
+from .annotations import get_project_classes
+
+# Rows fetched from the server side cursor per round trip
+EXPORT_BATCH_SIZE = 20000
+# Label files written concurrently
+EXPORT_WORKERS = 8
+
+def stream_annotation_batches(project_id, batch_size=EXPORT_BATCH_SIZE):
+    """Yields lists of (image_id, file_name, width, height, class_id, x_min, y_min, x_max, y_max) rows.
+
+    Rows come from a named (server side) cursor ordered by image id, so memory
+    use depends on batch_size, not on the size of the project. Images without
+    boxes are returned once with NULL box columns.
+    """
+    with get_psql_connection(autocommit=False) as conn:
+        # A named cursor keeps the result set on the server
+        cursor = conn.cursor(name=f"oddm_export_{uuid.uuid4().hex}")
+        cursor.itersize = batch_size
+        cursor.execute("""
+            SELECT i.id, i.file_name, i.width, i.height, a.class_id, a.x_min, a.y_min, a.x_max, a.y_max
+            FROM images i
+            LEFT JOIN annotations a ON a.project_id = i.project_id AND a.image_id = i.id
+            WHERE i.project_id = %s
+            ORDER BY i.id;
+        """, (project_id,))
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+def yolo_lines_for_batch(rows):
+    """Converts a batch of rows to {image_id: (file_name, [yolo lines])} using vectorized math."""
+    image_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    has_box = np.fromiter((row[4] is not None for row in rows), dtype=bool, count=len(rows))
+    boxes = np.array([row[4:9] if row[4] is not None else (0, 0, 0, 0, 0) for row in rows], dtype=np.float64).reshape(-1, 5)
+    sizes = np.array([row[2:4] for row in rows], dtype=np.float64).reshape(-1, 2)
+
+    class_ids = boxes[:, 0].astype(np.int64)
+    widths, heights = sizes[:, 0], sizes[:, 1]
+    x_min = np.clip(boxes[:, 1], 0, widths)
+    y_min = np.clip(boxes[:, 2], 0, heights)
+    x_max = np.clip(boxes[:, 3], 0, widths)
+    y_max = np.clip(boxes[:, 4], 0, heights)
+
+    # YOLO: class x_center y_center width height, all relative to the image size
+    x_center = (x_min + x_max) / 2 / widths
+    y_center = (y_min + y_max) / 2 / heights
+    box_w = (x_max - x_min) / widths
+    box_h = (y_max - y_min) / heights
+
+    labels = {}
+    for index in range(len(rows)):
+        image_id = int(image_ids[index])
+        if image_id not in labels:
+            labels[image_id] = (rows[index][1], [])
+        if has_box[index]:
+            labels[image_id][1].append(
+                f"{class_ids[index]} {x_center[index]:.6f} {y_center[index]:.6f} {box_w[index]:.6f} {box_h[index]:.6f}"
+            )
+    return labels
+
+def _write_label_file(labels_dir, file_name, lines):
+    label_path = labels_dir / Path(file_name).with_suffix(".txt")
+    label_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = label_path.with_name(label_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if lines:
+            f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, label_path)
+
+def _write_data_yaml(export_dir, class_names):
+    lines = [
+        f"path: {export_dir.as_posix()}",
+        "train: images",
+        "val: images",
+        f"nc: {len(class_names)}",
+        "names:",
+    ]
+    # Single quoted YAML scalars, quotes inside are doubled
+    lines += [f"  {class_id}: '{name.replace(chr(39), chr(39) * 2)}'" for class_id, name in sorted(class_names.items())]
+    with open(export_dir / "data.yaml", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+def _count_images(project_id):
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM images WHERE project_id = %s;", (project_id,))
+            return cursor.fetchone()[0]
+
+def export_yolo(project_id, export_dir=None, batch_size=EXPORT_BATCH_SIZE, max_workers=EXPORT_WORKERS,
+                progress_callback=None, cancel_event=None):
+    """Exports a project's labels in YOLO format.
+
+    Writes labels/<file_name>.txt per image and data.yaml into export_dir
+    (default <data_storage_path>/exports/project_<id>/yolo).
+    progress_callback(images_done, images_total, message) is called after every
+    batch, which makes it compatible with ui.workers.Worker(pass_controls=True).
+    """
+
+    try:
+        export_dir = Path(export_dir) if export_dir else get_export_dir(project_id, "yolo")
+    except FileNotFoundError as e:
+        return {"success": False, "error": str(e)}
+
+    labels_dir = export_dir / "labels"
+    labels_dir.mkdir(parents=True, exist_ok=True)
+    _write_data_yaml(export_dir, get_project_classes(project_id))
+
+    images_total = _count_images(project_id)
+    images_done = 0
+    carry = []  # rows of the last image of a batch, it may continue in the next batch
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def flush(rows):
+            labels = yolo_lines_for_batch(rows)
+            # Wait for the writes so at most one batch of label text is held in memory
+            list(executor.map(lambda item: _write_label_file(labels_dir, *item), labels.values()))
+            return len(labels)
+
+        for rows in stream_annotation_batches(project_id, batch_size):
+            if cancel_event is not None and cancel_event.is_set():
+                return {"success": False, "error": "Export was cancelled.", "images_exported": images_done}
+
+            rows = carry + rows
+            last_image_id = rows[-1][0]
+            split = len(rows)
+            while split > 0 and rows[split - 1][0] == last_image_id:
+                split -= 1
+            rows, carry = rows[:split], rows[split:]
+
+            if rows:
+                images_done += flush(rows)
+                if progress_callback is not None:
+                    progress_callback(images_done, images_total, "Exporting YOLO labels")
+
+        if carry:
+            images_done += flush(carry)
+
+    if progress_callback is not None:
+        progress_callback(images_done, images_total, "YOLO export completed")
+
+    return {"success": True, "export_dir": str(export_dir), "images_exported": images_done}
@@ -22,6 +22,7 @@
 
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 # Define Google Drive API Scope
 SCOPES = ["https://www.googleapis.com/auth/drive"]
@@ -0,0 +1,494 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+import http.client
+from pathlib import Path
+from urllib.parse import urlsplit, urlencode
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Backs up data_storage_path to a Google Drive folder using the Drive v3
+# resumable upload protocol. It talks HTTP directly (http.client) instead of
+# going through googleapiclient so that the API base URL can point to a local
+# fake Drive server in tests, and so upload sessions can be persisted and
+# resumed after the app restarts.
+
+DRIVE_API_URL = "https://www.googleapis.com"
+DRIVE_FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+MANIFEST_FILE_NAME = ".oddm_backup_manifest.json"
+
+CHUNK_SIZE_MULTIPLE = 256 * 1024  # Drive requires chunks in multiples of 256 KiB
+DEFAULT_CHUNK_SIZE = 32 * CHUNK_SIZE_MULTIPLE  # 8 MiB
+DEFAULT_WORKERS = 4
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MANIFEST_COMPACT_EVERY = 10000  # journaled changes before the manifest is rewritten
+
+class DriveError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class BackupCancelled(Exception):
+    pass
+
+def service_account_token_provider(service_json_data):
+    """Returns a callable giving a valid OAuth access token for a service account."""
+    # Imported here, the Google auth stack is only needed when backups run
+    import httplib2
+    import google_auth_httplib2
+    from google.oauth2 import service_account
+
+    creds = service_account.Credentials.from_service_account_info(service_json_data, scopes=["https://www.googleapis.com/auth/drive"])
+    lock = threading.Lock()
+
+    def get_token():
+        with lock:
+            if not creds.valid:
+                creds.refresh(google_auth_httplib2.Request(httplib2.Http()))
+            return creds.token
+
+    return get_token
+
+class DriveClient:
+    """Minimal, thread-safe Drive v3 client for folders and resumable uploads."""
+
+    def __init__(self, token_provider, base_url=DRIVE_API_URL, timeout=60, max_retries=8,
+                 backoff_base=1.0, backoff_max=64.0):
+        self.token_provider = token_provider
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._local = threading.local()  # one keep-alive connection per thread and host
+        self._all_connections = set()     # of every thread, for close()
+        self._connections_lock = threading.Lock()
+
+    def _connection(self, scheme, netloc):
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        conn = connections.get((scheme, netloc))
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = connections[(scheme, netloc)] = conn_class(netloc, timeout=self.timeout)
+            with self._connections_lock:
+                self._all_connections.add(conn)
+        return conn
+
+    def _drop_connection(self, scheme, netloc):
+        conn = getattr(self._local, "connections", {}).pop((scheme, netloc), None)
+        if conn is not None:
+            with self._connections_lock:
+                self._all_connections.discard(conn)
+            conn.close()
+
+    def close(self):
+        """Closes the keep-alive connections of every thread. Call it when no request is
+        in flight. A closed connection reconnects on its next request."""
+        with self._connections_lock:
+            connections = list(self._all_connections)
+        for conn in connections:
+            conn.close()
+
+    def _request_once(self, method, url, body=None, headers=None):
+        parts = urlsplit(url)
+        target = parts.path + ("?" + parts.query if parts.query else "")
+        request_headers = {"Authorization": f"Bearer {self.token_provider()}"}
+        request_headers.update(headers or {})
+        if body is None and method in ("PUT", "POST", "PATCH"):
+            request_headers.setdefault("Content-Length", "0")
+
+        conn = self._connection(parts.scheme, parts.netloc)
+        try:
+            conn.request(method, target, body=body, headers=request_headers)
+            response = conn.getresponse()
+            response_body = response.read()
+        except (OSError, http.client.HTTPException):
+            self._drop_connection(parts.scheme, parts.netloc)
+            raise
+        return response.status, response.headers, response_body
+
+    def backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = None
+            if delay is not None:
+                time.sleep(min(delay, self.backoff_max))
+                return
+        # Exponential backoff with full jitter
+        time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt))))
+
+    def request(self, method, url, body=None, headers=None, ok_statuses=(200, 201), retry=True):
+        """Sends a request, retrying 429/5xx responses and network errors with exponential backoff."""
+        max_retries = self.max_retries if retry else 0
+        for attempt in range(max_retries + 1):
+            try:
+                status, response_headers, response_body = self._request_once(method, url, body, headers)
+            except (OSError, http.client.HTTPException) as e:
+                if attempt == max_retries:
+                    raise DriveError(f"{method} {url} failed: {e}")
+                self.backoff(attempt)
+                continue
+
+            if status in ok_statuses:
+                return status, response_headers, response_body
+            if status in RETRY_STATUSES and attempt < max_retries:
+                self.backoff(attempt, response_headers.get("Retry-After"))
+                continue
+            raise DriveError(f"{method} {url} returned {status}: {response_body[:500].decode(errors='replace')}", status)
+
+    def _api_url(self, path, **params):
+        params.setdefault("supportsAllDrives", "true")
+        return f"{self.base_url}{path}?{urlencode(params)}"
+
+    def get_file(self, file_id):
+        _, _, body = self.request("GET", self._api_url(f"/drive/v3/files/{file_id}", fields="id,name"))
+        return json.loads(body)
+
+    def create_folder(self, name, parent_id):
+        metadata = {"name": name, "mimeType": DRIVE_FOLDER_MIME_TYPE, "parents": [parent_id]}
+        _, _, body = self.request("POST", self._api_url("/drive/v3/files", fields="id"),
+                                  body=json.dumps(metadata).encode(),
+                                  headers={"Content-Type": "application/json; charset=UTF-8"})
+        return json.loads(body)["id"]
+
+    def start_upload(self, name, parent_id, size, file_id=None):
+        """Opens a resumable upload session and returns its URI. Updates `file_id` when given."""
+        if file_id:
+            method, url, metadata = "PATCH", self._api_url(f"/upload/drive/v3/files/{file_id}", uploadType="resumable", fields="id"), {}
+        else:
+            method, url, metadata = "POST", self._api_url("/upload/drive/v3/files", uploadType="resumable", fields="id"), {"name": name, "parents": [parent_id]}
+
+        _, headers, _ = self.request(method, url, body=json.dumps(metadata).encode(), headers={
+            "Content-Type": "application/json; charset=UTF-8",
+            "X-Upload-Content-Type": "application/octet-stream",
+            "X-Upload-Content-Length": str(size),
+        })
+        session_uri = headers.get("Location")
+        if not session_uri:
+            raise DriveError("Drive did not return an upload session URI.")
+        return session_uri
+
+    @staticmethod
+    def _upload_progress(status, headers, body):
+        """Returns (next_offset, file_id). file_id is set once the upload is complete."""
+        if status in (200, 201):
+            return None, json.loads(body)["id"]
+        received = headers.get("Range")  # e.g. "bytes=0-1048575", absent when nothing was stored
+        return (int(received.rsplit("-", 1)[1]) + 1 if received else 0), None
+
+    def query_upload(self, session_uri, size):
+        """Asks Drive how much of an interrupted upload it already has."""
+        status, headers, body = self.request("PUT", session_uri, headers={"Content-Range": f"bytes */{size}"},
+                                             ok_statuses=(200, 201, 308))
+        return self._upload_progress(status, headers, body)
+
+    def upload_chunk(self, session_uri, data, offset, size):
+        """Sends one chunk. Not retried here: after a failure the caller must ask
+        Drive for the stored offset (query_upload) before sending more data."""
+        content_range = f"bytes {offset}-{offset + len(data) - 1}/{size}" if data else f"bytes */{size}"
+        status, headers, body = self.request("PUT", session_uri, body=data, headers={
+            "Content-Length": str(len(data)),
+            "Content-Range": content_range,
+        }, ok_statuses=(200, 201, 308), retry=False)
+        return self._upload_progress(status, headers, body)
+
+class BackupManifest:
+    """Local record of what is already on Drive.
+
+    Changes are appended to a journal next to the manifest, an O(1) write per
+    change however many files are tracked. The journal is folded into the
+    manifest (rewritten atomically) every MANIFEST_COMPACT_EVERY changes and
+    when a backup run ends, and replayed on load after a crash.
+    """
+
+    def __init__(self, path, folder_id):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + ".journal")
+        self._lock = threading.Lock()
+        data = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+        self.data = {"version": 1, "folder_id": folder_id, "folders": data.get("folders", {}), "files": data.get("files", {})}
+
+        if data.get("folder_id") != folder_id:
+            # Backing up to another folder, start over
+            self.data["folders"], self.data["files"] = {}, {}
+            self._save()
+            self._truncate_journal()
+        else:
+            self._replay_journal()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_entries = 0
+
+    def _replay_journal(self):
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # last line cut short by a crash
+                    self._apply(record)
+        except FileNotFoundError:
+            pass
+
+    def _truncate_journal(self):
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+
+    def _apply(self, record):
+        if "file" in record:
+            self.data["files"].setdefault(record["file"], {}).update(record["fields"])
+        else:
+            self.data["folders"][record["folder"]] = record["id"]
+
+    def _record(self, record):
+        """Applies and journals a change, must be called with the lock held."""
+        self._apply(record)
+        self._journal.write(json.dumps(record) + "\n")
+        self._journal.flush()
+        self._journal_entries += 1
+        if self._journal_entries >= MANIFEST_COMPACT_EVERY:
+            self._compact()
+
+    def get_file(self, rel_path):
+        with self._lock:
+            entry = self.data["files"].get(rel_path)
+            return dict(entry) if entry else None
+
+    def update_file(self, rel_path, **fields):
+        with self._lock:
+            self._record({"file": rel_path, "fields": fields})
+
+    def get_folder(self, rel_dir):
+        with self._lock:
+            return self.data["folders"].get(rel_dir)
+
+    def set_folder(self, rel_dir, folder_id):
+        with self._lock:
+            self._record({"folder": rel_dir, "id": folder_id})
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def close(self):
+        with self._lock:
+            self._compact()
+            self._journal.close()
+
+    def _compact(self):
+        if self._journal_entries == 0:
+            return
+        self._save()
+        self._journal.close()
+        self._journal = open(self.journal_path, "w", encoding="utf-8")
+        self._journal_entries = 0
+
+    def _save(self):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+def _sha256_file(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise BackupCancelled()
+
+def _walk_files(root):
+    """Yields paths (relative, posix style) of the files to back up."""
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = [name for name in dir_names if not name.startswith(".")]
+        for file_name in file_names:
+            if file_name.startswith(".") or file_name.endswith(".tmp"):
+                continue  # manifest, hidden and partially written files
+            yield (Path(dir_path) / file_name).relative_to(root).as_posix()
+
+class BackupEngine:
+    def __init__(self, root, folder_id, client, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_WORKERS):
+        if chunk_size <= 0 or chunk_size % CHUNK_SIZE_MULTIPLE:
+            raise ValueError(f"chunk_size must be a positive multiple of {CHUNK_SIZE_MULTIPLE} bytes")
+        self.root = Path(root)
+        self.folder_id = folder_id
+        self.client = client
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.manifest = BackupManifest(self.root / MANIFEST_FILE_NAME, folder_id)
+        self._folder_lock = threading.Lock()
+
+    def _ensure_folder(self, rel_dir):
+        """Returns the Drive folder id mirroring `rel_dir`, creating missing folders."""
+        if rel_dir in ("", "."):
+            return self.folder_id
+        # Serialised so two workers never create the same folder twice
+        with self._folder_lock:
+            return self._ensure_folder_locked(rel_dir)
+
+    def _ensure_folder_locked(self, rel_dir):
+        if rel_dir in ("", "."):
+            return self.folder_id
+        folder_id = self.manifest.get_folder(rel_dir)
+        if folder_id is None:
+            parent_id = self._ensure_folder_locked(Path(rel_dir).parent.as_posix())
+            folder_id = self.client.create_folder(Path(rel_dir).name, parent_id)
+            self.manifest.set_folder(rel_dir, folder_id)
+        return folder_id
+
+    def _needs_upload(self, rel_path, stat):
+        """Returns (needs_upload, sha256)."""
+        entry = self.manifest.get_file(rel_path)
+        if entry and entry.get("file_id") and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return False, entry.get("sha256")
+
+        sha256 = _sha256_file(self.root / rel_path)
+        if entry and entry.get("file_id") and entry.get("sha256") == sha256:
+            # Touched but not modified, only remember the new mtime
+            self.manifest.update_file(rel_path, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            return False, sha256
+        return True, sha256
+
+    def backup_file(self, rel_path, cancel_event=None):
+        """Uploads one file if it is new or changed. Returns True when it was uploaded."""
+        # Files queued before a cancel are dropped without being hashed
+        _check_cancelled(cancel_event)
+        path = self.root / rel_path
+        stat = path.stat()
+        needs_upload, sha256 = self._needs_upload(rel_path, stat)
+        if not needs_upload:
+            return False
+
+        entry = self.manifest.get_file(rel_path) or {}
+        size = stat.st_size
+        session_uri, offset = None, 0
+
+        # Resume an interrupted upload of the same file content
+        if entry.get("session_uri") and entry.get("session_sha256") == sha256:
+            try:
+                offset, file_id = self.client.query_upload(entry["session_uri"], size)
+                session_uri = entry["session_uri"]
+                if file_id is not None:
+                    self.manifest.update_file(rel_path, file_id=file_id, size=size, mtime_ns=stat.st_mtime_ns,
+                                              sha256=sha256, session_uri=None, session_sha256=None)
+                    return True
+            except DriveError as e:
+                if e.status not in (404, 410):  # expired sessions are restarted below
+                    raise
+
+        if session_uri is None:
+            _check_cancelled(cancel_event)  # hashing may have taken a while, do not open a session now
+            parent_id = self._ensure_folder(Path(rel_path).parent.as_posix())
+            session_uri = self.client.start_upload(Path(rel_path).name, parent_id, size, file_id=entry.get("file_id"))
+            offset = 0
+            self.manifest.update_file(rel_path, session_uri=session_uri, session_sha256=sha256)
+
+        failures = 0
+        with open(path, "rb") as f:
+            while True:
+                _check_cancelled(cancel_event)
+                f.seek(offset)
+                data = f.read(self.chunk_size)
+                try:
+                    offset, file_id = self.client.upload_chunk(session_uri, data, offset, size)
+                except DriveError as e:
+                    if (e.status is not None and e.status not in RETRY_STATUSES) or failures >= self.client.max_retries:
+                        raise
+                    # Drive may have stored part of the chunk, continue from what it has
+                    self.client.backoff(failures)
+                    failures += 1
+                    offset, file_id = self.client.query_upload(session_uri, size)
+                if file_id is not None:
+                    break
+                if not data:
+                    raise DriveError(f"Upload of {rel_path} did not complete.")
+
+        self.manifest.update_file(rel_path, file_id=file_id, size=size, mtime_ns=stat.st_mtime_ns,
+                                  sha256=sha256, session_uri=None, session_sha256=None)
+        return True
+
+    def run(self, progress_callback=None, cancel_event=None):
+        """Backs up every new or changed file. Safe to interrupt and run again."""
+        files = list(_walk_files(self.root))
+        uploaded, skipped, failed = 0, 0, []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.backup_file, rel_path, cancel_event): rel_path for rel_path in files}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    if future.result():
+                        uploaded += 1
+                    else:
+                        skipped += 1
+                except BackupCancelled:
+                    pass
+                except (DriveError, OSError) as e:
+                    failed.append({"path": futures[future], "error": str(e)})
+
+                if progress_callback is not None:
+                    progress_callback(done, len(files), "Backing up to Google Drive")
+        self.manifest.compact()
+        self.client.close()  # the worker threads are done, nothing uses their connections now
+
+        if cancel_event is not None and cancel_event.is_set():
+            return {"success": False, "error": "Backup was cancelled.", "uploaded": uploaded, "skipped": skipped}
+        return {"success": not failed, "uploaded": uploaded, "skipped": skipped, "failed": failed}
+
+def backup_data_storage(chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_WORKERS, progress_callback=None, cancel_event=None):
+    """Backs up data_storage_path to the Google Drive folder configured during setup."""
+    # Imported here to keep the module importable on its own
+    from .auth import get_setup_config
+
+    try:
+        config = get_setup_config()
+    except FileNotFoundError as e:
+        return {"success": False, "error": str(e)}
+
+    if not config.gdrive_enabled or not config.gdrive_folder_id:
+        return {"success": False, "error": "Google Drive backup is not enabled."}
+
+    client = DriveClient(service_account_token_provider(config.gdrive_service_json))
+    engine = BackupEngine(config.data_storage_path, config.gdrive_folder_id, client,
+                          chunk_size=chunk_size, max_workers=max_workers)
+    try:
+        return engine.run(progress_callback=progress_callback, cancel_event=cancel_event)
+    finally:
+        engine.manifest.close()
+        client.close()
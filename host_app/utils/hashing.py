@@ -0,0 +1,211 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import time
+import threading
+import statistics
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, VerificationError, InvalidHashError
+from .auth import get_setup_config, create_oddm_setup_file
+
+# Named Argon2 cost profiles.
+# interactive:   argon2-cffi defaults, used for logins and single user creation.
+# bulk:          OWASP minimum, used when provisioning thousands of accounts.
+#                Hashes are upgraded to the interactive profile on first login.
+# high_security: for admin accounts and other high value credentials.
+PROFILES = {
+    "interactive": {"time_cost": 3, "memory_cost": 65536, "parallelism": 4},
+    "bulk": {"time_cost": 2, "memory_cost": 19456, "parallelism": 1},
+    "high_security": {"time_cost": 4, "memory_cost": 262144, "parallelism": 4},
+}
+
+CALIBRATED_PROFILE_KEY = "interactive_hashing_profile"  # setup config key of the calibrated parameters
+
+def _profile_params(profile):
+    """Returns the cost parameters of a profile as a hashable tuple."""
+    if isinstance(profile, dict):
+        params = profile
+    elif profile in PROFILES:
+        params = PROFILES[profile]
+    else:
+        raise ValueError(f"Unknown password hashing profile '{profile}'.")
+    return (params["time_cost"], params["memory_cost"], params["parallelism"])
+
+@lru_cache(maxsize=None)
+def _get_hasher(params):
+    time_cost, memory_cost, parallelism = params
+    return PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+# The functions below run inside the worker processes, they must stay at module level.
+def _hash_in_worker(password, params):
+    return _get_hasher(params).hash(password)
+
+def _verify_in_worker(stored_hash, password, params):
+    hasher = _get_hasher(params)
+    try:
+        hasher.verify(stored_hash, password)
+    except VerifyMismatchError:
+        return {"success": False, "error": "Invalid password."}
+    except (VerificationError, InvalidHashError) as e:
+        return {"success": False, "error": f"Invalid password hash: {e}"}
+
+    # Re-hash with the current parameters if the stored hash used other ones
+    new_hash = hasher.hash(password) if hasher.check_needs_rehash(stored_hash) else None
+    return {"success": True, "rehash": new_hash}
+
+class PasswordHashingService:
+    """Runs Argon2 hashing and verification on a process pool.
+
+    Every call returns a concurrent.futures.Future so callers (including Qt
+    slots) never block on Argon2 unless they explicitly ask for the result.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Worker processes are started on first use, not at import time
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def hash_password(self, password, profile="interactive"):
+        """Returns a Future resolving to the encoded Argon2 hash."""
+        return self._get_executor().submit(_hash_in_worker, password, _profile_params(profile))
+
+    def hash_many(self, passwords, profile="bulk"):
+        """Hashes many passwords in parallel and returns the hashes in input order."""
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        params = _profile_params(profile)
+        chunksize = max(1, len(passwords) // (self.max_workers * 4))
+        return list(self._get_executor().map(_hash_in_worker, passwords, [params] * len(passwords), chunksize=chunksize))
+
+    def verify_password(self, stored_hash, password, profile="interactive"):
+        """Returns a Future resolving to {"success": bool, "rehash": new_hash or None}.
+
+        `rehash` is set when the stored hash was made with parameters other than
+        the given profile's, the caller should then persist the new hash.
+        """
+        return self._get_executor().submit(_verify_in_worker, stored_hash, password, _profile_params(profile))
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+def get_hashing_service():
+    """Returns the process wide hashing service."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = PasswordHashingService()
+        return _SERVICE
+
+def shutdown_hashing_service():
+    global _SERVICE
+    with _SERVICE_LOCK:
+        service, _SERVICE = _SERVICE, None
+    if service is not None:
+        service.shutdown()
+
+def _measure_hash_ms(params, samples=3):
+    hasher = PasswordHasher(time_cost=params["time_cost"], memory_cost=params["memory_cost"], parallelism=params["parallelism"])
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash("oddm-calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def calibrate_profile(target_ms=250, parallelism=None, min_memory_cost=19456, max_memory_cost=1048576,
+                      max_time_cost=10, profile_name=None):
+    """Finds Argon2 parameters whose hash time on this host is close to `target_ms`.
+
+    Memory cost is raised first (doubling from the OWASP minimum) because it is
+    what makes GPU attacks expensive, then time cost is raised until the target
+    is reached. Returns the strongest parameters that stay within the target.
+    If `profile_name` is given the profile is updated in PROFILES.
+    """
+    parallelism = parallelism or min(4, os.cpu_count() or 1)
+    best = {"time_cost": 1, "memory_cost": min_memory_cost, "parallelism": parallelism}
+    best_ms = _measure_hash_ms(best)
+
+    memory_cost = min_memory_cost
+    while memory_cost * 2 <= max_memory_cost:
+        candidate = {"time_cost": 1, "memory_cost": memory_cost * 2, "parallelism": parallelism}
+        elapsed_ms = _measure_hash_ms(candidate)
+        if elapsed_ms > target_ms:
+            break
+        best, best_ms = candidate, elapsed_ms
+        memory_cost *= 2
+
+    time_cost = best["time_cost"]
+    while time_cost < max_time_cost:
+        candidate = dict(best, time_cost=time_cost + 1)
+        elapsed_ms = _measure_hash_ms(candidate)
+        if elapsed_ms > target_ms:
+            break
+        best, best_ms = candidate, elapsed_ms
+        time_cost += 1
+
+    if profile_name is not None:
+        set_profile(profile_name, best)
+
+    return {"success": True, "params": best, "measured_ms": round(best_ms, 2)}
+
+def set_profile(name, params):
+    PROFILES[name] = {"time_cost": params["time_cost"], "memory_cost": params["memory_cost"],
+                      "parallelism": params["parallelism"]}
+    _get_hasher.cache_clear()
+
+def load_calibrated_profile():
+    """Applies the interactive profile calibrated for this host, saved in the setup config.
+
+    Calibration takes seconds and its result varies with timing noise, so it
+    only runs the first time and the parameters are saved. Every launch after
+    that hashes with the same parameters and stored hashes are not rehashed.
+    """
+    try:
+        config = get_setup_config()
+    except FileNotFoundError as e:
+        return {"success": False, "error": str(e)}
+
+    params = config.get(CALIBRATED_PROFILE_KEY)
+    if params:
+        set_profile("interactive", params)
+        return {"success": True, "params": params, "calibrated": False}
+
+    res = calibrate_profile(min_memory_cost=PROFILES["interactive"]["memory_cost"], profile_name="interactive")
+    create_oddm_setup_file(dict(config.to_dict(), **{CALIBRATED_PROFILE_KEY: res["params"]}))
+    return dict(res, calibrated=True)
@@ -0,0 +1,312 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import time
+from itertools import islice
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from PIL import Image
+from .blob_store import BlobStore, hash_file, get_blob_store
+from .thumbnails import build_pyramid, get_thumbnail_cache
+from .database import get_psql_connection
+from .annotations import ensure_project_classes, bulk_insert_images, bulk_insert_annotations, delete_image_annotations
+
+# Streaming ingest of a folder of images with optional YOLO (.txt) or Pascal
+# VOC (.xml) labels:
+#
+#   scandir walk -> process pool (hash, store, probe size, parse labels, thumbnails)
+#                -> COPY into images / annotations, one batch at a time
+#
+# The walk feeds the pool lazily and only a bounded number of chunks is in
+# flight, so memory stays flat for any dataset size. Database loading runs in
+# this process while the pool keeps working on the queued chunks.
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+CLASS_NAME_FILES = ("classes.txt", "obj.names")  # YOLO class list, one name per line
+INGEST_CHUNK_SIZE = 64        # files per task sent to a worker process
+INGEST_DB_BATCH_SIZE = 5000   # images per COPY round trip
+CHUNKS_IN_FLIGHT_PER_WORKER = 4
+PROGRESS_INTERVAL = 2.0       # seconds between progress reports
+
+def iter_image_files(source_dir):
+    """Yields (path, file_name) for every image below source_dir, file_name is the posix relative path."""
+    source_dir = str(source_dir)
+    stack = [source_dir]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except PermissionError as e:
+            print(f"Skipping {directory}: {e}")
+            continue
+        entries.sort(key=lambda entry: entry.name)
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                yield entry.path, Path(os.path.relpath(entry.path, source_dir)).as_posix()
+        stack.extend(reversed(subdirs))  # visit sub folders in name order
+
+def _label_candidates(path):
+    """Label locations next to the image and in the usual YOLO / VOC folder layouts."""
+    path = Path(path)
+    yield path.with_suffix(".txt")
+    yield path.with_suffix(".xml")
+    parts = path.parts
+    for images_dir, labels_dir, suffix in (("images", "labels", ".txt"), ("JPEGImages", "Annotations", ".xml")):
+        if images_dir in parts:
+            index = len(parts) - 1 - parts[::-1].index(images_dir)  # the closest one to the file
+            yield Path(*parts[:index], labels_dir, *parts[index + 1:]).with_suffix(suffix)
+
+def parse_yolo_labels(label_path, width, height):
+    """Returns [(class_index, x_min, y_min, x_max, y_max)] in absolute pixels."""
+    boxes = []
+    with open(label_path, "r", encoding="utf-8") as f:
+        for line in f:
+            values = line.split()
+            if len(values) < 5:
+                continue
+            class_index = int(values[0])
+            x_center, y_center, box_w, box_h = (float(value) for value in values[1:5])
+            boxes.append((class_index,
+                          (x_center - box_w / 2) * width, (y_center - box_h / 2) * height,
+                          (x_center + box_w / 2) * width, (y_center + box_h / 2) * height))
+    return boxes
+
+def parse_voc_labels(label_path):
+    """Returns [(class_name, x_min, y_min, x_max, y_max)], VOC's 1-based pixels converted to 0-based."""
+    boxes = []
+    for obj in ET.parse(label_path).getroot().iter("object"):
+        bndbox = obj.find("bndbox")
+        if bndbox is None:
+            continue
+        boxes.append((obj.findtext("name", "").strip(),
+                      float(bndbox.findtext("xmin")) - 1, float(bndbox.findtext("ymin")) - 1,
+                      float(bndbox.findtext("xmax")) - 1, float(bndbox.findtext("ymax")) - 1))
+    return boxes
+
+def _ingest_file(store, thumbnails_root, path, file_name):
+    content_hash = hash_file(path)
+    stored = store.put_file(path, content_hash)
+    with Image.open(path) as image:
+        width, height = image.size  # reads the header only
+
+    boxes = []
+    for label_path in _label_candidates(path):
+        if not label_path.is_file():
+            continue
+        if label_path.suffix == ".txt":
+            boxes = parse_yolo_labels(label_path, width, height)
+        else:
+            boxes = parse_voc_labels(label_path)
+        break
+
+    thumbnail_bytes = 0
+    if thumbnails_root is not None:
+        try:
+            thumbnail_bytes = build_pyramid(thumbnails_root, content_hash, store.path_for(content_hash))
+        except Exception as e:
+            print(f"Could not build thumbnails for {file_name}: {e}")
+
+    return {"file_name": file_name, "width": width, "height": height, "hash": content_hash,
+            "size": stored["size"], "stored": stored["stored"], "boxes": boxes,
+            "thumbnail_bytes": thumbnail_bytes}
+
+def _ingest_chunk(store_root, thumbnails_root, files):
+    """Runs in a worker process. One failing file does not fail the chunk."""
+    store = BlobStore(store_root)
+    results = []
+    for path, file_name in files:
+        try:
+            results.append(_ingest_file(store, thumbnails_root, path, file_name))
+        except Exception as e:
+            results.append({"file_name": file_name, "error": str(e)})
+    return results
+
+def load_class_names(source_dir):
+    for name in CLASS_NAME_FILES:
+        path = Path(source_dir) / name
+        if path.is_file():
+            with open(path, "r", encoding="utf-8") as f:
+                return [line.strip() for line in f if line.strip()]
+    return []
+
+class IngestStats:
+    """Throughput counters, reported through progress_callback while the ingest runs."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.images = 0
+        self.new_files = 0     # not in the blob store before
+        self.bytes = 0
+        self.boxes = 0
+        self.errors = 0
+        self.db_seconds = 0.0
+
+    def elapsed(self):
+        return max(time.monotonic() - self.started, 1e-9)
+
+    def to_dict(self):
+        elapsed = self.elapsed()
+        return {"images": self.images, "new_files": self.new_files, "bytes": self.bytes, "boxes": self.boxes,
+                "errors": self.errors, "elapsed_s": round(elapsed, 2), "db_s": round(self.db_seconds, 2),
+                "images_per_s": round(self.images / elapsed, 1),
+                "mb_per_s": round(self.bytes / elapsed / 1024 ** 2, 1)}
+
+    def summary(self):
+        stats = self.to_dict()
+        return (f"{stats['images']} images, {stats['boxes']} boxes, {stats['errors']} errors - "
+                f"{stats['images_per_s']} images/s, {stats['mb_per_s']} MB/s")
+
+class _DatabaseLoader:
+    """Buffers worker results and writes them with one COPY per table per batch."""
+
+    def __init__(self, project_id, class_names, created_by, stats):
+        self.project_id = project_id
+        self.class_names = class_names
+        self.created_by = created_by
+        self.stats = stats
+        self.class_ids = {}
+        self.pending = []
+        self._classes_created = False
+
+    def add(self, results):
+        for res in results:
+            if "error" in res:
+                print(f"Skipping {res['file_name']}: {res['error']}")
+                self.stats.errors += 1
+            else:
+                self.pending.append(res)
+
+    def _class_name(self, key):
+        if isinstance(key, int):  # YOLO class index
+            return self.class_names[key] if 0 <= key < len(self.class_names) else str(key)
+        return key
+
+    def flush(self):
+        if not self.pending:
+            return
+        started = time.monotonic()
+        batch, self.pending = self.pending, []
+
+        if not self._classes_created:
+            # The known class list goes in first and in its own order, so class ids follow the
+            # YOLO indices and a YOLO export gives back the same label files
+            if self.class_names:
+                self.class_ids.update(ensure_project_classes(self.project_id, self.class_names))
+            self._classes_created = True
+
+        # VOC names and YOLO indices outside the class list
+        names = {self._class_name(box[0]) for res in batch for box in res["boxes"]}
+        missing = [name for name in names if name not in self.class_ids]
+        if missing:
+            self.class_ids.update(ensure_project_classes(self.project_id, sorted(missing)))
+
+        # One transaction per batch: the boxes of re-ingested images are never deleted without the new ones
+        with get_psql_connection(autocommit=False) as conn:
+            with conn.cursor() as cursor:
+                image_ids = bulk_insert_images(self.project_id, [(res["file_name"], res["width"], res["height"],
+                                                                  res["hash"]) for res in batch], cursor=cursor)
+                # Re-ingesting a folder replaces the boxes of the images it contains
+                delete_image_annotations(self.project_id, list(image_ids.values()), cursor=cursor)
+                boxes = bulk_insert_annotations(self.project_id, (
+                    (image_ids[res["file_name"]], self.class_ids[self._class_name(class_key)], x_min, y_min, x_max, y_max)
+                    for res in batch for class_key, x_min, y_min, x_max, y_max in res["boxes"]
+                ), created_by=self.created_by, cursor=cursor)
+        self.stats.boxes += boxes
+
+        self.stats.images += len(batch)
+        self.stats.new_files += sum(1 for res in batch if res["stored"])
+        self.stats.bytes += sum(res["size"] for res in batch)
+        self.stats.db_seconds += time.monotonic() - started
+
+def ingest_dataset(project_id, source_dir, class_names=None, created_by=None, thumbnails=True,
+                   max_workers=None, chunk_size=INGEST_CHUNK_SIZE, db_batch_size=INGEST_DB_BATCH_SIZE,
+                   progress_callback=None, cancel_event=None):
+    """Imports every image below source_dir, with its labels, into a project.
+
+    Images are copied into the blob store under the configured data_storage_path.
+    YOLO class indices are named from `class_names`, else from classes.txt /
+    obj.names in source_dir. progress_callback(images_done, 0, summary) is called
+    every few seconds, the total is unknown while the folder is being walked.
+    """
+    source_dir = Path(source_dir)
+    if not source_dir.is_dir():
+        return {"success": False, "error": f"'{source_dir}' is not a directory.", "error_id": "ERR-ING-001"}
+
+    store = get_blob_store()
+    thumbnails_root = str(get_thumbnail_cache().root) if thumbnails else None
+    stats = IngestStats()
+    loader = _DatabaseLoader(project_id, list(class_names or load_class_names(source_dir)), created_by, stats)
+    thumbnail_bytes = 0
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * CHUNKS_IN_FLIGHT_PER_WORKER
+    files = iter_image_files(source_dir)
+    last_report = time.monotonic()
+    cancelled = False
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        walk_done = False
+        while in_flight or not walk_done:
+            while not walk_done and len(in_flight) < max_in_flight and not cancelled:
+                chunk = list(islice(files, chunk_size))
+                if len(chunk) < chunk_size:
+                    walk_done = True
+                if chunk:
+                    in_flight.add(executor.submit(_ingest_chunk, str(store.root), thumbnails_root, chunk))
+            if not in_flight:
+                break
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                results = future.result()
+                thumbnail_bytes += sum(res.get("thumbnail_bytes", 0) for res in results)
+                loader.add(results)
+
+            if len(loader.pending) >= db_batch_size:
+                loader.flush()
+
+            if progress_callback is not None and time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                progress_callback(stats.images, 0, stats.summary())
+
+            if cancel_event is not None and cancel_event.is_set() and not cancelled:
+                cancelled = walk_done = True  # finish the chunks already running, queue nothing new
+
+    loader.flush()
+    get_thumbnail_cache().record_written(thumbnail_bytes)
+
+    print(f"Ingest of {source_dir}: {stats.summary()}")
+    if progress_callback is not None:
+        progress_callback(stats.images, stats.images, stats.summary())
+
+    res = {"success": not cancelled, "stats": stats.to_dict()}
+    if cancelled:
+        res.update(error="The ingest was cancelled, the images processed so far were imported.", error_id="ERR-ING-002")
+    return res
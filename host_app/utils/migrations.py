@@ -0,0 +1,233 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+import hashlib
+from pathlib import Path
+from .database import get_psql_connection
+
+# Migration files live in host_app/migrations and are named <version>_<name>.sql,
+# e.g. 0001_create_users_table.sql. They are applied in version order.
+#
+# Pending migrations are applied in one transaction per batch. A migration whose
+# first line is `-- oddm:no-transaction` (needed for CREATE INDEX CONCURRENTLY)
+# ends the current batch and runs on its own in autocommit mode, one statement
+# at a time. Its statements must be separated by a `;` at the end of a line.
+# It is recorded as dirty before its first statement and marked clean after the
+# last one. A dirty migration failed or was interrupted part way, and migrate
+# refuses to run until it is resolved with resolve_migration.
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+NO_TRANSACTION_MARKER = "-- oddm:no-transaction"
+
+# Arbitrary key for pg_advisory_lock, keeps two hosts from migrating at once
+MIGRATION_LOCK_ID = 7306_2025
+
+_MIGRATION_FILE_RE = re.compile(r"^(\d+)_([\w\-]+)\.sql$")
+
+def load_migrations(migrations_dir=MIGRATIONS_DIR):
+    """Reads the migration files, sorted by version."""
+    migrations = []
+    for path in Path(migrations_dir).iterdir():
+        match = _MIGRATION_FILE_RE.match(path.name)
+        if not match:
+            continue
+        migration_sql = path.read_text(encoding="utf-8")
+        migrations.append({
+            "version": int(match.group(1)),
+            "name": path.stem,
+            "sql": migration_sql,
+            "checksum": hashlib.sha256(migration_sql.encode()).hexdigest(),
+            "transactional": not migration_sql.lstrip().startswith(NO_TRANSACTION_MARKER),
+        })
+
+    migrations.sort(key=lambda migration: migration["version"])
+    versions = [migration["version"] for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {migrations_dir}")
+    return migrations
+
+def _split_statements(migration_sql):
+    statements, current = [], []
+    for line in migration_sql.splitlines():
+        if line.strip().startswith("--"):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(current).strip()
+            if statement != ";":
+                statements.append(statement)
+            current = []
+    if "\n".join(current).strip():
+        statements.append("\n".join(current).strip())
+    return statements
+
+def _ensure_schema_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            dirty BOOLEAN NOT NULL DEFAULT FALSE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+def _record_migration(cursor, migration, dirty=False):
+    cursor.execute(
+        "INSERT INTO schema_version (version, name, checksum, dirty) VALUES (%s, %s, %s, %s);",
+        (migration["version"], migration["name"], migration["checksum"], dirty)
+    )
+
+def _batches(migrations):
+    """Groups consecutive transactional migrations, no-transaction ones stand alone."""
+    batch = []
+    for migration in migrations:
+        if migration["transactional"]:
+            batch.append(migration)
+            continue
+        if batch:
+            yield batch
+            batch = []
+        yield [migration]
+    if batch:
+        yield batch
+
+def migrate(dry_run=False, migrations_dir=MIGRATIONS_DIR):
+    """Applies pending migrations to the database of the active pool.
+
+    With dry_run the transactional migrations are executed and rolled back,
+    which validates them without changing anything. No-transaction migrations
+    cannot be rolled back, they are only listed.
+    ERROR IDS:
+    ERR-MIG-001: An applied migration file was modified.
+    ERR-MIG-002: A migration failed, its batch was rolled back.
+    ERR-MIG-003: A no-transaction migration did not finish, see resolve_migration.
+    """
+
+    migrations = load_migrations(migrations_dir)
+
+    with get_psql_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+        try:
+            cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL;")
+            if cursor.fetchone()[0]:
+                cursor.execute("SELECT version, name, checksum, dirty FROM schema_version ORDER BY version;")
+                rows = cursor.fetchall()
+            else:
+                rows = []
+                if not dry_run:
+                    _ensure_schema_version_table(cursor)
+
+            dirty = [(version, name) for version, name, _, is_dirty in rows if is_dirty]
+            if dirty:
+                version, name = dirty[0]
+                return {"success": False, "error": f"Migration '{name}' did not finish and may have left the database "
+                        f"partially migrated. Check its objects (e.g. drop INVALID indexes), then call "
+                        f"resolve_migration({version}).", "error_id": "ERR-MIG-003"}
+            applied = {version: checksum for version, _, checksum, _ in rows}
+
+            for migration in migrations:
+                checksum = applied.get(migration["version"])
+                if checksum is not None and checksum.strip() != migration["checksum"]:
+                    return {"success": False, "error": f"Migration '{migration['name']}' was modified after it was applied.", "error_id": "ERR-MIG-001"}
+
+            pending = [migration for migration in migrations if migration["version"] not in applied]
+            pending_names = [migration["name"] for migration in pending]
+
+            if dry_run:
+                return _dry_run(conn, cursor, pending, pending_names)
+
+            applied_now = []
+            for batch in _batches(pending):
+                current = None
+                try:
+                    if batch[0]["transactional"]:
+                        conn.autocommit = False
+                        for current in batch:
+                            cursor.execute(current["sql"])
+                            _record_migration(cursor, current)
+                        conn.commit()
+                    else:
+                        # Recorded as dirty first, a failure part way leaves it dirty
+                        current = batch[0]
+                        _record_migration(cursor, current, dirty=True)
+                        for statement in _split_statements(current["sql"]):
+                            cursor.execute(statement)
+                        cursor.execute("UPDATE schema_version SET dirty = FALSE WHERE version = %s;", (current["version"],))
+                except Exception as e:
+                    if not conn.autocommit:
+                        conn.rollback()
+                    return {"success": False, "error": f"Migration '{current['name']}' failed: {e}", "error_id": "ERR-MIG-002",
+                            "applied": applied_now}
+                finally:
+                    conn.autocommit = True
+                applied_now.extend(migration["name"] for migration in batch)
+                print(f"Applied migrations: {', '.join(migration['name'] for migration in batch)}")
+
+            return {"success": True, "applied": applied_now, "pending": [], "dry_run": False}
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+            cursor.close()
+
+def _dry_run(conn, cursor, pending, pending_names):
+    validated, skipped = [], []
+    current = None
+    conn.autocommit = False
+    try:
+        for current in pending:
+            # Later migrations may depend on what a skipped one creates, they are not validated either
+            if skipped or not current["transactional"]:
+                skipped.append(current["name"])
+                continue
+            cursor.execute(current["sql"])
+            validated.append(current["name"])
+    except Exception as e:
+        return {"success": False, "error": f"Migration '{current['name']}' failed: {e}", "error_id": "ERR-MIG-002",
+                "dry_run": True}
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+
+    return {"success": True, "applied": [], "pending": pending_names, "validated": validated,
+            "not_validated": skipped, "dry_run": True}
+
+def resolve_migration(version, applied=False):
+    """Clears the dirty state of a no-transaction migration that did not finish.
+
+    With applied=True the migration was completed by hand and is kept as
+    applied, otherwise it is forgotten and runs again on the next migrate.
+    Its statements must be safe to run again (e.g. IF NOT EXISTS, after
+    dropping INVALID indexes left by CREATE INDEX CONCURRENTLY).
+    ERROR IDS:
+    ERR-MIG-004: The migration is not marked as dirty.
+    """
+
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            if applied:
+                cursor.execute("UPDATE schema_version SET dirty = FALSE WHERE version = %s AND dirty;", (version,))
+            else:
+                cursor.execute("DELETE FROM schema_version WHERE version = %s AND dirty;", (version,))
+            if cursor.rowcount == 0:
+                return {"success": False, "error": f"Migration {version} is not marked as dirty.", "error_id": "ERR-MIG-004"}
+    return {"success": True}
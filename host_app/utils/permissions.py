@@ -0,0 +1,233 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import select
+import threading
+import traceback
+from psycopg2 import OperationalError, InterfaceError
+from .database import get_psql_connection, open_dedicated_psql_connection
+
+# In-process cache of every user's effective permissions. Checks are a dict
+# and set lookup, the database is only read when a user is first seen or
+# after a change. Changes arrive through LISTEN on a dedicated connection,
+# the triggers of migrations/0007_create_roles.sql send them on commit.
+
+PERMISSIONS_CHANNEL = "oddm_permissions"
+LISTEN_POLL_SECONDS = 1.0      # how often the listener checks for a stop request
+RECONNECT_BACKOFF_MAX = 30.0
+
+PERMISSIONS = frozenset({
+    "datasets.view", "datasets.import", "datasets.release",
+    "annotations.modify", "annotations.review", "annotations.verify",
+    "tasks.claim", "tasks.assign",
+    "projects.manage", "users.manage",
+})
+
+_PERMISSIONS_QUERY = """
+    SELECT u.id, u.is_admin, u.is_active, array_remove(array_agg(DISTINCT rp.permission), NULL)
+    FROM users u
+    LEFT JOIN user_roles ur ON ur.user_id = u.id
+    LEFT JOIN role_permissions rp ON rp.role_id = ur.role_id
+    {where}
+    GROUP BY u.id, u.is_admin, u.is_active;
+"""
+
+def _effective_permissions(is_admin, is_active, permissions):
+    if not is_active:
+        return frozenset()
+    if is_admin:
+        return PERMISSIONS
+    return frozenset(permissions)
+
+class PermissionCache:
+    def __init__(self):
+        self._permissions = {}     # user id -> frozenset of permissions
+        self._lock = threading.Lock()
+        self._generation = 0       # bumped by every invalidation, see _store
+        self._listener = None
+        self._stop = threading.Event()
+        self._listening = threading.Event()  # set while LISTEN is active, the cache is only trusted then
+
+    def warm(self):
+        """Loads every user in one query, afterwards checks never touch the database."""
+        generation = self._generation
+        with get_psql_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(_PERMISSIONS_QUERY.format(where=""))
+                loaded = {user_id: _effective_permissions(*row) for user_id, *row in cursor.fetchall()}
+        self._store(loaded, generation, replace=True)
+
+    def _load(self, user_ids):
+        generation = self._generation
+        with get_psql_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(_PERMISSIONS_QUERY.format(where="WHERE u.id = ANY(%s)"), (list(user_ids),))
+                loaded = {user_id: _effective_permissions(*row) for user_id, *row in cursor.fetchall()}
+        # Unknown users get no permissions, until a NOTIFY says otherwise
+        for user_id in user_ids:
+            loaded.setdefault(user_id, frozenset())
+        self._store(loaded, generation)
+        return loaded
+
+    def _store(self, loaded, generation, replace=False):
+        """Drops results that an invalidation overtook while they were being read."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            if replace:
+                self._permissions = dict(loaded)
+            else:
+                self._permissions.update(loaded)
+
+    def get_permissions(self, user_id):
+        if not self._listening.is_set():
+            # Without a listener changes would go unnoticed, read through to the database
+            return self._load([user_id])[user_id]
+        permissions = self._permissions.get(user_id)
+        if permissions is None:
+            permissions = self._load([user_id])[user_id]
+        return permissions
+
+    def has_permission(self, user_id, permission):
+        return permission in self.get_permissions(user_id)
+
+    def invalidate(self, user_id=None):
+        """Forgets one user, or everybody when user_id is None."""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._permissions = {}
+            else:
+                self._permissions.pop(user_id, None)
+
+    def _handle_notification(self, payload):
+        if payload.startswith("user:"):
+            try:
+                self.invalidate(int(payload[5:]))
+                return
+            except ValueError:
+                print(f"Unexpected permission notification '{payload}', dropping every cached user.")
+        self.invalidate()
+
+    def start_listening(self):
+        """Starts the LISTEN thread. Safe to call more than once."""
+        if self._listener is not None and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen_loop, name="oddm-permission-listener", daemon=True)
+        self._listener.start()
+
+    def stop_listening(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join()
+            self._listener = None
+
+    def _listen_loop(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = open_dedicated_psql_connection()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {PERMISSIONS_CHANNEL};")
+                # Anything may have changed while no listener was connected
+                self.invalidate()
+                self._listening.set()
+                backoff = 1.0
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], LISTEN_POLL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._handle_notification(conn.notifies.pop(0).payload)
+            except Exception as e:
+                # Any failure (lost connection, no active pool...) must not end the thread,
+                # the cache would then keep serving revoked permissions
+                if isinstance(e, (OperationalError, InterfaceError)):
+                    print(f"Permission listener lost its connection, reconnecting: {e}")
+                else:
+                    traceback.print_exc()
+                self._listening.clear()
+                self.invalidate()
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+            finally:
+                self._listening.clear()
+                if conn is not None:
+                    conn.close()
+
+_PERMISSION_CACHE = None
+_PERMISSION_CACHE_LOCK = threading.Lock()
+
+def get_permission_cache():
+    """Returns the process wide cache, listening for changes."""
+    global _PERMISSION_CACHE
+    with _PERMISSION_CACHE_LOCK:
+        if _PERMISSION_CACHE is None:
+            _PERMISSION_CACHE = PermissionCache()
+            _PERMISSION_CACHE.start_listening()
+        return _PERMISSION_CACHE
+
+def has_permission(user_id, permission):
+    return get_permission_cache().has_permission(user_id, permission)
+
+def create_role(name, permissions, description=None):
+    unknown = set(permissions) - PERMISSIONS
+    if unknown:
+        return {"success": False, "error": f"Unknown permissions: {', '.join(sorted(unknown))}", "error_id": "ERR-ROLE-002"}
+
+    with get_psql_connection(autocommit=False) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM roles WHERE name = %s;", (name,))
+        if cursor.fetchone():
+            cursor.close()
+            return {"success": False, "error": "A role with this name already exists.", "error_id": "ERR-ROLE-001"}
+        cursor.execute("INSERT INTO roles (name, description) VALUES (%s, %s) RETURNING id;", (name, description))
+        role_id = cursor.fetchone()[0]
+        cursor.execute("""
+            INSERT INTO role_permissions (role_id, permission)
+            SELECT %s, unnest(%s::text[]);
+        """, (role_id, sorted(set(permissions))))
+        cursor.close()
+    return {"success": True, "id": role_id}
+
+def assign_roles(user_id, role_names):
+    """Grants roles to a user, roles the user already has are ignored."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO user_roles (user_id, role_id)
+                SELECT %s, id FROM roles WHERE name = ANY(%s)
+                ON CONFLICT DO NOTHING;
+            """, (user_id, list(role_names)))
+            return {"success": True, "granted": cursor.rowcount}
+
+def revoke_roles(user_id, role_names):
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM user_roles
+                WHERE user_id = %s AND role_id IN (SELECT id FROM roles WHERE name = ANY(%s));
+            """, (user_id, list(role_names)))
+            return {"success": True, "revoked": cursor.rowcount}
@@ -0,0 +1,196 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from psycopg2.extras import Json
+from .database import get_psql_connection
+
+# PostgreSQL backed work queue, see migrations/0006_create_tasks.sql.
+#
+# Every statement that picks rows uses FOR UPDATE SKIP LOCKED: a reviewer
+# never waits for another reviewer's claim and never gets a row someone else
+# is claiming. Per user fairness is a cap on outstanding claims, checked
+# under a lock on the user's own row so it does not serialise other users.
+
+TASK_KINDS = ("modify", "review", "verify")
+PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_BACKGROUND = 0, 1, 2
+DEFAULT_LEASE_SECONDS = 15 * 60
+MAX_OUTSTANDING_TASKS = 50   # claimed but not completed, per user
+MAX_ATTEMPTS = 5             # leases that may expire before a task is marked failed
+REQUEUE_BATCH_SIZE = 1000
+
+def enqueue_tasks(project_id, kind, image_ids, priority=PRIORITY_NORMAL, created_by=None, payload=None):
+    """Queues one task per image, returns the number of tasks created."""
+    if kind not in TASK_KINDS:
+        return {"success": False, "error": f"Unknown task kind '{kind}'.", "error_id": "ERR-TSK-002"}
+
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO tasks (project_id, image_id, kind, priority, created_by, payload)
+                SELECT %s, image_id, %s, %s, %s, %s
+                FROM unnest(%s::bigint[]) AS new_tasks(image_id);
+            """, (project_id, kind, priority, created_by, Json(payload) if payload is not None else None,
+                  list(image_ids)))
+            return {"success": True, "created": cursor.rowcount}
+
+def requeue_expired_leases(cursor=None):
+    """Puts tasks whose lease expired back in the queue, or fails them after MAX_ATTEMPTS.
+
+    Runs at the start of every claim, so no scheduler is needed. Rows another
+    session is already requeueing are skipped.
+    """
+    query = """
+        WITH expired AS (
+            SELECT id FROM tasks
+            WHERE status = 'claimed' AND lease_expires_at < CURRENT_TIMESTAMP
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE tasks t
+        SET status = CASE WHEN t.attempts >= %s THEN 'failed' ELSE 'queued' END,
+            assigned_to = NULL,
+            lease_expires_at = NULL,
+            updated_at = CURRENT_TIMESTAMP
+        FROM expired
+        WHERE t.id = expired.id;
+    """
+    if cursor is not None:
+        cursor.execute(query, (REQUEUE_BATCH_SIZE, MAX_ATTEMPTS))
+        return cursor.rowcount
+    with get_psql_connection() as conn:
+        with conn.cursor() as own_cursor:
+            own_cursor.execute(query, (REQUEUE_BATCH_SIZE, MAX_ATTEMPTS))
+            return own_cursor.rowcount
+
+def claim_tasks(project_id, user_id, kinds=TASK_KINDS, limit=10, lease_seconds=DEFAULT_LEASE_SECONDS,
+                max_outstanding=MAX_OUTSTANDING_TASKS):
+    """Claims up to `limit` queued tasks for an active user, most urgent lane first.
+
+    Returns {"success", "tasks": [{"id", "image_id", "kind", "priority", "payload", "lease_expires_at"}]}.
+    Fewer tasks (or none) are returned when the user already holds max_outstanding.
+    """
+    with get_psql_connection(autocommit=False) as conn:
+        cursor = conn.cursor()
+        requeue_expired_leases(cursor)
+
+        # Serialises the claims of this user only. NO KEY keeps the tasks.assigned_to foreign key checks unblocked.
+        cursor.execute("SELECT id FROM users WHERE id = %s AND is_active FOR NO KEY UPDATE;", (user_id,))
+        if cursor.fetchone() is None:
+            cursor.close()
+            return {"success": False, "error": "User does not exist or is not active.", "error_id": "ERR-TSK-001"}
+
+        cursor.execute("SELECT count(*) FROM tasks WHERE assigned_to = %s AND status = 'claimed';", (user_id,))
+        limit = min(limit, max_outstanding - cursor.fetchone()[0])
+        if limit <= 0:
+            cursor.close()
+            return {"success": True, "tasks": []}
+
+        cursor.execute("""
+            WITH picked AS (
+                SELECT id FROM tasks
+                WHERE project_id = %(project_id)s AND status = 'queued' AND kind = ANY(%(kinds)s)
+                ORDER BY priority, id
+                LIMIT %(limit)s
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE tasks t
+            SET status = 'claimed',
+                assigned_to = %(user_id)s,
+                attempts = t.attempts + 1,
+                lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %(lease_seconds)s),
+                updated_at = CURRENT_TIMESTAMP
+            FROM picked
+            WHERE t.id = picked.id
+            RETURNING t.id, t.image_id, t.kind, t.priority, t.payload, t.lease_expires_at;
+        """, {"project_id": project_id, "kinds": list(kinds), "limit": limit, "user_id": user_id,
+              "lease_seconds": lease_seconds})
+        columns = ("id", "image_id", "kind", "priority", "payload", "lease_expires_at")
+        tasks = sorted((dict(zip(columns, row)) for row in cursor.fetchall()), key=lambda task: (task["priority"], task["id"]))
+        cursor.close()
+    return {"success": True, "tasks": tasks}
+
+def extend_lease(task_ids, user_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Heartbeat for long running work. Returns the ids whose lease was extended."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE tasks
+                SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s), updated_at = CURRENT_TIMESTAMP
+                WHERE id = ANY(%s) AND assigned_to = %s AND status = 'claimed'
+                RETURNING id;
+            """, (lease_seconds, list(task_ids), user_id))
+            return [row[0] for row in cursor.fetchall()]
+
+def complete_tasks(task_ids, user_id):
+    """Marks tasks done. Only tasks still held by the user are completed, the ids are returned."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE tasks
+                SET status = 'done', lease_expires_at = NULL,
+                    completed_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ANY(%s) AND assigned_to = %s AND status = 'claimed'
+                RETURNING id;
+            """, (list(task_ids), user_id))
+            return [row[0] for row in cursor.fetchall()]
+
+def release_tasks(task_ids, user_id):
+    """Gives claimed tasks back to the queue without counting it as a failed attempt."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE tasks
+                SET status = 'queued', assigned_to = NULL, lease_expires_at = NULL,
+                    attempts = GREATEST(attempts - 1, 0), updated_at = CURRENT_TIMESTAMP
+                WHERE id = ANY(%s) AND assigned_to = %s AND status = 'claimed'
+                RETURNING id;
+            """, (list(task_ids), user_id))
+            return [row[0] for row in cursor.fetchall()]
+
+def get_queue_stats(project_id):
+    """Returns {(kind, priority, status): count} for a project."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT kind, priority, status, count(*)
+                FROM tasks WHERE project_id = %s
+                GROUP BY kind, priority, status;
+            """, (project_id,))
+            return {(kind, priority, status): count for kind, priority, status, count in cursor.fetchall()}
+
+def get_user_workload(project_id):
+    """Outstanding and completed tasks per user of a project, joined with their account."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT u.id, u.username, u.email,
+                       count(*) FILTER (WHERE t.status = 'claimed') AS outstanding,
+                       count(*) FILTER (WHERE t.status = 'done') AS completed,
+                       min(t.lease_expires_at) FILTER (WHERE t.status = 'claimed') AS next_lease_expiry
+                FROM tasks t
+                JOIN users u ON u.id = t.assigned_to
+                WHERE t.project_id = %s
+                GROUP BY u.id, u.username, u.email
+                ORDER BY outstanding DESC, u.username;
+            """, (project_id,))
+            columns = ("user_id", "username", "email", "outstanding", "completed", "next_lease_expiry")
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -0,0 +1,228 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import uuid
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import Image, ImageOps
+from .auth import get_data_storage_path
+
+# Thumbnail pyramid cache under data_storage_path:
+#
+#   <data_storage_path>/thumbnails/<size>/ab/abcd1234....jpg   (sha256 of the original)
+#
+# Every level of the pyramid is built from one decode of the original, each
+# smaller level is downscaled from the level above it. Thumbnails are keyed by
+# content hash like the blob store, so they never go stale and duplicates
+# share them. The cache is bounded, least recently used files (by mtime,
+# refreshed on every hit) are evicted first. Missing thumbnails are rebuilt
+# on demand.
+
+THUMBNAILS_DIR_NAME = "thumbnails"
+THUMBNAIL_SIZES = (64, 128, 256)
+THUMBNAIL_EXTENSION = ".jpg"
+THUMBNAIL_QUALITY = 80
+DEFAULT_MAX_CACHE_BYTES = 2 * 1024 ** 3
+EVICT_TARGET_RATIO = 0.9  # evict down to 90% of the limit so not every build triggers an eviction
+
+def _thumbnail_path(root, content_hash, size):
+    return Path(root) / str(size) / content_hash[:2] / f"{content_hash}{THUMBNAIL_EXTENSION}"
+
+def build_pyramid(root, content_hash, source_path, sizes=THUMBNAIL_SIZES):
+    """Builds every thumbnail size of one image. Runs in the process pool.
+
+    Returns the number of bytes written, 0 when every level already existed.
+    """
+    sizes = sorted(sizes, reverse=True)
+    missing = [size for size in sizes if not _thumbnail_path(root, content_hash, size).exists()]
+    if not missing:
+        return 0
+
+    written = 0
+    with Image.open(source_path) as original:
+        # JPEG can decode straight at 1/2, 1/4 or 1/8 scale, much cheaper than a full decode
+        original.draft("RGB", (sizes[0], sizes[0]))
+        image = ImageOps.exif_transpose(original)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        for size in sizes:
+            image.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+            if size not in missing:
+                continue
+            target = _thumbnail_path(root, content_hash, size)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f".{uuid.uuid4().hex}.tmp")
+            try:
+                image.save(tmp_path, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+                os.replace(tmp_path, target)
+            except BaseException:
+                if tmp_path.exists():
+                    os.remove(tmp_path)
+                raise
+            written += target.stat().st_size
+    return written
+
+def _build_pyramid_in_worker(root, content_hash, source_path, sizes):
+    try:
+        return {"success": True, "hash": content_hash, "bytes": build_pyramid(root, content_hash, source_path, sizes)}
+    except Exception as e:
+        return {"success": False, "hash": content_hash, "error": f"{source_path}: {e}"}
+
+class ThumbnailCache:
+    def __init__(self, root, sizes=THUMBNAIL_SIZES, max_bytes=DEFAULT_MAX_CACHE_BYTES):
+        self.root = Path(root)
+        self.sizes = tuple(sorted(sizes))
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._approx_bytes = None  # unknown until the first eviction scan
+
+    def path_for(self, content_hash, size):
+        if len(content_hash) != 64:
+            raise ValueError(f"Invalid content hash '{content_hash}'")
+        return _thumbnail_path(self.root, content_hash, size)
+
+    def level_for(self, size):
+        """Smallest pyramid level that is at least `size`, so it is only ever scaled down."""
+        for level in self.sizes:
+            if level >= size:
+                return level
+        return self.sizes[-1]
+
+    def get(self, content_hash, size):
+        """Returns the path of a cached thumbnail, or None when it is missing."""
+        path = self.path_for(content_hash, self.level_for(size))
+        try:
+            os.utime(path)  # marks it recently used for eviction
+        except FileNotFoundError:
+            return None
+        return path
+
+    def ensure(self, content_hash, size, source_path):
+        """Returns the thumbnail path, rebuilding the pyramid in this thread when it is missing."""
+        path = self.get(content_hash, size)
+        if path is not None:
+            return path
+        try:
+            written = build_pyramid(self.root, content_hash, source_path, self.sizes)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            print(f"Could not build thumbnails for {content_hash}: {e}")
+            return None
+        self.record_written(written)
+        return self.path_for(content_hash, self.level_for(size))
+
+    def generate(self, images, max_workers=None, progress_callback=None, cancel_event=None):
+        """Builds the pyramids of many images on a process pool, used at ingest time.
+
+        `images` is an iterable of (content_hash, source_path). Images whose
+        thumbnails all exist are skipped without being opened.
+        progress_callback(done, total, message) is called as images complete.
+        """
+        todo = [(content_hash, str(source_path)) for content_hash, source_path in images
+                if any(not self.path_for(content_hash, size).exists() for size in self.sizes)]
+        result = {"success": True, "generated": 0, "failed": [], "bytes": 0}
+        if not todo:
+            return result
+
+        max_workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(todo) // (4 * max_workers))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_build_pyramid_in_worker, [str(self.root)] * len(todo),
+                                   *zip(*todo), [self.sizes] * len(todo), chunksize=chunksize)
+            for done, res in enumerate(results, start=1):
+                if res["success"]:
+                    result["generated"] += 1
+                    result["bytes"] += res["bytes"]
+                else:
+                    print(f"Thumbnail generation failed for {res['error']}")
+                    result["failed"].append(res["hash"])
+                if progress_callback is not None and (done % 100 == 0 or done == len(todo)):
+                    progress_callback(done, len(todo), "Generating thumbnails")
+                if cancel_event is not None and cancel_event.is_set():
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    result["success"] = False
+                    result["error"] = "Thumbnail generation was cancelled."
+                    break
+
+        self.record_written(result["bytes"])
+        return result
+
+    def record_written(self, written):
+        """Counts thumbnails written outside this object (ingest workers), evicts when over the limit."""
+        if not written:
+            return
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += written
+            over_limit = self._approx_bytes is None or self._approx_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def _scan(self):
+        files = []
+        for size in self.sizes:
+            level_dir = self.root / str(size)
+            if not level_dir.is_dir():
+                continue
+            for fan_out in os.scandir(level_dir):
+                if not fan_out.is_dir():
+                    continue
+                for entry in os.scandir(fan_out.path):
+                    if entry.is_file() and entry.name.endswith(THUMBNAIL_EXTENSION):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def evict(self):
+        """Deletes the least recently used thumbnails until the cache fits its limit again."""
+        with self._lock:
+            files = self._scan()
+            total = sum(size for _, size, _ in files)
+            removed = 0
+            if total > self.max_bytes:
+                target = self.max_bytes * EVICT_TARGET_RATIO
+                files.sort()
+                for _, size, path in files:
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    removed += 1
+            self._approx_bytes = total
+        return {"success": True, "removed": removed, "bytes": total}
+
+_THUMBNAIL_CACHES = {}
+_THUMBNAIL_CACHES_LOCK = threading.Lock()
+
+def get_thumbnail_cache():
+    """Returns the cache under the data_storage_path chosen during setup."""
+    root = get_data_storage_path() / THUMBNAILS_DIR_NAME
+    with _THUMBNAIL_CACHES_LOCK:
+        cache = _THUMBNAIL_CACHES.get(root)
+        if cache is None:
+            cache = _THUMBNAIL_CACHES[root] = ThumbnailCache(root)
+        return cache
@@ -0,0 +1,251 @@
+# MIT License
+# 
+# Copyright (c) 2025 Yahiya Mulla
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import uuid
+from .database import get_psql_connection
+
+# Dataset versions (releases), see migrations/0005_create_dataset_versions.sql.
+#
+# Creating a release diffs the working set (the annotations table) against
+# the parent version in one set-based statement: the project is read once
+# and only the changed rows are written. Materializing a version walks its parents up to the
+# nearest snapshot and keeps the newest delta of every annotation.
+
+SNAPSHOT_INTERVAL = 10        # store a full snapshot after this many delta releases, bounds the chain walked on reads
+VERSION_BATCH_SIZE = 20000    # rows per round trip when streaming a version
+
+def _version_boxes_cte(name, param):
+    """CTEs that materialize the version given by query parameter `param` as `<name>_boxes`.
+
+    Rows are (annotation_id, image_id, class_id, x_min, y_min, x_max, y_max).
+    Needs WITH RECURSIVE.
+    """
+    return f"""
+    {name}_chain AS (
+        SELECT id, parent_id, is_snapshot, 0 AS distance
+        FROM dataset_versions WHERE id = %({param})s
+        UNION ALL
+        SELECT v.id, v.parent_id, v.is_snapshot, c.distance + 1
+        FROM dataset_versions v
+        JOIN {name}_chain c ON v.id = c.parent_id
+        WHERE NOT c.is_snapshot
+    ),
+    {name}_deltas AS (
+        SELECT DISTINCT ON (d.annotation_id)
+               d.annotation_id, d.image_id, d.class_id, d.x_min, d.y_min, d.x_max, d.y_max, d.op
+        FROM dataset_version_deltas d
+        JOIN {name}_chain c ON c.id = d.version_id
+        ORDER BY d.annotation_id, c.distance
+    ),
+    {name}_boxes AS (
+        SELECT annotation_id, image_id, class_id, x_min, y_min, x_max, y_max
+        FROM {name}_deltas WHERE op <> 'R'
+    )"""
+
+def _get_version(cursor, version_id):
+    cursor.execute("""
+        SELECT id, project_id, parent_id, name, is_snapshot, chain_length, box_count
+        FROM dataset_versions WHERE id = %s;
+    """, (version_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip(("id", "project_id", "parent_id", "name", "is_snapshot", "chain_length", "box_count"), row))
+
+def list_versions(project_id):
+    """Returns the versions of a project, oldest first."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, parent_id, name, description, is_snapshot, box_count, created_by, created_at
+                FROM dataset_versions WHERE project_id = %s ORDER BY id;
+            """, (project_id,))
+            columns = ("id", "parent_id", "name", "description", "is_snapshot", "box_count", "created_by", "created_at")
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def create_release(project_id, name, description=None, created_by=None, parent_id=None):
+    """Records the current annotations of a project as a new version.
+
+    The parent defaults to the newest version of the project. Returns
+    {"success", "id", "added", "removed", "changed", "is_snapshot"}.
+    """
+    with get_psql_connection(autocommit=False) as conn:
+        cursor = conn.cursor()
+        # One release at a time per project. NO KEY keeps the foreign key checks of annotation
+        # writers unblocked, the diff is a single statement and reads one consistent snapshot.
+        cursor.execute("SELECT id FROM projects WHERE id = %s FOR NO KEY UPDATE;", (project_id,))
+        if cursor.fetchone() is None:
+            cursor.close()
+            return {"success": False, "error": "Project does not exist.", "error_id": "ERR-VER-002"}
+
+        if parent_id is None:
+            cursor.execute("SELECT max(id) FROM dataset_versions WHERE project_id = %s;", (project_id,))
+            parent_id = cursor.fetchone()[0]
+        parent = _get_version(cursor, parent_id) if parent_id is not None else None
+        if parent_id is not None and (parent is None or parent["project_id"] != project_id):
+            cursor.close()
+            return {"success": False, "error": "Parent version does not belong to this project.", "error_id": "ERR-VER-002"}
+
+        cursor.execute("SELECT 1 FROM dataset_versions WHERE project_id = %s AND name = %s;", (project_id, name))
+        if cursor.fetchone():
+            cursor.close()
+            return {"success": False, "error": "A version with this name already exists.", "error_id": "ERR-VER-001"}
+
+        is_snapshot = parent is None or parent["chain_length"] + 1 >= SNAPSHOT_INTERVAL
+        cursor.execute("""
+            INSERT INTO dataset_versions (project_id, parent_id, name, description, is_snapshot, chain_length, created_by)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            RETURNING id;
+        """, (project_id, parent_id, name, description, is_snapshot,
+              0 if is_snapshot else parent["chain_length"] + 1, created_by))
+        version_id = cursor.fetchone()[0]
+
+        if is_snapshot:
+            cursor.execute("""
+                INSERT INTO dataset_version_deltas (version_id, annotation_id, image_id, class_id, x_min, y_min, x_max, y_max, op)
+                SELECT %s, id, image_id, class_id, x_min, y_min, x_max, y_max, 'A'
+                FROM annotations WHERE project_id = %s;
+            """, (version_id, project_id))
+        else:
+            # Full outer join of the working set and the parent, only the differences are written
+            cursor.execute(f"""
+                WITH RECURSIVE {_version_boxes_cte("parent", "parent_id")},
+                working AS (
+                    SELECT id AS annotation_id, image_id, class_id, x_min, y_min, x_max, y_max
+                    FROM annotations WHERE project_id = %(project_id)s
+                )
+                INSERT INTO dataset_version_deltas (version_id, annotation_id, image_id, class_id, x_min, y_min, x_max, y_max, op)
+                SELECT %(new_version_id)s,
+                       COALESCE(w.annotation_id, p.annotation_id),
+                       COALESCE(w.image_id, p.image_id),
+                       w.class_id, w.x_min, w.y_min, w.x_max, w.y_max,
+                       CASE WHEN p.annotation_id IS NULL THEN 'A'
+                            WHEN w.annotation_id IS NULL THEN 'R'
+                            ELSE 'C' END
+                FROM working w
+                FULL OUTER JOIN parent_boxes p ON p.annotation_id = w.annotation_id
+                WHERE p.annotation_id IS NULL
+                   OR w.annotation_id IS NULL
+                   OR (w.image_id, w.class_id, w.x_min, w.y_min, w.x_max, w.y_max)
+                      IS DISTINCT FROM (p.image_id, p.class_id, p.x_min, p.y_min, p.x_max, p.y_max);
+            """, {"parent_id": parent_id, "project_id": project_id, "new_version_id": version_id})
+
+        cursor.execute("SELECT op, count(*) FROM dataset_version_deltas WHERE version_id = %s GROUP BY op;", (version_id,))
+        counts = dict(cursor.fetchall())
+        added, removed, changed = counts.get("A", 0), counts.get("R", 0), counts.get("C", 0)
+        box_count = added if is_snapshot else parent["box_count"] + added - removed
+        cursor.execute("UPDATE dataset_versions SET box_count = %s WHERE id = %s;", (box_count, version_id))
+        cursor.close()
+
+    if is_snapshot and parent is not None:
+        # The snapshot stores every box, report the real change against the parent
+        diff = diff_summary(parent_id, version_id)
+        added, removed, changed = diff["added"], diff["removed"], diff["changed"]
+
+    return {"success": True, "id": version_id, "added": added, "removed": removed, "changed": changed,
+            "is_snapshot": is_snapshot}
+
+def iter_version_boxes(version_id, batch_size=VERSION_BATCH_SIZE):
+    """Yields lists of (annotation_id, image_id, class_id, x_min, y_min, x_max, y_max) of a version, by image."""
+    with get_psql_connection(autocommit=False) as conn:
+        cursor = conn.cursor(name=f"oddm_version_{uuid.uuid4().hex}")
+        cursor.itersize = batch_size
+        cursor.execute(f"""
+            WITH RECURSIVE {_version_boxes_cte("version", "version_id")}
+            SELECT annotation_id, image_id, class_id, x_min, y_min, x_max, y_max
+            FROM version_boxes ORDER BY image_id, annotation_id;
+        """, {"version_id": version_id})
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+def _diff_query(select):
+    """Full outer join of two materialized versions, from_boxes f and to_boxes t."""
+    return f"""
+        WITH RECURSIVE {_version_boxes_cte("from", "from_id")},
+        {_version_boxes_cte("to", "to_id")}
+        {select}
+        FROM from_boxes f
+        FULL OUTER JOIN to_boxes t ON t.annotation_id = f.annotation_id
+        WHERE f.annotation_id IS NULL
+           OR t.annotation_id IS NULL
+           OR (f.image_id, f.class_id, f.x_min, f.y_min, f.x_max, f.y_max)
+              IS DISTINCT FROM (t.image_id, t.class_id, t.x_min, t.y_min, t.x_max, t.y_max)
+    """
+
+def _is_parent(cursor, from_id, to_id):
+    """A delta version diffed against its parent: its own deltas already are the diff."""
+    cursor.execute("SELECT parent_id, is_snapshot FROM dataset_versions WHERE id = %s;", (to_id,))
+    row = cursor.fetchone()
+    return row is not None and row[0] == from_id and not row[1]
+
+def diff_summary(from_version_id, to_version_id):
+    """Counts the annotations added, removed and changed going from one version to another."""
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            if _is_parent(cursor, from_version_id, to_version_id):
+                cursor.execute("SELECT op, count(*) FROM dataset_version_deltas WHERE version_id = %s GROUP BY op;",
+                               (to_version_id,))
+            else:
+                cursor.execute(_diff_query("""
+                    SELECT CASE WHEN f.annotation_id IS NULL THEN 'A'
+                                WHEN t.annotation_id IS NULL THEN 'R'
+                                ELSE 'C' END AS op, count(*)
+                """) + " GROUP BY 1;", {"from_id": from_version_id, "to_id": to_version_id})
+            counts = dict(cursor.fetchall())
+    return {"success": True, "added": counts.get("A", 0), "removed": counts.get("R", 0), "changed": counts.get("C", 0)}
+
+def diff_versions(from_version_id, to_version_id):
+    """Returns the annotation level difference between two versions of a project.
+
+    {"added": [box], "removed": [box], "changed": [(old box, new box)]} where a
+    box is (annotation_id, image_id, class_id, x_min, y_min, x_max, y_max).
+    """
+    with get_psql_connection() as conn:
+        with conn.cursor() as cursor:
+            versions = [_get_version(cursor, version_id) for version_id in (from_version_id, to_version_id)]
+            if None in versions or versions[0]["project_id"] != versions[1]["project_id"]:
+                return {"success": False, "error": "Both versions must exist and belong to the same project.",
+                        "error_id": "ERR-VER-003"}
+
+            cursor.execute(_diff_query("""
+                SELECT f.annotation_id, f.image_id, f.class_id, f.x_min, f.y_min, f.x_max, f.y_max,
+                       t.annotation_id, t.image_id, t.class_id, t.x_min, t.y_min, t.x_max, t.y_max
+            """) + " ORDER BY COALESCE(t.image_id, f.image_id), COALESCE(t.annotation_id, f.annotation_id);",
+                           {"from_id": from_version_id, "to_id": to_version_id})
+            rows = cursor.fetchall()
+
+    diff = {"success": True, "added": [], "removed": [], "changed": []}
+    for row in rows:
+        old, new = row[:7], row[7:]
+        if old[0] is None:
+            diff["added"].append(new)
+        elif new[0] is None:
+            diff["removed"].append(old)
+        else:
+            diff["changed"].append((old, new))
+    return diff